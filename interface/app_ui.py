@@ -1,7 +1,9 @@
 # interface/app_ui.py
 import asyncio
 import os
+import queue
 import sys
+import threading
 import time
 
 import streamlit as st
@@ -10,9 +12,12 @@ import streamlit as st
 # 因为我们在子目录运行，需要把根目录加入 path，这样才能 import core/infrastructure
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.agents.orchestrator import BoardOrchestrator
-from src.infrastructure.obsidian_loader import MemoryIngestionEngine
+from src.agents.orchestrator import BoardOrchestrator, new_meeting_id
+from src.infrastructure.ingestion_scheduler import IngestionBudget
+from src.infrastructure.obsidian_loader import MemoryIngestionEngine, scan_markdown_files
+from src.infrastructure.vault_watcher import VaultWatcher
 from src.infrastructure.vector_store import KnowledgeBase
+from src.service.client import API_URL, BoardClient
 
 # ==========================================
 # 1. 配置页面
@@ -64,29 +69,6 @@ def initialize_session_state():
 # 在模块加载时立即初始化
 initialize_session_state()
 
-def progress_callback(stage: str, message: str, start_time: float):
-    """
-    进度回调函数 - 接收 orchestrator 的进度更新并存储到 session_state
-    线程安全地更新 Streamlit 状态
-    Args:
-        stage: 阶段名称
-        message: 进度消息
-        start_time: 步骤开始时间戳
-    """
-    # 确保 session_state 已初始化
-    initialize_session_state()
-
-    # 计算耗时
-    duration = time.time() - start_time
-
-    # 安全地追加进度更新
-    st.session_state.progress_updates.append({
-        "stage": stage,
-        "message": message,
-        "start_time": start_time,
-        "duration": duration
-    })
-
 @st.cache_resource(show_spinner="正在唤醒董事会成员...")
 def get_orchestrator():
     """
@@ -99,8 +81,7 @@ def get_orchestrator():
     kb = KnowledgeBase(persist_dir="./data/chroma_db", reset_db=False) # 生产模式不建议每次 reset
 
     # B. 数据注入 (MVP为了演示，还是在这里做一下，实际使用可以移到 Sidebar 手动触发)
-    # 注意：这里为了防止重复插入，实际代码需要判断是否已经存在
-    # 这里我们假设如果你没有数据，就灌入Mock数据
+    # chunk ID 是内容寻址的，每次冷启动重复灌入同一份 Mock 数据也不会产生重复向量
     engine = MemoryIngestionEngine(knowledge_base=kb)
     # 模拟数据
     mock_data = """
@@ -113,13 +94,70 @@ def get_orchestrator():
     """
     engine.process_file(mock_data, source_name="system_boot_mock.md")
 
-    # C. 编排器 - 传入进度回调函数
-    orchestrator = BoardOrchestrator(vector_store=kb, progress_callback=progress_callback)
+    # C. 编排器 - 进度和 token 通过 astream_meeting 的事件流获取
+    orchestrator = BoardOrchestrator(vector_store=kb)
     return orchestrator, engine
 
+@st.cache_resource(show_spinner="正在连接董事会服务...")
+def get_board_client():
+    """
+    瘦客户端模式 (设置了 ECHO_BOARD_API_URL)：会议 / 同步都交给 HTTP 服务 (src.service.server)，
+    UI 进程不加载模型和知识库
+    """
+    client = BoardClient(API_URL)
+    client.health()
+    return client
+
+@st.cache_resource
+def get_event_loop():
+    """
+    进程内共享的事件循环 (跑在一个后台线程里)。
+    所有会话的会议都提交到这一个循环上并发执行，不再每条消息 asyncio.run 一次：
+    LLM 的异步 HTTP 连接、CFO 的 MCP 工具和锁都绑定在同一个循环上，可以跨会议复用。
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="echo-board-loop", daemon=True).start()
+    return loop
+
+def iter_meeting_events(query: str, meeting_id: str, force_refresh: bool = False):
+    """
+    在共享事件循环上开会，事件经线程安全队列交回脚本线程 (Streamlit 组件只能在脚本线程里更新)。
+    meeting_id 已有检查点时从断点继续，已完成的节点只回放不重跑；force_refresh 跳过整场会议的结果缓存。
+    """
+    if board_client is not None:
+        yield from board_client.stream_meeting(query, meeting_id=meeting_id, force_refresh=force_refresh)
+        return
+
+    events = queue.Queue()
+
+    async def produce():
+        try:
+            async for event in orchestrator.astream_meeting(query, meeting_id=meeting_id, force_refresh=force_refresh):
+                events.put(event)
+        except Exception as e:
+            events.put({"type": "error", "error": e})
+        finally:
+            events.put(None)
+
+    asyncio.run_coroutine_threadsafe(produce(), get_event_loop())
+    while (event := events.get()) is not None:
+        if event["type"] == "error":
+            raise event["error"]
+        yield event
+
+@st.cache_resource
+def get_vault_watcher(_engine, folder_path, sync_mode):
+    """每个库路径 (+ 同步模式) 只创建一个监听器，页面重跑时复用"""
+    return VaultWatcher(_engine, folder_path, sync_mode=sync_mode)
+
 # 获取单例
 try:
-    orchestrator, ingestion_engine = get_orchestrator()
+    if API_URL:
+        board_client = get_board_client()
+        orchestrator = ingestion_engine = None
+    else:
+        board_client = None
+        orchestrator, ingestion_engine = get_orchestrator()
 except Exception as e:
     st.error(f"系统启动失败: {e}")
     st.stop()
@@ -145,17 +183,31 @@ with st.sidebar:
         st.session_state.messages.append({"role": "user", "content": briefing_prompt})
         # 强制刷新 rerun 从而触发主界面的处理逻辑
         st.rerun()
+    force_refresh = st.checkbox(
+        "🔁 重新开会 (忽略缓存)",
+        help="同一个问题在笔记、画像、账本都没变时会直接复用上次的决议。勾选后每次都重新开会。"
+    )
 
     st.divider()
 
     # 同步功能区域
     st.markdown("### 📂 数据同步")
     folder_path = st.text_input("输入 Obsidian 库路径:", placeholder="/path/to/your/obsidian/vault")
+    vector_only = st.checkbox(
+        "⚡ 仅向量同步 (跳过画像提取)",
+        help="画像提取需要调用 LLM，默认在向量导入完成后于后台排队执行。勾选后完全跳过。"
+    )
+    unlimited_budget = st.checkbox(
+        "♾️ 不限预算 (一次导入全部改动)",
+        help="默认按预算 (INGEST_MAX_EMBED_TOKENS / INGEST_MAX_LLM_CALLS / INGEST_MAX_SECONDS) 导入，"
+             "最近修改、常被检索的笔记优先；超出预算的文件留到下次同步优先处理。"
+    )
 
     col1, col2 = st.columns([1, 1])
     with col1:
         if st.button("🔄 同步数据", disabled=not folder_path):
-            if folder_path and os.path.exists(folder_path):
+            # 瘦客户端模式下路径在服务端，由服务端校验
+            if folder_path and (board_client is not None or os.path.exists(folder_path)):
                 # 显示同步进度
                 sync_status = st.status("正在同步数据...", expanded=True)
                 sync_progress = st.progress(0)
@@ -169,131 +221,130 @@ with st.sidebar:
                     # 记录开始时间
                     start_time = time.time()
 
-                    # 获取文件夹中所有md文件
-                    md_files = []
-                    for root, dirs, files in os.walk(folder_path):
-                        dirs[:] = [d for d in dirs if not d.startswith('.')]
-                        for file in files:
-                            if file.endswith(".md"):
-                                md_files.append(os.path.join(root, file))
-
-                    total_files = len(md_files)
-                    total_size_bytes = 0
-
-                    # 第一遍扫描：计算总文件大小 (Bytes) - ⚡ Bolt Optimization: Replace full read with os.path.getsize
-                    for file_path in md_files:
-                        try:
-                            total_size_bytes += os.path.getsize(file_path)
-                        except Exception:
-                            pass
-
+                    sync_mode = "vector_only" if vector_only else "full"
+                    if board_client is not None:
+                        sync_job = board_client.start_ingest(folder_path, sync_mode, unlimited=unlimited_budget)
+                        total_files = sync_job["total"]
+                    else:
+                        total_files = len(scan_markdown_files(folder_path))
                     if total_files == 0:
                         sync_status.update(label="⚠️ 未找到 Markdown 文件", state="warning")
                         st.stop()
 
-                    # 逐步处理文件
-                    processed = 0
-                    processed_bytes = 0
-                    total_content_length = 0 # Track this for final stats
+                    # 并行导入流水线在后台线程中运行，主线程轮询进度
+                    # (Streamlit 组件只能在脚本线程里更新)
+                    progress_events = []  # (relative_path, status)
+                    sync_result = {}
 
-                    # 初始化日志列表
-                    processed_files = []
+                    def record_progress(relative_path, status, eta):
+                        progress_events.append((relative_path, status))
+                        sync_result["eta"] = eta
 
-                    for file_path in md_files:
+                    def run_sync():
                         try:
-                            # 读取文件内容
-                            with open(file_path, "r", encoding="utf-8") as f:
-                                content = f.read()
-
-                            file_size = len(content.encode('utf-8')) # Approximate byte size for progress
-
-                            relative_path = os.path.relpath(file_path, folder_path)
-
-                            # 更新当前文件显示
-                            sync_file_text.markdown(
-                                f"**正在处理**: {relative_path} "
-                                f"({len(content)} 字符)"
+                            if board_client is not None:
+                                sync_result["stats"] = board_client.wait_ingest(
+                                    sync_job["job_id"], on_progress=record_progress
+                                )
+                                return
+                            sync_result["stats"] = ingestion_engine.ingest_folder(
+                                folder_path,
+                                budget=IngestionBudget.no_limits() if unlimited_budget else None,
+                                on_progress=lambda path, status, stats: record_progress(
+                                    path, status, stats.eta_seconds
+                                ),
+                                sync_mode=sync_mode,
                             )
+                        except Exception as e:
+                            sync_result["error"] = e
+
+                    sync_thread = threading.Thread(target=run_sync)
+                    sync_thread.start()
 
-                            # 处理文件
-                            ingestion_engine.process_file(content, source_name=relative_path)
+                    status_icons = {"added": "✅", "updated": "🔁", "failed": "❌", "deferred": "⏸️"}
+                    processed_files = []
+                    seen_count = 0
 
-                            processed += 1
-                            processed_bytes += file_size
-                            total_content_length += len(content)
+                    while sync_thread.is_alive() or seen_count < len(progress_events):
+                        new_events = progress_events[seen_count:]
+                        seen_count += len(new_events)
 
-                            # 记录已处理的文件
-                            processed_files.append({
-                                "file": relative_path,
-                                "chars": len(content),
-                                "status": "✅"
-                            })
+                        for relative_path, status in new_events:
+                            if status != "unchanged":
+                                # 只记录真正重新导入 (或失败) 的文件
+                                processed_files.append({"file": relative_path, "status": status_icons.get(status, "📄")})
 
-                            # 更新日志显示
+                        if new_events:
+                            sync_file_text.markdown(f"**最近处理**: {new_events[-1][0]}")
                             log_text = "**已处理的文件:**\n\n"
                             for item in processed_files[-10:]:  # 只显示最近10个
-                                log_text += f"- {item['status']} {item['file']} ({item['chars']} 字符)\n"
+                                log_text += f"- {item['status']} {item['file']}\n"
                             log_container.markdown(log_text)
 
-                            # 更新进度
-                            if total_size_bytes > 0:
-                                progress_percent = min((processed_bytes / total_size_bytes) * 100, 100)
-                            else:
-                                progress_percent = 100
-
-                            sync_progress.progress(int(progress_percent))
-                            sync_text.text(
-                                f"进度: {processed}/{total_files} 文件 | "
-                                f"{processed_bytes}/{total_size_bytes} Bytes "
-                                f"({progress_percent:.1f}%)"
-                            )
+                        # 更新进度
+                        elapsed = time.time() - start_time
+                        progress_percent = min((seen_count / total_files) * 100, 100)
+                        sync_progress.progress(int(progress_percent))
+                        eta = sync_result.get("eta")
+                        sync_text.text(
+                            f"进度: {seen_count}/{total_files} 文件 ({progress_percent:.1f}%) | "
+                            f"{seen_count / elapsed if elapsed > 0 else 0:.1f} files/s"
+                            + (f" | 预计剩余 {eta:.0f}s" if eta is not None else "")
+                        )
+                        time.sleep(0.2)
 
-                        except Exception as e:
-                            error_msg = f"跳过文件 {file_path}: {e}"
-                            processed_files.append({
-                                "file": relative_path,
-                                "error": str(e),
-                                "status": "❌"
-                            })
-                            log_container.markdown(
-                                f"**❌ 错误**: {error_msg}\n\n"
-                                f"**已处理的文件** ({len(processed_files)} 个):\n"
-                                + "\n".join([
-                                    f"- {item['status']} {item['file']} ({item.get('chars', 'N/A')} 字符)"
-                                    for item in processed_files[-10:]
-                                ])
-                            )
-                            st.warning(error_msg)
+                    sync_thread.join()
+                    if "error" in sync_result:
+                        raise sync_result["error"]
+                    stats = sync_result["stats"]
 
                     # 同步完成
                     total_time = time.time() - start_time
+                    reindexed = stats["added"] + stats["updated"]
+                    skipped = stats["unchanged"]
+                    deleted = stats["deleted"]
                     sync_status.update(
-                        label=f"✅ 同步完成! 处理了 {processed} 个文件",
+                        label=f"✅ 同步完成! 重新导入 {reindexed} 个文件，跳过 {skipped} 个未修改文件",
                         state="complete",
                         expanded=False
                     )
                     sync_progress.progress(100)
-                    sync_text.text(f"总耗时: {total_time:.2f}s | 总字符数: {total_content_length}")
+                    sync_text.text(
+                        f"总耗时: {total_time:.2f}s | {stats['files_per_sec']} files/s | "
+                        f"{stats['chunks_per_sec']} chunks/s | 清理已删除笔记: {deleted}"
+                    )
 
                     # 最终日志显示
-                    final_log = f"**✅ 同步完成! 处理了 {processed}/{total_files} 个文件**\n\n"
-                    final_log += f"**总耗时**: {total_time:.2f}s | **总字符数**: {total_content_length}\n\n"
-                    final_log += "**所有处理的文件**:\n\n"
+                    final_log = f"**✅ 同步完成! 扫描 {total_files} 个文件，重新导入 {reindexed} 个**\n\n"
+                    final_log += (
+                        f"**总耗时**: {total_time:.2f}s | **跳过未修改**: {skipped} | "
+                        f"**清理已删除**: {deleted} | **失败**: {stats['failed']}\n\n"
+                    )
+                    if stats["deferred"]:
+                        exhausted = ", ".join(stats["budget"]["exhausted"]) if stats["budget"] else ""
+                        final_log += f"⏸️ 预算用尽 ({exhausted})，{stats['deferred']} 个文件推迟到下次同步\n\n"
+                    if stats["backlog"]:
+                        final_log += f"⏸️ 待导入队列中还有 {stats['backlog']} 个文件，下次同步优先处理\n\n"
+                    if stats["profile_jobs_resumed"]:
+                        final_log += f"♻️ {stats['profile_jobs_resumed']} 篇笔记的画像提取在上次中断，已恢复排队\n\n"
+                    if stats["profile_jobs_pending"]:
+                        final_log += f"🧠 {stats['profile_jobs_pending']} 篇笔记正在后台提取用户画像\n\n"
+                    final_log += "**重新导入的文件**:\n\n"
 
                     for item in processed_files:
-                        if item['status'] == "✅":
-                            final_log += f"- ✅ {item['file']} ({item['chars']} 字符)\n"
-                        else:
-                            final_log += f"- ❌ {item['file']}: {item.get('error', '未知错误')}\n"
+                        final_log += f"- {item['status']} {item['file']}\n"
 
                     log_container.markdown(final_log)
 
                     # 存储同步结果到session_state
                     st.session_state.sync_progress = {
                         "status": "complete",
-                        "processed": processed,
+                        "processed": total_files - stats["failed"] - stats["deferred"],
                         "total": total_files,
-                        "content_length": total_content_length,
+                        "reindexed": reindexed,
+                        "skipped": skipped,
+                        "deleted": deleted,
+                        "stats": stats,
                         "files": processed_files
                     }
 
@@ -312,8 +363,32 @@ with st.sidebar:
         progress = st.session_state.sync_progress
         st.success(
             f"✅ 上次同步: {progress.get('processed', 0)}/{progress.get('total', 0)} 文件 | "
-            f"{progress.get('content_length', 0)} 字符"
+            f"重新导入 {progress.get('reindexed', 0)} | 跳过 {progress.get('skipped', 0)}"
+        )
+
+    # 实时监听：笔记保存后几秒内自动增量索引，不用再手动点同步
+    if board_client is not None:
+        st.caption(f"🌐 已连接董事会服务 {API_URL} | 实时监听由服务端负责 (SERVICE_WATCH_VAULT)")
+    else:
+        watch_enabled = st.toggle(
+            "👀 实时监听",
+            disabled=not (folder_path and os.path.isdir(folder_path)),
+            help="监听库内 Markdown 文件的新增 / 修改 / 重命名 / 删除，只重新索引变化的文件。"
         )
+        if folder_path and os.path.isdir(folder_path):
+            watcher = get_vault_watcher(
+                ingestion_engine, os.path.abspath(folder_path), "vector_only" if vector_only else "full"
+            )
+            if watch_enabled and not watcher.is_running:
+                watcher.start()
+            elif not watch_enabled and watcher.is_running:
+                watcher.stop()
+            if watcher.is_running:
+                watch_stats = watcher.stats
+                st.caption(
+                    f"👀 监听中 ({watcher.backend}) | 索引 {watch_stats['indexed']} | 删除 {watch_stats['deleted']}"
+                    + (f" | ⚠️ {watch_stats['last_error']}" if watch_stats["last_error"] else "")
+                )
 
     st.divider()
 
@@ -369,11 +444,32 @@ for msg in st.session_state.messages:
             st.markdown(msg["content"])
 
 # B. 处理新输入
-if prompt := st.chat_input("告诉董事会你的想法..."):
-    # 1. 显示用户消息
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    with st.chat_message("user"):
-        st.markdown(prompt)
+# 流式渲染：State 字段 → 渲染它的成员 (节点结束时用完整文本覆盖一次，去掉光标)
+# 平行辩论模式下战略官和教练在同一个 debate 节点里，所以按输出字段而不是节点名渲染
+OUTPUT_RENDERERS = {
+    "context": "archivist",
+    "strategist_opinion": "strategist",
+    "coach_opinion": "coach",
+    "final_verdict": "synthesizer",
+    "cfo_result": "cfo_execution",
+}
+BOARD_STEPS = ("archivist", "strategist", "coach", "synthesizer")
+
+# 上一场没有开完的会议 (出错 / 页面重跑)：可以按会议 id 从断点继续，已完成的节点不会重跑
+prompt = st.chat_input("告诉董事会你的想法...")
+meeting_id = None
+pending_meeting = st.session_state.get("pending_meeting")
+if not prompt and pending_meeting and st.button(f"♻️ 从断点继续上一场会议: {pending_meeting['query'][:30]}"):
+    prompt, meeting_id = pending_meeting["query"], pending_meeting["meeting_id"]
+
+if prompt:
+    # 1. 显示用户消息 (续开的会议在历史里已经有这条消息了)
+    if meeting_id is None:
+        meeting_id = new_meeting_id()
+        st.session_state.pending_meeting = {"query": prompt, "meeting_id": meeting_id}
+        st.session_state.messages.append({"role": "user", "content": prompt})
+        with st.chat_message("user"):
+            st.markdown(prompt)
 
     # 2. 董事会开始思考 (Visualizing the Chain)
     with st.chat_message("assistant"):
@@ -384,7 +480,6 @@ if prompt := st.chat_input("告诉董事会你的想法..."):
         # 清空之前的进度记录
         st.session_state.progress_updates = []
         st.session_state.meeting_start_time = time.time()
-        last_update_count = 0
 
         # 创建一个状态容器，初始状态
         status_container = st.status("📝 准备开始董事会会议...", expanded=True)
@@ -393,84 +488,103 @@ if prompt := st.chat_input("告诉董事会你的想法..."):
         progress_bar = st.progress(0)
         progress_text = st.empty()
 
-        try:
-            # --- 调用后端 (LangGraph) ---
-            # Step 1: 运行图 (在单独的线程中执行以便实时更新UI)
-            import threading
-
+        # --- “脑裂”辩论现场 (核心亮点)：先占位，各成员的 token 到达时逐步填充 ---
+        with st.expander("👁️ 查看董事会辩论记录 (The Internal Debate)", expanded=True):
+            st.markdown("**📜 史官 (Archivist) 查到的事实:**")
+            archivist_box = st.empty()
+
+            # 左右互搏
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("### 🔴 战略官 (Strategist)")
+                strategist_box = st.empty()
+            with col2:
+                st.markdown("### 🔵 教练 (Coach)")
+                coach_box = st.empty()
+
+        st.divider()
+        st.markdown("### 📝 最终决议 (The Verdict)")
+        verdict_box = st.empty()
+
+        renderers = {
+            "archivist": lambda text: archivist_box.info(text),
+            "strategist": lambda text: strategist_box.markdown(
+                f"<div class='stat-box strategist-box'>{text}</div>", unsafe_allow_html=True
+            ),
+            "coach": lambda text: coach_box.markdown(
+                f"<div class='stat-box coach-box'>{text}</div>", unsafe_allow_html=True
+            ),
+            "synthesizer": lambda text: verdict_box.markdown(text),
+            "cfo_execution": lambda text: verdict_box.markdown(text),
+        }
+
+        def stream_meeting():
+            """消费编排器的事件流：token 增量直接渲染到对应占位符 (每个节点最多 20 次/秒)"""
+            texts, last_render = {}, {}
+            finished, total_steps = 0, len(BOARD_STEPS)
             final_state = {}
-
-            def run_orchestrator():
-                # 在单独线程中运行异步的 run_meeting
-                final_state["result"] = asyncio.run(orchestrator.run_meeting(prompt))
-
-            thread = threading.Thread(target=run_orchestrator)
-            thread.start()
-
-            # Step 2: 实时显示进度更新
-            total_steps = 4  # 总步骤数
-            while thread.is_alive():
-                current_count = len(st.session_state.progress_updates)
-                if current_count > last_update_count:
-                    # 有新的进度更新
-                    latest_update = st.session_state.progress_updates[-1]
-
-                    # 更新状态容器
-                    status_container.update(
-                        label=f"{latest_update['stage']}: {latest_update['message']}",
-                        state="running"
-                    )
-
-                    # 计算进度百分比
-                    progress_percent = min((current_count / total_steps) * 100, 100)
+            for event in iter_meeting_events(prompt, meeting_id, force_refresh):
+                node = event.get("node")
+                if event["type"] == "token" and node in renderers:
+                    texts[node] = texts.get(node, "") + event["delta"]
+                    now = time.time()
+                    if now - last_render.get(node, 0.0) >= 0.05:
+                        renderers[node](texts[node] + " ▌")
+                        last_render[node] = now
+
+                elif event["type"] == "node_start":
+                    if node == "cfo_execution":
+                        total_steps = 1
+                    status_container.update(label=f"{event['stage']}: {event['message']}", state="running")
+
+                elif event["type"] == "node_end":
+                    if event.get("degraded"):
+                        # 节点超时被降级：输出是"暂不可用"占位，会议继续
+                        event["message"] = f"⚠️ {event['stage']} 暂不可用 ({event['degraded']})"
+                    st.session_state.progress_updates.append({
+                        "stage": event["stage"],
+                        "message": event["message"],
+                        "start_time": event["start_time"],
+                        "duration": event["duration"],
+                    })
+                    for field, member in OUTPUT_RENDERERS.items():
+                        if field in event["output"]:
+                            renderers[member](event["output"][field])
+                            finished += 1
+                    status_container.update(label=f"{event['stage']}: {event['message']}", state="running")
+
+                    # 计算进度百分比，显示进度文本和时间信息
+                    progress_percent = min((finished / total_steps) * 100, 100)
                     progress_bar.progress(int(progress_percent))
-
-                    # 显示进度文本和时间信息
                     elapsed_time = time.time() - st.session_state.meeting_start_time
                     progress_text.markdown(
-                        f"**进度**: {current_count}/{total_steps} ({progress_percent:.0f}%) | "
+                        f"**进度**: {finished}/{total_steps} ({progress_percent:.0f}%) | "
                         f"**已用时间**: {elapsed_time:.1f}s"
                     )
 
-                    last_update_count = current_count
-                time.sleep(0.1)  # 避免过度消耗CPU
+                elif event["type"] == "final":
+                    final_state = event["state"]
+            return final_state
 
-            thread.join()
+        try:
+            # --- 调用后端 (LangGraph)，边开会边渲染 ---
+            final_state = stream_meeting()
 
             # 完成后显示最终状态
-            if st.session_state.progress_updates:
-                latest_update = st.session_state.progress_updates[-1]
-                status_container.update(
-                    label=f"✅ {latest_update['message']}",
-                    state="complete",
-                    expanded=False
-                )
-
-                # 进度条设置为100%
-                progress_bar.progress(100)
-                total_time = time.time() - st.session_state.meeting_start_time
-                progress_text.markdown(
-                    f"**进度**: 4/4 (100%) | **总耗时**: {total_time:.2f}s ✅"
-                )
-            else:
-                status_container.update(
-                    label="✅ 董事会已达成决议",
-                    state="complete",
-                    expanded=False
-                )
+            total_time = time.time() - st.session_state.meeting_start_time
+            status_container.update(label="✅ 董事会已达成决议", state="complete", expanded=False)
+            progress_bar.progress(100)
+            progress_text.markdown(f"**总耗时**: {total_time:.2f}s ✅")
 
             # --- 展示详细进度历史 ---
-            if st.session_state.progress_updates and len(st.session_state.progress_updates) > 0:
+            if st.session_state.progress_updates:
                 with st.expander("📊 查看董事会会议进度记录", expanded=False):
                     st.markdown("**会议进度详情：**")
 
                     # 创建表格显示进度
                     for i, update in enumerate(st.session_state.progress_updates, 1):
                         # 计算相对于会议开始的时间
-                        if st.session_state.meeting_start_time:
-                            relative_time = update['start_time'] - st.session_state.meeting_start_time
-                        else:
-                            relative_time = 0
+                        relative_time = update['start_time'] - st.session_state.meeting_start_time
 
                         # 格式化耗时
                         duration_str = f"{update['duration']:.2f}s" if update.get('duration') else "N/A"
@@ -482,43 +596,16 @@ if prompt := st.chat_input("告诉董事会你的想法..."):
                         )
 
                     # 添加统计信息
-                    if st.session_state.meeting_start_time:
-                        st.divider()
-                        total_time = time.time() - st.session_state.meeting_start_time
-                        st.markdown(
-                            f"**总耗时**: {total_time:.2f}s | "
-                            f"**平均每步**: {total_time/4:.2f}s"
-                        )
-
-            # --- 渲染“脑裂”辩论现场 (核心亮点) ---
-            with st.expander("👁️ 查看董事会辩论记录 (The Internal Debate)", expanded=True):
-
-                # 史官证据
-                st.markdown("**📜 史官 (Archivist) 查到的事实:**")
-                st.info(final_state['result']['context'])
-
-                # 左右互搏
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.markdown("### 🔴 战略官 (Strategist)")
-                    st.markdown(f"<div class='stat-box strategist-box'>{final_state['result']['strategist_opinion']}</div>", unsafe_allow_html=True)
-
-                with col2:
-                    st.markdown("### 🔵 教练 (Coach)")
-                    st.markdown(f"<div class='stat-box coach-box'>{final_state['result']['coach_opinion']}</div>", unsafe_allow_html=True)
-
-            # --- 渲染最终结论 ---
-            st.divider()
-            st.markdown("### 📝 最终决议 (The Verdict)")
-            response_text = final_state['result']['final_verdict']
-            st.markdown(response_text)
+                    st.divider()
+                    st.markdown(f"**总耗时**: {total_time:.2f}s")
 
             # 3. 存入历史
             # 注意：存入历史的要是简单的文本，方便下次渲染。
             # 如果想保留辩论卡片，需要更复杂的 Session State 结构。
             # MVP 这里只存最终文本，下次刷新卡片会消失（这是个特性，保持清爽）。
+            response_text = final_state.get("final_verdict") or final_state.get("cfo_result", "")
             st.session_state.messages.append({"role": "assistant", "content": response_text})
+            st.session_state.pending_meeting = None
 
         except Exception as e:
             status_container.update(label="❌ 系统发生错误", state="error")
@@ -1,16 +1,19 @@
 # agents/archivist.py
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
+import asyncio
+import hashlib
 import json
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import ChatOpenAI
 
 # 引入我们刚才定义的 Prompt 和下层设施
 from src.agents.prompts.archivist_prompts import ARCHIVIST_SYSTEM_PROMPT
 # 假设你在 infra 中已经封装好了 KnowledgeBase，如果没有，暂时用 Mock
 from src.core.models.domain_models import LifeEvent
+from src.infrastructure.context_budget import EVIDENCE_BUDGET, EVIDENCE_FULL_RECORDS, pack_evidence
+from src.infrastructure.date_resolver import DateRange, resolve_date_range
 from src.infrastructure.vector_store import KnowledgeBase 
-from src.infrastructure.llm_factory import llm
+from src.infrastructure.llm_registry import get_llm
 from src.infrastructure.obsidian_loader import MemoryIngestionEngine
 class Archivist:
     def __init__(self, kb: KnowledgeBase):
@@ -18,7 +21,7 @@ class Archivist:
         :param vector_store: 已经初始化的向量数据库实例 (KnowledgeBase)
         """
         self.kb = kb
-        self.llm = llm
+        self.llm = get_llm("archivist")
         
         # 组装 Chain
         self.prompt = ChatPromptTemplate.from_messages([
@@ -26,56 +29,147 @@ class Archivist:
             ("user", "User Query: {query}\n\n[Context Data]:\n{context}")
         ])
         self.chain = self.prompt | self.llm | StrOutputParser()
+        # 报告缓存的命名空间前缀：Prompt、模型或证据预算变了，旧报告就不能再复用
+        self._cache_version = hashlib.sha256(
+            f"{ARCHIVIST_SYSTEM_PROMPT}|{getattr(self.llm, 'model_name', '')}"
+            f"|{EVIDENCE_BUDGET}|{EVIDENCE_FULL_RECORDS}".encode("utf-8")
+        ).hexdigest()[:16]
 
-    def _format_context(self, docs: List[LifeEvent]) -> str:
+    def _cache_namespace(self, k: int, date_range: Optional[DateRange]) -> str:
+        scope = f"{date_range.start_key}-{date_range.end_key}" if date_range else "all"
+        return f"{self._cache_version}|k={k}|{scope}"
+
+    def _format_context(self, docs: List[LifeEvent], query: str = "") -> str:
         """
         将检索到的 LifeEvent 对象转化为 LLM 易读的字符串格式
+        docs 按相关度排序；重叠的内容去重，低排名的记录压缩成关键句，总长度不超过证据的 token 预算
         """
-        formatted_str = ""
-        for i, doc in enumerate(docs):
+        records = []
+        for doc in docs:
             # 获取元数据，防止 Key不存在报错
             date = doc.metadata.get("Date/Title", "Unknown Date")
             section = doc.metadata.get("Section", "General")
-            content = doc.content.replace("\n", " ")
-            
-            formatted_str += f"Record #{i+1} [Source: {date} > {section}]:\nContent: {content}\n\n"
+            records.append((f"[Source: {date} > {section}]", doc.content))
+
+        formatted_str = ""
+        for i, (source, content) in enumerate(pack_evidence(records, query)):
+            content = content.replace("\n", " ")
+            formatted_str += f"Record #{i+1} {source}:\nContent: {content}\n\n"
         return formatted_str
 
-    def consult(self, query: str, k=5) -> Dict:
+    def _prepare(self, query: str, k: int, use_cache: bool) -> Dict:
         """
-        史官的核心工作流：检索 -> 阅读 -> 汇报
+        检索 + 查缓存 (consult / aconsult 共用)
+        返回的 dict 里已经有 "answer" 时 (没有相关记录 / 命中缓存) 可以直接返回，否则还需要 LLM 撰写报告
         """
         print(f"🕵️ [史官] 正在检索档案库: '{query}'...")
-        
+
+        # 0. 时间范围 ("昨天" / "上周" / "2023-10-18")：范围内的记录排名靠前，范围外的相关记录仍然保留
+        date_range = resolve_date_range(query)
+        if date_range:
+            print(f"🗓️ [史官] 识别到时间范围: {date_range} ('{date_range.expression}')")
+
         # 1. 检索 (Retrieval)
         # 这里调用我们在 infrastructure 层封装好的 search 方法
         # 假设返回的是 LangChain 的 Document 对象列表
-        raw_docs = self.kb.search(query, k=k)
+        raw_docs = self.kb.search(query, k=k, date_range=date_range)
         
         if not raw_docs:
             return {
                 "answer": "报告：档案库中未发现与此相关的记录。",
-                "raw_docs": []
+                "raw_docs": [],
+                "date_range": date_range,
             }
 
-        # 2. 格式化上下文 (Context Assembly)
-        context_str = self._format_context(raw_docs)
-        
-        # 3. 生成摘要 (Synthesis)
-        print("🕵️ [史官] 正在根据证据撰写报告...")
-        response_text = self.chain.invoke({
+        # 2. 语义缓存：问题相似 + 证据 (chunk 集合) 完全相同 → 报告不会变，跳过 LLM
+        chunk_ids = [doc.id for doc in raw_docs]
+        namespace = self._cache_namespace(k, date_range)
+        query_vector = self.kb.embeddings.embed_query(query) if use_cache else None
+        if use_cache:
+            cached = self.kb.answer_cache.lookup(namespace, query_vector, chunk_ids)
+            if cached:
+                print(
+                    f"⚡ [史官] 证据未变，复用之前的报告 "
+                    f"(原问题: '{cached['cached_query']}'，相似度 {cached['similarity']})"
+                )
+                return {
+                    "query": query,
+                    "answer": cached["answer"],
+                    "raw_context": cached["raw_context"],
+                    "source_docs": raw_docs,
+                    "date_range": date_range,
+                    "cached": True,
+                }
+
+        # 3. 格式化上下文 (Context Assembly)
+        return {
             "query": query,
-            "context": context_str
-        })
+            "raw_context": self._format_context(raw_docs, query),
+            "source_docs": raw_docs,
+            "date_range": date_range,
+            "cache_key": (namespace, query_vector, chunk_ids) if use_cache else None,
+        }
+
+    def _finish(self, prepared: Dict, response_text: str) -> Dict:
+        cache_key = prepared["cache_key"]
+        if cache_key:
+            namespace, query_vector, chunk_ids = cache_key
+            self.kb.answer_cache.store(
+                namespace, prepared["query"], query_vector, chunk_ids,
+                {"answer": response_text, "raw_context": prepared["raw_context"]},
+            )
 
         # 返回结构化结果，供后续的“董事会”使用
         return {
-            "query": query,
-            "answer": response_text,  # 这是给用户/战略官看的摘要
-            "raw_context": context_str, # 这是原始证据
-            "source_docs": raw_docs     # 这是原始对象
+            "query": prepared["query"],
+            "answer": response_text,                # 这是给用户/战略官看的摘要
+            "raw_context": prepared["raw_context"], # 这是原始证据
+            "source_docs": prepared["source_docs"], # 这是原始对象
+            "date_range": prepared["date_range"],   # 查询提到的时间范围 (没有则为 None)
+            "cached": False                         # 是否复用了缓存的报告
         }
 
+    def consult(self, query: str, k=5, use_cache: bool = True) -> Dict:
+        """
+        史官的核心工作流：检索 -> 阅读 -> 汇报
+        :param use_cache: 检索到的证据和之前某次几乎相同的问题一致时，直接复用那次的报告
+        """
+        prepared = self._prepare(query, k, use_cache)
+        if "answer" in prepared:
+            return prepared
+
+        # 4. 生成摘要 (Synthesis)
+        print("🕵️ [史官] 正在根据证据撰写报告...")
+        response_text = self.chain.invoke({
+            "query": query,
+            "context": prepared["raw_context"]
+        })
+        return self._finish(prepared, response_text)
+
+    async def aconsult(
+        self,
+        query: str,
+        k=5,
+        use_cache: bool = True,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> Dict:
+        """
+        consult 的异步版本：检索放在线程里，报告用 chain.astream 流式生成，每个 token 增量回调 on_token
+        """
+        prepared = await asyncio.to_thread(self._prepare, query, k, use_cache)
+        if "answer" in prepared:
+            if on_token:
+                on_token(prepared["answer"])
+            return prepared
+
+        print("🕵️ [史官] 正在根据证据撰写报告...")
+        parts = []
+        async for delta in self.chain.astream({"query": query, "context": prepared["raw_context"]}):
+            parts.append(delta)
+            if on_token:
+                on_token(delta)
+        return await asyncio.to_thread(self._finish, prepared, "".join(parts))
+
 # 模拟数据
 MOCK_DATA = """
 # 2023-10-12 架构思考
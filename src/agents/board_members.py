@@ -1,23 +1,40 @@
-import os
-from langchain_core.messages import HumanMessage, SystemMessage
-from dotenv import find_dotenv, load_dotenv
-from langchain_openai import ChatOpenAI
-from pydantic import SecretStr
+from typing import AsyncIterator, Callable, Optional
 
-load_dotenv(find_dotenv())
-
-api_key = os.getenv("OPEN_AI_API_KEY")
-base_url = os.getenv("OPEN_AI_API_BASE")
-chat_model = os.getenv("CHAT_MODEL")
+from src.infrastructure.context_budget import ContextBudget
+from src.infrastructure.llm_registry import get_llm
 
 class BaseBoardMember:
     """董事会成员基类"""
     def __init__(self, name: str, system_prompt: str):
         self.name = name
-        self.llm = ChatOpenAI(
-            temperature=0.7,
-            model=chat_model,
-            api_key=SecretStr(api_key),
-            base_url=base_url
-        )
+        # 按角色从共享注册表取 LLM (共用连接池 / 限流；LLM_<NAME>_MODEL 可以单独换模型)
+        self.llm = get_llm(name.lower())
         self.system_prompt = system_prompt
+        # Prompt 里各段上下文 (史官报告 / 画像 / 财务报告 / 其他成员观点) 的 token 预算
+        self.context_budget = ContextBudget()
+
+    def fit_inputs(self, inputs: dict) -> dict:
+        """把 inputs 里的各段上下文压到预算以内 (问题本身不动)"""
+        return self.context_budget.fit(inputs)
+
+    async def ainvoke(self, inputs: dict) -> str:
+        """异步调用 chain，一次性返回完整文本 (子类需要先组装好 self.chain)"""
+        return await self.chain.ainvoke(self.fit_inputs(inputs))
+
+    async def astream(self, inputs: dict) -> AsyncIterator[str]:
+        """异步流式调用 chain，逐个产出 token 增量"""
+        async for delta in self.chain.astream(self.fit_inputs(inputs)):
+            yield delta
+
+    async def _astream_chain(self, inputs: dict, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        有 on_token 时用 astream 逐 token 生成 (每个增量都交给 on_token，例如推给 UI)，否则直接 ainvoke；
+        返回完整文本
+        """
+        if on_token is None:
+            return await self.ainvoke(inputs)
+        parts = []
+        async for delta in self.astream(inputs):
+            parts.append(delta)
+            on_token(delta)
+        return "".join(parts)
@@ -7,6 +7,7 @@ from langchain_core.messages.human import HumanMessage
 
 from src.agents.board_members import BaseBoardMember
 from src.agents.prompts.cfo_prompts import CFO_SYSTEM_PROMPT
+from src.infrastructure.fake_llm import ScriptedChatModel
 from src.mcp.firefly_iii import create_mcp_tools
 
 
@@ -31,7 +32,9 @@ class CFO(BaseBoardMember):
 
         async with self._init_lock:
             if self._tools is None:
-                self._tools = await create_mcp_tools()
+                # 离线的脚本化模型从不调用工具，不必连接 Firefly III 的 MCP 服务
+                offline = isinstance(self.llm, ScriptedChatModel)
+                self._tools = [] if offline else await create_mcp_tools()
             self.agent_executor = create_agent(
                 self.llm,
                 self._tools,
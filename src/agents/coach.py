@@ -5,9 +5,10 @@ from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 
 from src.agents.board_members import BaseBoardMember
-from src.agents.prompts.coach_prompts import COACH_SYSTEM_PROMPT
+from src.agents.prompts.coach_prompts import COACH_RECONCILE_PROMPT, COACH_SYSTEM_PROMPT
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from typing import Callable, Optional
 
 class Coach(BaseBoardMember):
     """
@@ -21,15 +22,53 @@ class Coach(BaseBoardMember):
             ("user", "User Query: {query}\n\n[Fact Context]:\n{context}\n\n[User Profile] (Generated by Mem0):{user_profile}\n]n[Strategist's Opinion]:\n{strategist_opinion}")
         ])
         self.chain = self.prompt | self.llm | StrOutputParser()
+        # 平行辩论模式：草稿只看到了战略官的开头，收尾时对照完整观点做简短补充
+        self.reconcile_prompt = ChatPromptTemplate.from_messages([
+            ("system", COACH_RECONCILE_PROMPT),
+            ("user", "User Query: {query}\n\n[Your Draft]:\n{draft}\n\n[Strategist's Full Opinion]:\n{strategist_opinion}")
+        ])
+        self.reconcile_chain = self.reconcile_prompt | self.llm | StrOutputParser()
 
     def opine(self, query: str, context: str, strategist_opinion: str, user_profile: str) -> str:
         """
         发表反驳 (Antithesis)
         """
         print("🧘 [教练] 正在评估心理健康风险...")
-        return self.chain.invoke({
+        return self.chain.invoke(self.fit_inputs({
             "query": query,
             "user_profile": user_profile,
             "context": context,
             "strategist_opinion": strategist_opinion
-        })
+        }))
+
+    async def aopine(
+        self,
+        query: str,
+        context: str,
+        strategist_opinion: str,
+        user_profile: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        发表反驳 (Antithesis)，流式输出：每个 token 增量回调 on_token
+        """
+        print("🧘 [教练] 正在评估心理健康风险...")
+        return await self._astream_chain({
+            "query": query,
+            "user_profile": user_profile,
+            "context": context,
+            "strategist_opinion": strategist_opinion
+        }, on_token)
+
+    async def areconcile(self, query: str, draft: str, strategist_opinion: str) -> str:
+        """
+        平行辩论模式的收尾：返回需要追加在草稿后面的补充，无需补充时返回空字符串
+        """
+        print("🧘 [教练] 正在对照战略官的完整观点...")
+        addendum = (await self.reconcile_chain.ainvoke(self.fit_inputs({
+            "query": query,
+            "draft": draft,
+            "strategist_opinion": strategist_opinion
+        }))).strip()
+        return "" if addendum.startswith("NO_CHANGE") else addendum
+
@@ -1,8 +1,16 @@
+import asyncio
 import operator
+import os
 import time
-from typing import Annotated, Callable, List, Optional, TypedDict
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Annotated, AsyncIterator, Callable, Dict, List, Optional, TypedDict
 
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 from langgraph.graph import END, StateGraph
+from langgraph.types import StreamWriter
 
 from src.agents.archivist import Archivist
 from src.agents.coach import Coach
@@ -10,12 +18,18 @@ from src.agents.strategist import Strategist
 from src.agents.synthesizer import Synthesizer
 from src.agents.cfo import CFO
 from src.agents.router import Router
+from src.core.performance import monitor
+from src.infrastructure.data_versions import LEDGER, get_data_versions
+from src.infrastructure.date_resolver import resolve_date_range
+from src.infrastructure.meeting_cache import MeetingCache
 from src.infrastructure.mem0_service import UserProfileService
+from src.infrastructure.single_flight import SingleFlight
 
 # 定义整个辩论过程中的状态数据
 class BoardState(TypedDict):
     # --- 上下文层 ---
     query: str                # 用户原始问题
+    intent: str               # 路由结果 (入口处已经判断过时直接沿用，不再重复路由)
     context: str              # 史官查到的事实
     strategist_opinion: str   # 战略官的观点
     user_profile: str     # Mem0: 用户是什么样的人 (Preferences/Facts) [NEW]
@@ -28,6 +42,7 @@ class BoardState(TypedDict):
     # --- 单次执行层 ---
     cfo_result: str           # 纯记账时的返回结果
     messages: Annotated[List[str], operator.add] # (可选) 用于记录完整的对话历史
+    degraded: Annotated[List[dict], operator.add]  # 超时降级的节点 {node, stage, reason}
 
 # 进度更新数据结构
 class ProgressUpdate(TypedDict):
@@ -36,14 +51,126 @@ class ProgressUpdate(TypedDict):
     start_time: float   # 开始时间戳
     duration: Optional[float]  # 耗时（秒）
 
+# 会议事件流 (astream_meeting) 中的事件
+class MeetingEvent(TypedDict, total=False):
+    type: str           # node_start / token / node_end / final
+    node: str           # 图中的节点名
+    stage: str          # 阶段名称 (展示用)
+    message: str        # 进度消息
+    delta: str          # token: 本次新增的文本
+    start_time: float   # 节点开始时间戳
+    duration: float     # node_end: 节点耗时（秒）
+    output: dict        # node_end: 节点对 State 的更新
+    replayed: bool      # node_end: 来自检查点的回放 (节点没有重新执行)
+    degraded: str       # node_end: 节点超时被降级时的原因 (输出是"暂不可用"占位)
+    state: dict         # final: 会议结束时的完整 State
+    meeting_id: str     # final: 会议 id (用于断点续开 / 回放)
+    cached: bool        # node_end / final: 结果来自整场会议的缓存 (没有开会)
+    resumed: bool       # final: 会议是从检查点续开的
+    coalesced: bool     # final: 挂在另一个相同请求正在开的会议上 (没有另开一场)
+
+# 每个节点在进度 / 事件流中的展示信息: node → (阶段名称, 开始消息, 完成消息)
+NODE_STAGES = {
+    "profile_loader": ("画像", "🧠 正在加载用户画像...", "✅ 用户画像已加载"),
+    "archivist": ("史官", "🕵️ 史官正在检索档案...", "✅ 史官已完成档案检索"),
+    "cfo_advisory": ("CFO", "📊 CFO 正在整理财务背景...", "✅ CFO 已提供财务背景"),
+    "cfo_execution": ("CFO", "💰 CFO 正在记账...", "✅ CFO 已完成记账"),
+    "strategist": ("战略官", "🎯 战略官正在分析形势...", "✅ 战略官已完成分析"),
+    "debate": ("辩论", "⚔️ 战略官与教练同时发言...", "✅ 战略官与教练已完成辩论"),
+    "coach": ("教练", "💪 教练正在提出指导意见...", "✅ 教练已完成指导"),
+    "synthesizer": ("决议者", "🤝 决议者正在综合各方意见...", "✅ 董事会已达成决议"),
+}
+
+# 辩论模式：
+# - sequential: 战略官 → 教练 → 决议者，教练看到战略官的完整观点 (默认)
+# - parallel: 教练拿到战略官流式输出的开头就开始发言，两人并行，最后教练对照完整观点做简短补充
+DEBATE_MODES = ("sequential", "parallel")
+DEFAULT_DEBATE_MODE = os.getenv("BOARD_DEBATE_MODE", "sequential")
+# 平行模式下，战略官输出多少字后教练开始发言 (0 表示完全不等)
+STRATEGIST_HEAD_CHARS = int(os.getenv("BOARD_STRATEGIST_HEAD_CHARS", "200"))
+PARTIAL_OPINION_NOTE = "\n\n(…战略官仍在发言，以上只是开头部分)"
+
+# 会议检查点：每个节点完成后把 State 写入本地 SQLite (按会议 id)，失败 / 中断的会议可以从断点继续
+# 设置为空字符串则关闭
+CHECKPOINT_PATH = os.getenv("BOARD_CHECKPOINT_PATH", "./data/meeting_checkpoints.sqlite")
+# 检查点保留策略 (只清理已经开完的会议，中断的会议留着续开)：0 表示不限
+# - 开完超过这么多天的会议删除检查点
+# - 开完的会议最多保留这么多场 (最新的优先保留)
+CHECKPOINT_RETENTION_DAYS = float(os.getenv("BOARD_CHECKPOINT_RETENTION_DAYS", "30"))
+CHECKPOINT_MAX_MEETINGS = int(os.getenv("BOARD_CHECKPOINT_MAX_MEETINGS", "1000"))
+
+
+# 每个节点的截止时间 (秒)，可用 BOARD_NODE_TIMEOUT_<NODE> 单独覆盖；0 表示不限时
+# 超时的节点会被取消，输出换成"暂不可用"的占位文本，下游节点照常执行。
+# 注意：取消只能停下协程本身，已经放进线程 (asyncio.to_thread) 的同步调用 (Mem0 查画像、史官检索)
+# 会在后台跑完，结果被丢弃；这些调用的耗时由客户端自己的超时兜底 (LLM_TIMEOUT / EMBED_TIMEOUT)
+NODE_TIMEOUT_DEFAULTS = {
+    "profile_loader": 15,
+    "archivist": 60,
+    "cfo_advisory": 45,
+    "strategist": 60,
+    "coach": 60,
+    "debate": 120,
+    "synthesizer": 90,
+}
+NODE_TIMEOUTS = {
+    node: float(os.getenv(f"BOARD_NODE_TIMEOUT_{node.upper()}", default))
+    for node, default in NODE_TIMEOUT_DEFAULTS.items()
+}
+# 整场会议的时限 (秒)：后面的节点只能用剩下的时间，用完后直接降级；0 表示不限时
+MEETING_SLA = float(os.getenv("BOARD_MEETING_SLA", "300"))
+# 有副作用的节点 (记账)：不限时也不降级。取消写到一半的记账会导致用户以为没记上而重复提交，
+# 或者账本已经写入但没有回执
+WRITE_NODES = ("cfo_execution",)
+
+# 每个节点写入的 State 字段 (降级时用占位文本填上，下游的 Prompt 不会缺字段)
+NODE_OUTPUTS = {
+    "profile_loader": ("user_profile",),
+    "archivist": ("context",),
+    "cfo_advisory": ("financial_report",),
+    "strategist": ("strategist_opinion",),
+    "coach": ("coach_opinion",),
+    "debate": ("strategist_opinion", "coach_opinion"),
+    "synthesizer": ("final_verdict",),
+}
+UNAVAILABLE_NOTE = "[{stage}暂不可用: {reason}，本次会议在缺少这部分信息的情况下继续]"
+
+
+# 整场会议的结果缓存 (同一个问题 + 知识库 / 画像 / 账本都没变 → 直接返回上次的决议)
+MEETING_CACHE_ENABLED = os.getenv("BOARD_MEETING_CACHE", "1") == "1"
+# 并发的相同会议合并成一场 (重复提交 / 多人同时问同一个问题)
+COALESCE_ENABLED = os.getenv("BOARD_COALESCE", "1") == "1"
+
+
+def new_meeting_id() -> str:
+    return uuid.uuid4().hex
+
 
 class BoardOrchestrator:
-    def __init__(self, vector_store, progress_callback: Optional[Callable[[str, str, float], None]] = None):
+    def __init__(
+        self,
+        vector_store,
+        progress_callback: Optional[Callable[[str, str, float], None]] = None,
+        debate_mode: str = DEFAULT_DEBATE_MODE,
+        remember_verdicts: bool = True,
+        checkpoint_path: Optional[str] = CHECKPOINT_PATH,
+        meeting_cache: bool = MEETING_CACHE_ENABLED,
+        coalesce: bool = COALESCE_ENABLED,
+        report_cache: bool = True,
+    ):
         """
         Args:
             vector_store: 向量存储实例
             progress_callback: 进度回调函数，接收 (stage: str, message: str, start_time: float) 参数
+            debate_mode: 默认的辩论模式 (sequential / parallel)，run_meeting 时也可以单独指定
+            remember_verdicts: 是否把每次决议写入 Mem0 (基准测试 / 批量评估时关掉，避免污染用户画像)
+            checkpoint_path: 会议检查点的 SQLite 路径，None / 空字符串表示不保存检查点
+            meeting_cache: 是否缓存整场会议的结果 (键 = 归一化的问题 + 知识库 / 画像 / 账本的数据版本)
+            coalesce: 是否合并同时进行的相同会议 (键和会议缓存相同)
+            report_cache: 史官是否复用答案缓存里的检索报告 (基准测试时关掉，每场会议都真实检索 + 生成)
         """
+        if debate_mode not in DEBATE_MODES:
+            raise ValueError(f"未知的辩论模式: {debate_mode} (可选: {', '.join(DEBATE_MODES)})")
         # 初始化各个角色
         self.mem0 = UserProfileService(user_id="owner") # 初始化 Mem0
         self.archivist = Archivist(vector_store)
@@ -55,74 +182,203 @@ class BoardOrchestrator:
 
         # 进度回调函数
         self.progress_callback = progress_callback
+        self.remember_verdicts = remember_verdicts
+        self.checkpoint_path = checkpoint_path or None
+        if self.checkpoint_path:
+            parent = os.path.dirname(self.checkpoint_path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+
+        self.meeting_cache = MeetingCache() if meeting_cache else None
+        self.inflight = SingleFlight() if coalesce else None
+        # 路由也按同一个键合并：同时到达的相同问题只路由一次
+        self.routing = SingleFlight() if coalesce else None
+        self.report_cache = report_cache
 
         # 总步骤数（用于计算进度百分比）
         self.total_steps = 4
 
-        # 构建图
-        self.graph = self._build_graph()
+        # 构建图：每种辩论模式各编译一张，按会议选择
+        self.debate_mode = debate_mode
+        self.graphs = {mode: self._build_graph(mode) for mode in DEBATE_MODES}
+        self.graph = self.graphs[debate_mode]
+
+    def _tracked(self, node: str, fn: Callable):
+        """
+        包装图节点：开始 / 结束时向事件流 (stream_mode="custom") 发送事件并调用 progress_callback；
+        fn(state, on_token) 是协程，LLM 生成的 token 增量通过 on_token 推到事件流上。
+        超过截止时间的节点降级为占位输出；WRITE_NODES 里的节点不限时，一定会执行完。
+        """
+        stage, start_message, end_message = NODE_STAGES[node]
+
+        async def run(state: BoardState, writer: StreamWriter, config: RunnableConfig):
+            start_time = time.time()
+            writer({"type": "node_start", "node": node, "stage": stage, "message": start_message, "start_time": start_time})
+            if self.progress_callback:
+                self.progress_callback(stage, start_message, start_time)
+
+            def on_token(delta: str, source: str = node):
+                # source: 产生 token 的成员 (平行辩论节点里战略官和教练共用一个图节点)
+                writer({"type": "token", "node": source, "delta": delta})
+
+            configurable = config.get("configurable", {})
+            meeting_id = configurable.get("meeting_id")
+            degraded = None
+            timeout = None if node in WRITE_NODES else self._node_timeout(node, configurable.get("meeting_deadline"))
+            if timeout is not None and timeout <= 0:
+                degraded = "会议已超过时限"
+            else:
+                try:
+                    update = await asyncio.wait_for(fn(state, on_token), timeout)
+                except asyncio.TimeoutError:
+                    degraded = f"超过 {timeout:.1f}s 未完成"
+            if degraded:
+                print(f"⏱️ [Board] {stage} 降级: {degraded}")
+                update = self._degraded_update(node, state, degraded)
+                if meeting_id:
+                    monitor.record_degradation(meeting_id, node, degraded)
+
+            duration = time.time() - start_time
+            if meeting_id:
+                monitor.record_agent_time(meeting_id, node, duration)
+            end_event = {
+                "type": "node_end",
+                "node": node,
+                "stage": stage,
+                "message": end_message,
+                "start_time": start_time,
+                "duration": duration,
+                "output": update,
+            }
+            if degraded:
+                end_event["degraded"] = degraded
+            writer(end_event)
+            if self.progress_callback:
+                self.progress_callback(stage, end_message, start_time)
+            return update
+
+        return run
+
+    @staticmethod
+    def _node_timeout(node: str, meeting_deadline: Optional[float]) -> Optional[float]:
+        """节点可用的时间：节点自己的截止时间和会议剩余时间取较小值，都不限时返回 None"""
+        limits = []
+        if NODE_TIMEOUTS.get(node):
+            limits.append(NODE_TIMEOUTS[node])
+        if meeting_deadline is not None:
+            limits.append(meeting_deadline - time.time())
+        return min(limits) if limits else None
+
+    @staticmethod
+    def _degraded_update(node: str, state: BoardState, reason: str) -> dict:
+        """超时节点的替代输出：占位文本 + 降级记录"""
+        stage = NODE_STAGES[node][0]
+        note = UNAVAILABLE_NOTE.format(stage=stage, reason=reason)
+        update = {field: note for field in NODE_OUTPUTS[node]}
+        if node == "synthesizer":
+            # 决议者不可用时，至少把两位成员的观点交给用户
+            update["final_verdict"] = (
+                f"[{stage}暂不可用: {reason}，以下是两位成员的原始观点]\n\n**🔴 战略官:**\n{state.get('strategist_opinion', '')}"
+                f"\n\n**🔵 教练:**\n{state.get('coach_opinion', '')}"
+            )
+        update["degraded"] = [{"node": node, "stage": stage, "reason": reason}]
+        return update
 
-    def _build_graph(self):
+    def _build_graph(self, debate_mode: str = "sequential"):
         workflow = StateGraph(BoardState)
 
         # --- 添加节点 (Nodes) ---
+        # 节点函数统一是协程 (state, on_token)：on_token 接收 LLM 流式输出的增量，由 _tracked 推到事件流。
+        # 全部节点都是原生 async，一个事件循环就能同时跑多场会议；同步的 SDK (mem0 / Chroma) 在内部放到线程里
         # === [NEW] Profile Node ===
         # 注意：这里是普通的嵌套函数，不需要也不能带 self 参数
-        def run_profile_loader(state: BoardState):
+        async def run_profile_loader(state: BoardState, on_token):
             """
             专门负责去 Mem0 查询与当前 Query 相关的用户偏好
             """
             query = state["query"]
             print("🧠 [Mem0] Loading user profile...")
-            profile = self.mem0.get_profile(query)
+            profile = await self.mem0.aget_profile(query)
             return {"user_profile": profile}
 
-        def run_archivist(state: BoardState):
+        async def run_archivist(state: BoardState, on_token):
             # 史官节点：输入 query，更新 context
-            start_time = time.time()
-            if self.progress_callback:
-                self.progress_callback("史官", "🕵️ 史官正在检索档案...", start_time)
             print("--- Step 1: Archivist ---")
-            result = self.archivist.consult(state["query"])
-            if self.progress_callback:
-                self.progress_callback("史官", "✅ 史官已完成档案检索", start_time)
+            result = await self.archivist.aconsult(
+                state["query"], use_cache=self.report_cache, on_token=on_token
+            )
             return {"context": result["answer"]}
 
-        def run_strategist(state: BoardState):
+        async def run_strategist(state: BoardState, on_token):
             # 战略官节点：输入 query + context，更新 strategist_opinion
-            start_time = time.time()
-            if self.progress_callback:
-                self.progress_callback("战略官", "🎯 战略官正在分析形势...", start_time)
             print("--- Step 2: Strategist ---")
-            opinion = self.strategist.opine(state["query"], state["context"], state["financial_report"], state["user_profile"])
-            if self.progress_callback:
-                self.progress_callback("战略官", "✅ 战略官已完成分析", start_time)
+            opinion = await self.strategist.aopine(
+                state["query"], state["context"], state["financial_report"], state["user_profile"], on_token=on_token
+            )
             return {"strategist_opinion": opinion}
 
-        def run_coach(state: BoardState):
+        async def run_coach(state: BoardState, on_token):
             # 教练节点：输入 query + context + strategist_opinion，更新 coach_opinion
-            start_time = time.time()
-            if self.progress_callback:
-                self.progress_callback("教练", "💪 教练正在提出指导意见...", start_time)
             print("--- Step 3: Coach ---")
-            opinion = self.coach.opine(
+            opinion = await self.coach.aopine(
                 state["query"],
                 state["context"],
                 state["strategist_opinion"],
-                state["user_profile"]
+                state["user_profile"],
+                on_token=on_token,
             )
-            if self.progress_callback:
-                self.progress_callback("教练", "✅ 教练已完成指导", start_time)
             return {"coach_opinion": opinion}
 
+        async def run_debate(state: BoardState, on_token):
+            # 平行辩论：教练拿到战略官流式输出的开头就开始发言，最后对照完整观点补充
+            print("--- Step 2+3: Strategist ∥ Coach ---")
+            head_ready = asyncio.Event()
+            strategist_parts: List[str] = []
+
+            def on_strategist_token(delta: str):
+                strategist_parts.append(delta)
+                on_token(delta, "strategist")
+                if sum(len(part) for part in strategist_parts) >= STRATEGIST_HEAD_CHARS:
+                    head_ready.set()
+
+            strategist_task = asyncio.create_task(self.strategist.aopine(
+                state["query"], state["context"], state["financial_report"], state["user_profile"],
+                on_token=on_strategist_token,
+            ))
+            strategist_task.add_done_callback(lambda _: head_ready.set())
+            try:
+                await head_ready.wait()
+                head = "".join(strategist_parts)
+                draft = await self.coach.aopine(
+                    state["query"],
+                    state["context"],
+                    head if strategist_task.done() else head + PARTIAL_OPINION_NOTE,
+                    state["user_profile"],
+                    on_token=lambda delta: on_token(delta, "coach"),
+                )
+                strategist_opinion = await strategist_task
+            finally:
+                strategist_task.cancel()
+
+            coach_opinion = draft
+            if strategist_opinion != head:
+                # 教练只看到了开头：对照完整观点，必要时追加简短补充
+                addendum = await self.coach.areconcile(state["query"], draft, strategist_opinion)
+                if addendum:
+                    on_token("\n\n" + addendum, "coach")
+                    coach_opinion = f"{draft}\n\n{addendum}"
+            return {"strategist_opinion": strategist_opinion, "coach_opinion": coach_opinion}
+
         # === CFO Node 1: 纯执行 (记账) ===
-        async def run_cfo_execution(state: BoardState):
+        async def run_cfo_execution(state: BoardState, on_token):
             print("💰 [CFO Execution] Processing transaction...")
             result = await self.cfo.execute(state["query"])
+            # 账本变了：依赖账本的会议缓存全部失效
+            get_data_versions().bump(LEDGER)
             return {"cfo_result": result}
 
         # === CFO Node 2: 顾问 (查账提供上下文) ===
-        async def run_cfo_advisory(state: BoardState):
+        async def run_cfo_advisory(state: BoardState, on_token):
             print("📊 [CFO Advisory] Analyzing financial status for the board...")
 
             # 技巧：我们可以稍微修改一下给 CFO 的 Prompt，让他知道现在是查询模式
@@ -133,44 +389,49 @@ class BoardOrchestrator:
             result = await self.cfo.execute(advisory_query)
             return {"financial_report": result}
 
-        def run_synthesizer(state: BoardState):
+        async def run_synthesizer(state: BoardState, on_token):
             # 决议者节点：综合所有信息，输出最终结论
-            start_time = time.time()
-            if self.progress_callback:
-                self.progress_callback("决议者", "🤝 决议者正在综合各方意见...", start_time)
             print("--- Step 4: Synthesizer ---")
-            verdict = self.synthesizer.synthesize({
+            verdict = await self.synthesizer.asynthesize({
                 "query": state["query"],
                 "context": state["context"],
                 "strategist_opinion": state["strategist_opinion"],
                 "coach_opinion": state["coach_opinion"]
-            })
+            }, on_token=on_token)
             # [NEW] 让系统记住这次的决议
             # 这样下次 Mem0 就能搜到 "User was advised to sleep early on Oct 25"
-            self.mem0.remember(f"Interaction Date: Today. User asked: {state['query']}. Decision: {verdict}")
-            if self.progress_callback:
-                self.progress_callback("决议者", "✅ 董事会已达成决议", start_time)
+            if self.remember_verdicts:
+                # 不更新画像的数据版本：这条记忆是本次会议自己的结果，不应让刚缓存的结果失效
+                await self.mem0.aremember(
+                    f"Interaction Date: Today. User asked: {state['query']}. Decision: {verdict}",
+                    bump_version=False,
+                )
             return {"final_verdict": verdict}
 
         # === 1. Define Nodes ===
         # 分支 A 的节点
-        workflow.add_node("cfo_execution", run_cfo_execution)
+        workflow.add_node("cfo_execution", self._tracked("cfo_execution", run_cfo_execution))
 
         # 分支 B 的并行节点
-        workflow.add_node("archivist", run_archivist) # 返回 {"context": ...}
-        workflow.add_node("cfo_advisory", run_cfo_advisory) # 返回 {"financial_report": ...}
-        workflow.add_node("profile_loader", run_profile_loader) # [NEW]
+        workflow.add_node("archivist", self._tracked("archivist", run_archivist)) # 返回 {"context": ...}
+        workflow.add_node("cfo_advisory", self._tracked("cfo_advisory", run_cfo_advisory)) # 返回 {"financial_report": ...}
+        workflow.add_node("profile_loader", self._tracked("profile_loader", run_profile_loader)) # [NEW]
 
         # 汇合后的节点
-        workflow.add_node("strategist", run_strategist)
-        workflow.add_node("coach", run_coach)
-        workflow.add_node("synthesizer", run_synthesizer)
+        if debate_mode == "parallel":
+            workflow.add_node("debate", self._tracked("debate", run_debate))
+            debate_entry, debate_exit = "debate", "debate"
+        else:
+            workflow.add_node("strategist", self._tracked("strategist", run_strategist))
+            workflow.add_node("coach", self._tracked("coach", run_coach))
+            debate_entry, debate_exit = "strategist", "coach"
+        workflow.add_node("synthesizer", self._tracked("synthesizer", run_synthesizer))
 
         # === 2. Define Edges ===
 
         # [关键] 入口路由逻辑
-        def route_entry(state: BoardState):
-            intent = self.router.decide(state["query"])
+        async def route_entry(state: BoardState):
+            intent = state.get("intent") or await self.router.adecide(state["query"])
             print(f"🚦 [Router] Routing to: {intent}")
             if intent == "finance_execution":
                 # 这是一个单一路径
@@ -197,19 +458,273 @@ class BoardOrchestrator:
         # 分支 B 汇合逻辑
         # LangGraph 会等待 archivist 和 cfo_advisory 都执行完，
         # 然后把它们的结果合并到 State 中，再传给 strategist
-        workflow.add_edge("archivist", "strategist")
-        workflow.add_edge("cfo_advisory", "strategist")
-        workflow.add_edge("profile_loader", "strategist")
+        workflow.add_edge("archivist", debate_entry)
+        workflow.add_edge("cfo_advisory", debate_entry)
+        workflow.add_edge("profile_loader", debate_entry)
 
         # 后续线性流程
-        workflow.add_edge("strategist", "coach")
-        workflow.add_edge("coach", "synthesizer")
+        if debate_mode == "sequential":
+            workflow.add_edge("strategist", "coach")
+        workflow.add_edge(debate_exit, "synthesizer")
         workflow.add_edge("synthesizer", END)
 
         return workflow.compile()
 
+    @asynccontextmanager
+    async def _open_meeting(self, meeting_id: str, debate_mode: Optional[str]):
+        """
+        打开一场会议的检查点，得到 (绑定了检查点的图, config, 已保存的最新检查点)。
+        每场会议单独打开一个 SQLite 连接：连接不绑定某个事件循环，会议结束即关闭。
+        续开时沿用检查点里记录的辩论模式 (两种模式的图结构不同)。
+        """
+        async with AsyncSqliteSaver.from_conn_string(self.checkpoint_path) as saver:
+            config = {"configurable": {"thread_id": meeting_id}}
+            saved = await saver.aget_tuple(config)
+            if saved is not None:
+                debate_mode = saved.metadata.get("debate_mode", debate_mode)
+            debate_mode = debate_mode or self.debate_mode
+            config["metadata"] = {"debate_mode": debate_mode}
+            graph = self.graphs[debate_mode].copy(update={"checkpointer": saver})
+            yield graph, config, saved
+
+    async def _record_finished(self, saver: AsyncSqliteSaver, meeting_id: str):
+        """
+        登记开完的会议，并按保留策略清理旧会议的检查点 (checkpoints / writes 两张表)。
+        开完时间记在检查点库里单独的 meeting_index 表中，不依赖 LangGraph 的表结构。
+        """
+        now = time.time()
+        async with saver.lock:
+            await saver.conn.execute(
+                "CREATE TABLE IF NOT EXISTS meeting_index (thread_id TEXT PRIMARY KEY, finished_at REAL NOT NULL)"
+            )
+            await saver.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_meeting_index_finished ON meeting_index (finished_at)"
+            )
+            await saver.conn.execute(
+                "INSERT OR REPLACE INTO meeting_index (thread_id, finished_at) VALUES (?, ?)", (meeting_id, now)
+            )
+            expired = set()
+            if CHECKPOINT_RETENTION_DAYS > 0:
+                async with saver.conn.execute(
+                    "SELECT thread_id FROM meeting_index WHERE finished_at < ?",
+                    (now - CHECKPOINT_RETENTION_DAYS * 86400,),
+                ) as cursor:
+                    expired.update(row[0] for row in await cursor.fetchall())
+            if CHECKPOINT_MAX_MEETINGS > 0:
+                async with saver.conn.execute(
+                    "SELECT thread_id FROM meeting_index ORDER BY finished_at DESC LIMIT -1 OFFSET ?",
+                    (CHECKPOINT_MAX_MEETINGS,),
+                ) as cursor:
+                    expired.update(row[0] for row in await cursor.fetchall())
+            expired.discard(meeting_id)
+            await saver.conn.executemany(
+                "DELETE FROM meeting_index WHERE thread_id = ?", [(thread_id,) for thread_id in expired]
+            )
+            await saver.conn.commit()
+
+        for thread_id in expired:
+            await saver.adelete_thread(thread_id)
+        if expired:
+            print(f"🧹 [Checkpoint] 清理了 {len(expired)} 场旧会议的检查点")
+
+    async def _replay_events(self, graph, config) -> AsyncIterator[MeetingEvent]:
+        """按执行顺序回放检查点里已完成的节点 (node_end 事件，不调用任何 LLM)"""
+        history = [snapshot async for snapshot in graph.aget_state_history(config)]
+        for snapshot in reversed(history):
+            start_time = datetime.fromisoformat(snapshot.created_at).timestamp()
+            for task in snapshot.tasks:
+                if task.name not in NODE_STAGES or task.result is None:
+                    continue
+                stage, _, end_message = NODE_STAGES[task.name]
+                yield {
+                    "type": "node_end",
+                    "node": task.name,
+                    "stage": stage,
+                    "message": end_message,
+                    "start_time": start_time,
+                    "duration": None,
+                    "output": task.result,
+                    "replayed": True,
+                }
+
     # 入口也变成了 async
-    async def run_meeting(self, user_query: str):
-        initial_state = {"query": user_query}
-        final_state = await self.graph.ainvoke(initial_state)
+    async def run_meeting(
+        self,
+        user_query: str,
+        debate_mode: Optional[str] = None,
+        meeting_id: Optional[str] = None,
+        force_refresh: bool = False,
+    ):
+        """
+        Args:
+            debate_mode: 本次会议的辩论模式，不传则用默认模式
+            meeting_id: 会议 id；已有检查点时从最后一个完成的节点继续 (已完成的会议直接返回结果)
+            force_refresh: 跳过整场会议的结果缓存，重新开会
+        """
+        final_state: Dict = {}
+        async for event in self.astream_meeting(user_query, debate_mode, meeting_id, force_refresh):
+            if event["type"] == "final":
+                final_state = event["state"]
         return final_state
+
+    async def resume_meeting(self, meeting_id: str):
+        """从检查点继续一场失败 / 中断的会议 (已完成的节点不会重新执行)"""
+        if not self.checkpoint_path:
+            raise ValueError("未开启会议检查点 (checkpoint_path)")
+        async with self._open_meeting(meeting_id, None) as (_, _, saved):
+            if saved is None:
+                raise KeyError(f"没有找到会议: {meeting_id}")
+        return await self.run_meeting("", meeting_id=meeting_id)
+
+    async def replay_meeting(self, meeting_id: str) -> AsyncIterator[MeetingEvent]:
+        """
+        回放一场会议 (调试用)：按顺序给出各节点保存下来的输出，最后是当前的完整 State。
+        只读检查点，不调用任何 LLM / 工具；未完成的会议只回放到最后一个完成的节点。
+        """
+        if not self.checkpoint_path:
+            raise ValueError("未开启会议检查点 (checkpoint_path)")
+        async with self._open_meeting(meeting_id, None) as (graph, config, saved):
+            if saved is None:
+                raise KeyError(f"没有找到会议: {meeting_id}")
+            async for event in self._replay_events(graph, config):
+                yield event
+            snapshot = await graph.aget_state(config)
+            yield {"type": "final", "state": snapshot.values, "meeting_id": meeting_id}
+
+    def _meeting_cache_key(self, user_query: str, debate_mode: str):
+        """整场会议缓存的键：归一化的问题 + 数据版本向量 + 辩论模式 / 相对日期 ("昨天") 解析出的日期"""
+        versions = get_data_versions().snapshot([self.archivist.kb.version_key, self.mem0.version_key, LEDGER])
+        date_range = resolve_date_range(user_query)
+        variant = f"{debate_mode}|{date_range.start_key}-{date_range.end_key}" if date_range else debate_mode
+        return MeetingCache.make_key(user_query, versions, variant), versions
+
+    async def astream_meeting(
+        self,
+        user_query: str,
+        debate_mode: Optional[str] = None,
+        meeting_id: Optional[str] = None,
+        force_refresh: bool = False,
+    ) -> AsyncIterator[MeetingEvent]:
+        """
+        以事件流的形式开会：节点开始 / 结束 (node_start / node_end)、各成员 LLM 的 token 增量 (token)，
+        最后是包含完整 State 的 final 事件。UI 可以边收边渲染，不必等决议者写完。
+        传入已有检查点的 meeting_id 时，先回放已完成节点的 node_end (replayed=True)，再从断点继续。
+        同一个问题在知识库 / 画像 / 账本都没变时直接返回上次的决议 (cached=True)；force_refresh=True 跳过缓存重新开会。
+        同一个问题 (同样的数据版本) 已经在开会时，不再另开一场，而是挂到那场会议上收同样的事件流 (final 里 coalesced=True)。
+        记账请求既不走缓存也不合并：先路由，判断为记账的直接执行 (两笔相同的账要记两次)。
+        """
+        meeting_id = meeting_id or new_meeting_id()
+        if (self.meeting_cache is None and self.inflight is None) or not user_query:
+            async for event in self._meeting_events(user_query, debate_mode, meeting_id):
+                yield event
+            return
+
+        debate_mode = debate_mode or self.debate_mode
+        cache_key, versions = await asyncio.to_thread(self._meeting_cache_key, user_query, debate_mode)
+        cached_state = None
+        if self.meeting_cache is not None and not force_refresh:
+            cached_state = await asyncio.to_thread(self.meeting_cache.lookup, cache_key)
+        if cached_state is not None:
+            print(f"⚡ [Board] 数据没有变化，复用之前的会议决议: {user_query}")
+            yield {
+                "type": "node_end",
+                "node": "meeting_cache",
+                "stage": "缓存",
+                "message": "⚡ 数据没有变化，复用之前的会议决议",
+                "start_time": time.time(),
+                "duration": 0.0,
+                "output": cached_state,
+                "cached": True,
+            }
+            yield {"type": "final", "state": cached_state, "meeting_id": meeting_id, "cached": True}
+            return
+
+        # 合并之前先路由：合并键只看问题和数据版本，两笔同时提交的相同记账会被合并成一笔。
+        # 已经有相同的会议在开时直接挂上去，不再路由：进行中的会议一定是顾问会议 (记账从不进入单飞)，
+        # 检查和挂上去之间没有 await，会议不会在这中间结束
+        intent = None
+        if self.inflight is None or not self.inflight.running(cache_key):
+            intent = await self._route(cache_key, user_query)
+        if intent == "finance_execution":
+            async for event in self._meeting_events(user_query, debate_mode, meeting_id, intent):
+                yield event
+            return
+
+        async def run_and_cache() -> AsyncIterator[MeetingEvent]:
+            async for event in self._meeting_events(user_query, debate_mode, meeting_id, intent):
+                if event["type"] == "final" and self.meeting_cache is not None:
+                    state = event["state"]
+                    # 只缓存完整开完的顾问会议：记账 (cfo_result) 每次都要真正执行，降级的结果不复用
+                    if not event.get("resumed") and state.get("final_verdict") and not state.get("degraded"):
+                        await asyncio.to_thread(self.meeting_cache.store, cache_key, user_query, versions, state)
+                yield event
+
+        if self.inflight is None:
+            async for event in run_and_cache():
+                yield event
+            return
+
+        # 单飞：会议在独立的 Task 里进行，发起的请求断开也不影响挂在上面的其他请求
+        async for joined, event in self.inflight.stream(cache_key, run_and_cache):
+            if joined and event["type"] == "final":
+                print(f"🔗 [Board] 相同的问题正在开会，直接使用那场会议的结果: {user_query}")
+                event = {**event, "coalesced": True}
+            yield event
+
+    async def _route(self, cache_key, user_query: str) -> str:
+        """路由：同时到达的相同问题 (同一个合并键) 共用一次路由调用"""
+        if self.routing is None:
+            return await self.router.adecide(user_query)
+
+        async def decide():
+            yield await self.router.adecide(user_query)
+
+        return [intent async for _, intent in self.routing.stream(cache_key, decide)][-1]
+
+    async def _meeting_events(
+        self, user_query: str, debate_mode: Optional[str], meeting_id: str, intent: Optional[str] = None
+    ) -> AsyncIterator[MeetingEvent]:
+        """:param intent: 已经路由过时传入，图的入口不再重复路由"""
+        inputs = {"query": user_query, "intent": intent} if intent else {"query": user_query}
+        if not self.checkpoint_path:
+            graph = self.graphs[debate_mode or self.debate_mode]
+            async for event in self._stream(graph, inputs, {}, meeting_id):
+                yield event
+            return
+
+        async with self._open_meeting(meeting_id, debate_mode) as (graph, config, saved):
+            if saved is not None:
+                async for event in self._replay_events(graph, config):
+                    yield event
+                snapshot = await graph.aget_state(config)
+                if not snapshot.next:
+                    yield {"type": "final", "state": snapshot.values, "meeting_id": meeting_id, "resumed": True}
+                    return
+                print(f"♻️ [Checkpoint] 会议 {meeting_id} 从 {snapshot.next} 继续")
+                inputs = None
+            async for event in self._stream(graph, inputs, config, meeting_id):
+                if event["type"] == "final":
+                    # 在交出 final 之前登记：调用方收到 final 后可能不再继续迭代
+                    await self._record_finished(graph.checkpointer, meeting_id)
+                    if inputs is None:
+                        event = {**event, "resumed": True}
+                yield event
+
+    async def _stream(self, graph, inputs: Optional[dict], config: dict, meeting_id: str) -> AsyncIterator[MeetingEvent]:
+        """执行图并转发事件；会议时限和 meeting_id 通过 config 传给各节点，耗时 / 降级记入会议指标"""
+        config = {**config, "configurable": {
+            **config.get("configurable", {}),
+            "meeting_id": meeting_id,
+            "meeting_deadline": time.time() + MEETING_SLA if MEETING_SLA > 0 else None,
+        }}
+        monitor.start_session(meeting_id, (inputs or {}).get("query", ""))
+        final_state: Dict = {}
+        try:
+            async for mode, chunk in graph.astream(inputs, config, stream_mode=["custom", "values"]):
+                if mode == "custom":
+                    yield chunk
+                else:
+                    final_state = chunk
+        finally:
+            monitor.end_session(meeting_id)
+        yield {"type": "final", "state": final_state, "meeting_id": meeting_id}
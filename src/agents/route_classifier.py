@@ -0,0 +1,218 @@
+# agents/route_classifier.py
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FINANCE_EXECUTION = "finance_execution"
+BOARD_ADVISORY = "board_advisory"
+
+DEFAULT_HISTORY_PATH = os.getenv("ROUTER_HISTORY_PATH", "./data/router_history.sqlite")
+
+
+@dataclass
+class RouteGuess:
+    """本地分类器的判断结果"""
+    intent: str
+    confidence: float
+    tier: str      # rules / knn / llm
+    reason: str
+
+
+# ----------------------------------------------------------------------
+# 第一层：关键词 + 金额规则 (中英文)
+# ----------------------------------------------------------------------
+_AMOUNT_RE = re.compile(
+    r"[$¥￥€£]\s?\d+(?:[.,]\d+)?"
+    r"|\d+(?:\.\d+)?\s?(?:dollars?|bucks|usd|rmb|cny|yuan|euros?|eur|元|块钱?|人民币|美元|美金|刀)"
+    r"|[一二两三四五六七八九十百千万]+\s*(?:元|块钱?)",
+    re.IGNORECASE,
+)
+# 记账动作：花钱 / 收钱 / 转账 / 记一笔
+_FINANCE_ACTION_RE = re.compile(
+    r"\b(?:spent|spend|paid|pay|bought|buy|purchased?|charged|cost|received|earned|refund(?:ed)?"
+    r"|transferr?(?:ed)?|record|log)\b"
+    r"|花了|花费|消费了?|买了|付了|支付|付款|充值|收入|工资|到账|转账|退款|报销|记账|记一笔|记下|入账",
+    re.IGNORECASE,
+)
+# 精确的账户查询：不需要金额也能确定是 CFO 的活
+_FINANCE_QUERY_RE = re.compile(
+    r"\bbalance\b|\bhow much (?:did|have) i (?:spend|spent|paid)\b|\btransactions?\b|\bexpenses? (?:this|last)\b"
+    r"|余额|花了多少|账单|流水|消费记录|支出明细|收支",
+    re.IGNORECASE,
+)
+# 需要建议 / 反思 / 情绪：董事会
+_ADVISORY_RE = re.compile(
+    r"\bshould i\b|\bfeel(?:s|ing)?\b|\bfelt\b|\banxi(?:ous|ety)\b|\bguilty\b|\bregret|\bworr(?:y|ied)\b"
+    r"|\bstress(?:ed)?\b|\banaly[sz]e|\breview\b|\bplan(?:s|ning)?\b|\badvi[cs]e\b|\bafford\b|\bworth\b"
+    r"|\bwhy\b|\bhow (?:can|do|should) i\b|\breflect"
+    r"|应该|要不要|该不该|值不值|值得|划算|感觉|觉得|焦虑|内疚|愧疚|后悔|担心|难过|压力|分析|复盘|回顾|反思"
+    r"|计划|规划|建议|怎么办|如何|为什么|买得起|能不能买|可以买吗",
+    re.IGNORECASE,
+)
+
+
+def classify_by_rules(query: str) -> Optional[RouteGuess]:
+    """
+    关键词 + 金额规则。判断依据与 Router 的 Prompt 一致：
+    同时出现数字和情绪 / 建议时，交给董事会 (Tie-Breaker)。
+    :return: 没有任何信号时返回 None
+    """
+    advisory = _ADVISORY_RE.findall(query)
+    action = _FINANCE_ACTION_RE.findall(query)
+    amount = _AMOUNT_RE.search(query)
+    finance_query = _FINANCE_QUERY_RE.search(query)
+
+    if advisory:
+        if action or amount or finance_query:
+            return RouteGuess(BOARD_ADVISORY, 0.85, "rules", f"涉及金额但需要建议: {advisory[0]}")
+        return RouteGuess(BOARD_ADVISORY, 0.9, "rules", f"建议 / 反思类关键词: {advisory[0]}")
+    if action and amount:
+        return RouteGuess(FINANCE_EXECUTION, 0.95, "rules", f"记账动作 + 金额: {action[0]} {amount.group(0)}")
+    if finance_query:
+        return RouteGuess(FINANCE_EXECUTION, 0.9, "rules", f"账户查询: {finance_query.group(0)}")
+    if action:
+        return RouteGuess(FINANCE_EXECUTION, 0.7, "rules", f"记账动作但没有金额: {action[0]}")
+    if amount:
+        return RouteGuess(FINANCE_EXECUTION, 0.6, "rules", f"只有金额: {amount.group(0)}")
+    return None
+
+
+# ----------------------------------------------------------------------
+# 第二层：基于历史路由决策的向量近邻分类
+# ----------------------------------------------------------------------
+class KNNRouteClassifier:
+    """
+    用过去由 LLM 做出的路由决策训练的近邻分类器 (query 向量 → intent)。
+
+    规则拿不准的输入才会走到这一层；LLM 的判断会被记录下来作为新的样本，
+    同一类说法出现几次之后就不再需要 LLM。所有经过这一层的决策 (含各层的猜测和置信度)
+    都保存在 decisions 表里，方便回头调整阈值。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_HISTORY_PATH, k: int = 5, min_similarity: float = 0.8):
+        self.db_path = db_path
+        self.k = k
+        self.min_similarity = min_similarity
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS decisions (
+                decision_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT NOT NULL,
+                vector BLOB,
+                intent TEXT NOT NULL,
+                tier TEXT NOT NULL,
+                rule_intent TEXT,
+                rule_confidence REAL,
+                knn_intent TEXT,
+                knn_confidence REAL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+        # 训练样本 (tier = llm 的决策) 在第一次使用时加载进内存
+        self._matrix: Optional[np.ndarray] = None
+        self._intents: List[str] = []
+
+    def _ensure_loaded(self):
+        """调用方需持有 self._lock"""
+        if self._matrix is not None:
+            return
+        rows = self._conn.execute(
+            "SELECT vector, intent FROM decisions WHERE tier = 'llm' AND vector IS NOT NULL"
+        ).fetchall()
+        vectors = [np.frombuffer(blob, dtype=np.float32) for blob, _ in rows]
+        self._intents = [intent for _, intent in rows]
+        self._matrix = self._normalize(np.vstack(vectors)) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def count(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._intents)
+
+    def classify(self, vector: List[float]) -> Optional[RouteGuess]:
+        """
+        相似度加权投票；置信度 = 胜出类别的票数占比 × 最近邻相似度
+        :return: 没有足够相似的历史样本时返回 None
+        """
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            self._ensure_loaded()
+            if not self._intents or self._matrix.shape[1] != query.shape[0]:
+                return None
+            similarities = self._matrix @ query
+            top = np.argsort(-similarities)[:self.k]
+            top = [i for i in top if similarities[i] >= self.min_similarity]
+            if not top:
+                return None
+            votes = {}
+            for i in top:
+                votes[self._intents[i]] = votes.get(self._intents[i], 0.0) + float(similarities[i])
+        intent = max(votes, key=votes.get)
+        confidence = votes[intent] / sum(votes.values()) * float(similarities[top[0]])
+        return RouteGuess(intent, confidence, "knn", f"{len(top)} 个相似的历史问题")
+
+    def record(
+        self,
+        query: str,
+        vector: Optional[List[float]],
+        decision: RouteGuess,
+        rule_guess: Optional[RouteGuess] = None,
+        knn_guess: Optional[RouteGuess] = None,
+    ):
+        """记录一次路由决策；tier = llm 且带向量的记录会立即成为新的训练样本"""
+        blob = array("f", vector).tobytes() if vector is not None else None
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO decisions (
+                    query, vector, intent, tier, rule_intent, rule_confidence, knn_intent, knn_confidence, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    query,
+                    blob,
+                    decision.intent,
+                    decision.tier,
+                    rule_guess.intent if rule_guess else None,
+                    rule_guess.confidence if rule_guess else None,
+                    knn_guess.intent if knn_guess else None,
+                    knn_guess.confidence if knn_guess else None,
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+            if decision.tier == "llm" and blob is not None and self._matrix is not None:
+                row = self._normalize(np.frombuffer(blob, dtype=np.float32))[None, :]
+                if self._matrix.size == 0:
+                    self._matrix = row
+                elif self._matrix.shape[1] == row.shape[1]:
+                    self._matrix = np.vstack([self._matrix, row])
+                else:
+                    return
+                self._intents.append(decision.intent)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
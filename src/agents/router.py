@@ -1,19 +1,26 @@
+import asyncio
 import json
+import logging
 import os
 import re
-from typing import Literal
+import time
+from typing import List, Literal, Optional
 
 from dotenv import find_dotenv, load_dotenv
-from pydantic import BaseModel, Field, SecretStr
-from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
-import os
+
+from src.agents.route_classifier import KNNRouteClassifier, RouteGuess, classify_by_rules
+from src.infrastructure.llm_registry import get_llm
 
 load_dotenv(find_dotenv())
 
-api_key = os.getenv("OPEN_AI_API_KEY")
-base_url = os.getenv("OPEN_AI_API_BASE")
-chat_model = os.getenv("CHAT_MODEL")
+logger = logging.getLogger(__name__)
+
+# 本地分类器的置信度达到阈值才直接采用，否则交给下一层 (规则 → 近邻 → LLM)
+RULE_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_RULE_THRESHOLD", "0.85"))
+KNN_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_KNN_THRESHOLD", "0.8"))
+ROUTER_KNN_ENABLED = os.getenv("ROUTER_KNN", "1") == "1"
 
 # 定义结构化输出
 class RouteDecision(BaseModel):
@@ -24,15 +31,12 @@ class RouteDecision(BaseModel):
     reasoning: str = Field(..., description="Why you made this decision.")
 
 class Router:
-    def __init__(self):
-        if not chat_model or not api_key:
-            raise ValueError("CHAT_MODEL and OPEN_AI_API_KEY must be set")
-        self.llm = ChatOpenAI(
-            temperature=0,
-            model=chat_model,
-            api_key=SecretStr(api_key),
-            base_url=base_url
-        )  # 用 mini 足够了，速度快
+    def __init__(self, use_knn: bool = ROUTER_KNN_ENABLED):
+        """
+        :param use_knn: 是否启用第二层的向量近邻分类 (需要 Embedding 模型，样本来自过去的 LLM 决策)
+        """
+        # 共享连接池 / 限流；温度为 0，可以用 LLM_ROUTER_MODEL 换成更小更快的模型
+        self.llm = get_llm("router")
 
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """
@@ -62,6 +66,7 @@ class Router:
             """),
             ("user", "User Input: {query}")
         ])
+        self.knn = KNNRouteClassifier() if use_knn else None
 
     def _parse_json_from_response(self, response_text: str) -> dict:
         """
@@ -86,14 +91,87 @@ class Router:
             print(f"⚠️ [Router] JSON 解析错误: {e}, 原始响应: {response_text}")
             raise ValueError(f"无法从响应中解析 JSON: {response_text}")
 
+    def _embed(self, query: str) -> Optional[List[float]]:
+        try:
+            # 延迟导入：只有规则拿不准时才需要 Embedding 模型
+            from src.infrastructure.embedding_cache import get_embeddings
+            return get_embeddings().embed_query(query)
+        except Exception as e:
+            logger.warning(f"⚠️ [Router] 近邻分类不可用，跳过: {e}")
+            return None
+
+    def _log_decision(self, decision: RouteGuess, started: float):
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        logger.info(
+            f"🚦 [Router] {decision.tier} → {decision.intent} "
+            f"(置信度 {decision.confidence:.2f}, {elapsed_us:.0f}µs): {decision.reason}"
+        )
+
     def decide(self, query: str) -> str:
         """
         返回 'finance_execution' 或 'board_advisory'
+        分层判断：关键词 / 金额规则 → 历史决策近邻 → LLM，只有前面的层置信度不够时才往后走
+        """
+        started = time.perf_counter()
+        rule_guess = classify_by_rules(query)
+        if rule_guess and rule_guess.confidence >= RULE_CONFIDENCE_THRESHOLD:
+            self._log_decision(rule_guess, started)
+            return rule_guess.intent
+
+        vector = knn_guess = None
+        if self.knn is not None:
+            vector = self._embed(query)
+            if vector is not None:
+                knn_guess = self.knn.classify(vector)
+            if knn_guess and knn_guess.confidence >= KNN_CONFIDENCE_THRESHOLD:
+                self._log_decision(knn_guess, started)
+                self.knn.record(query, vector, knn_guess, rule_guess, knn_guess)
+                return knn_guess.intent
+
+        decision = self._decide_with_llm(query)
+        self._log_decision(decision, started)
+        if self.knn is not None:
+            # LLM 的判断成为近邻分类器的新样本
+            self.knn.record(query, vector, decision, rule_guess, knn_guess)
+        return decision.intent
+
+    async def adecide(self, query: str) -> str:
+        """
+        decide 的异步版本：规则层在事件循环里直接算 (微秒级)，Embedding 放到线程里，LLM 用 ainvoke
         """
+        started = time.perf_counter()
+        rule_guess = classify_by_rules(query)
+        if rule_guess and rule_guess.confidence >= RULE_CONFIDENCE_THRESHOLD:
+            self._log_decision(rule_guess, started)
+            return rule_guess.intent
+
+        vector = knn_guess = None
+        if self.knn is not None:
+            vector = await asyncio.to_thread(self._embed, query)
+            if vector is not None:
+                knn_guess = self.knn.classify(vector)
+            if knn_guess and knn_guess.confidence >= KNN_CONFIDENCE_THRESHOLD:
+                self._log_decision(knn_guess, started)
+                self.knn.record(query, vector, knn_guess, rule_guess, knn_guess)
+                return knn_guess.intent
+
+        print(f"🚦 [Router] Query 开始执行路由决策: {query}")
+        response = await (self.prompt | self.llm).ainvoke({"query": query})
+        decision = self._to_route_guess(response)
+        self._log_decision(decision, started)
+        if self.knn is not None:
+            # LLM 的判断成为近邻分类器的新样本
+            self.knn.record(query, vector, decision, rule_guess, knn_guess)
+        return decision.intent
+
+    def _decide_with_llm(self, query: str) -> RouteGuess:
         chain = self.prompt | self.llm
         print(f"🚦 [Router] Query 开始执行路由决策: {query}")
         response = chain.invoke({"query": query})
+        return self._to_route_guess(response)
 
+    def _to_route_guess(self, response) -> RouteGuess:
+        """解析 LLM 的路由响应"""
         # 获取响应文本
         if hasattr(response, 'content'):
             content = response.content
@@ -115,4 +193,4 @@ class Router:
 
         print(f"🚦 [Router] 路由决策结果: {result.model_dump()}")
         print(f"🚦 [Router] Routing to: {result.intent} (Reason: {result.reasoning})")
-        return result.intent
+        return RouteGuess(result.intent, 1.0, "llm", result.reasoning)
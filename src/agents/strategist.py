@@ -8,6 +8,7 @@ from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from typing import Callable, Optional
 
 class Strategist(BaseBoardMember):
     """
@@ -30,9 +31,28 @@ class Strategist(BaseBoardMember):
         print(f"♟️ [战略官] 正在分析 ROI...")
 
         
-        return self.chain.invoke({
+        return self.chain.invoke(self.fit_inputs({
             "query": query,
             "context": context,
             "user_profile": user_profile,
             "financial_report": financial_report
-        })
\ No newline at end of file
+        }))
+
+    async def aopine(
+        self,
+        query: str,
+        context: str,
+        financial_report: str,
+        user_profile: str,
+        on_token: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        发表观点 (Thesis)，流式输出：每个 token 增量回调 on_token
+        """
+        print(f"♟️ [战略官] 正在分析 ROI...")
+        return await self._astream_chain({
+            "query": query,
+            "context": context,
+            "user_profile": user_profile,
+            "financial_report": financial_report
+        }, on_token)
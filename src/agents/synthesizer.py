@@ -8,6 +8,7 @@ from langchain_openai import ChatOpenAI
 from pydantic import SecretStr
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from typing import Callable, Optional
 
 from src.agents.prompts.synthesizer import SYNTHESIZER_SYSTEM_PROMPT
 
@@ -28,9 +29,22 @@ class Synthesizer(BaseBoardMember):
         综合所有信息，输出最终结论。
         """
         print(f"♟️ [综合官] 正在综合所有信息...")
-        return self.chain.invoke({
+        return self.chain.invoke(self.fit_inputs({
             "query": data["query"],
             "context": data["context"],
             "strategist_opinion": data["strategist_opinion"],
             "coach_opinion": data["coach_opinion"]
-        })
+        }))
+
+    async def asynthesize(self, data: dict, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        综合所有信息，流式输出最终结论：每个 token 增量回调 on_token
+        """
+        print(f"♟️ [综合官] 正在综合所有信息...")
+        return await self._astream_chain({
+            "query": data["query"],
+            "context": data["context"],
+            "strategist_opinion": data["strategist_opinion"],
+            "coach_opinion": data["coach_opinion"]
+        }, on_token)
+
@@ -0,0 +1,187 @@
+# benchmarks/debate_modes.py
+"""
+顺序辩论 vs 平行辩论 (BoardOrchestrator 的 debate_mode) 基准测试。
+
+对每个问题分别用两种模式开会，记录：
+- 端到端耗时、决议的首 token 时间 (time to first verdict token)
+- 两种模式下教练观点 / 最终决议的文本重合度 (CJK 感知的词级 F1)
+- repeat ≥ 2 时，同一模式重复运行之间的重合度作为基线 (LLM 本身有随机性)
+结果按问题类别汇总，给出每类问题推荐的模式。
+
+用法:
+    python -m src.benchmarks.debate_modes --queries queries.jsonl --repeat 2 --output debate_modes.json
+queries.jsonl 每行一个 {"query": "...", "class": "..."}；不传则使用内置的示例问题。
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from src.infrastructure.lexical_index import tokenize
+
+DEFAULT_QUERIES = [
+    {"class": "decision", "query": "我应该接受新的工作机会吗？薪资高 30%，但是要经常加班。"},
+    {"class": "decision", "query": "要不要现在换一台新的 MacBook？"},
+    {"class": "wellbeing", "query": "最近总是失眠，工作压力很大，怎么办？"},
+    {"class": "review", "query": "帮我复盘一下上周的工作状态，给出这周的计划建议。"},
+]
+
+# 平行模式至少快这么多、且决议重合度不低于基线的这个比例时，推荐平行模式
+MIN_SPEEDUP = 1.15
+MIN_RELATIVE_OVERLAP = 0.9
+# 没有基线 (repeat = 1) 时使用的重合度下限
+MIN_ABSOLUTE_OVERLAP = 0.5
+
+
+def token_f1(a: str, b: str) -> float:
+    """两段文本的词级 F1 (中文按二元组切分)，用来衡量两种模式的回答有多接近"""
+    tokens_a, tokens_b = Counter(tokenize(a or "")), Counter(tokenize(b or ""))
+    if not tokens_a or not tokens_b:
+        return 0.0
+    common = sum((tokens_a & tokens_b).values())
+    if not common:
+        return 0.0
+    precision = common / sum(tokens_b.values())
+    recall = common / sum(tokens_a.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+async def run_once(orchestrator, query: str, debate_mode: str) -> Dict:
+    """开一次会，记录耗时和最终 State"""
+    started = time.perf_counter()
+    verdict_ttft = None
+    nodes: Dict[str, float] = {}
+    state: Dict = {}
+    async for event in orchestrator.astream_meeting(query, debate_mode=debate_mode):
+        if event["type"] == "token" and event["node"] == "synthesizer" and verdict_ttft is None:
+            verdict_ttft = time.perf_counter() - started
+        elif event["type"] == "node_end":
+            nodes[event["node"]] = round(event["duration"], 3)
+        elif event["type"] == "final":
+            state = event["state"]
+    return {
+        "latency": time.perf_counter() - started,
+        "verdict_ttft": verdict_ttft,
+        "nodes": nodes,
+        "state": state,
+    }
+
+
+def _median(values: List[Optional[float]]) -> Optional[float]:
+    values = [value for value in values if value is not None]
+    return round(statistics.median(values), 3) if values else None
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return round(statistics.mean(values), 3) if values else None
+
+
+async def benchmark(orchestrator, queries: List[Dict], repeat: int = 1) -> Dict:
+    per_query = []
+    for item in queries:
+        runs = {"sequential": [], "parallel": []}
+        for i in range(repeat):
+            # 交替先后顺序，抵消缓存 / 连接预热带来的偏差
+            order = ("sequential", "parallel") if i % 2 == 0 else ("parallel", "sequential")
+            for mode in order:
+                runs[mode].append(await run_once(orchestrator, item["query"], mode))
+                print(f"⏱️ [{mode}] {item['query'][:20]}... {runs[mode][-1]['latency']:.2f}s")
+
+        seq, par = runs["sequential"], runs["parallel"]
+        debated = all("coach_opinion" in run["state"] for run in seq + par)
+        result = {
+            "query": item["query"],
+            "class": item.get("class", "default"),
+            "debated": debated,  # 路由到记账分支时两种模式没有区别
+            "sequential": {
+                "latency": _median([run["latency"] for run in seq]),
+                "verdict_ttft": _median([run["verdict_ttft"] for run in seq]),
+            },
+            "parallel": {
+                "latency": _median([run["latency"] for run in par]),
+                "verdict_ttft": _median([run["verdict_ttft"] for run in par]),
+            },
+        }
+        if debated:
+            result["speedup"] = round(result["sequential"]["latency"] / result["parallel"]["latency"], 3)
+            result["coach_overlap"] = _mean([
+                token_f1(s["state"]["coach_opinion"], p["state"]["coach_opinion"]) for s, p in zip(seq, par)
+            ])
+            result["verdict_overlap"] = _mean([
+                token_f1(s["state"]["final_verdict"], p["state"]["final_verdict"]) for s, p in zip(seq, par)
+            ])
+            if repeat >= 2:
+                result["baseline_verdict_overlap"] = _mean([
+                    token_f1(a["state"]["final_verdict"], b["state"]["final_verdict"]) for a, b in zip(seq, seq[1:])
+                ])
+        per_query.append(result)
+
+    return {"repeat": repeat, "queries": per_query, "classes": summarize(per_query)}
+
+
+def summarize(per_query: List[Dict]) -> Dict[str, Dict]:
+    """按问题类别汇总，给出推荐的辩论模式"""
+    grouped = defaultdict(list)
+    for result in per_query:
+        if result["debated"]:
+            grouped[result["class"]].append(result)
+
+    classes = {}
+    for name, results in grouped.items():
+        speedup = _mean([result["speedup"] for result in results])
+        overlap = _mean([result["verdict_overlap"] for result in results])
+        baselines = [result["baseline_verdict_overlap"] for result in results if "baseline_verdict_overlap" in result]
+        baseline = _mean(baselines)
+        min_overlap = baseline * MIN_RELATIVE_OVERLAP if baseline is not None else MIN_ABSOLUTE_OVERLAP
+        classes[name] = {
+            "queries": len(results),
+            "speedup": speedup,
+            "verdict_overlap": overlap,
+            "baseline_verdict_overlap": baseline,
+            "recommended_mode": "parallel" if speedup >= MIN_SPEEDUP and overlap >= min_overlap else "sequential",
+        }
+    return classes
+
+
+def load_queries(path: Optional[str]) -> List[Dict]:
+    if not path:
+        return DEFAULT_QUERIES
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    from src.agents.orchestrator import BoardOrchestrator
+    from src.infrastructure.vector_store import KnowledgeBase
+
+    parser = argparse.ArgumentParser(description="顺序辩论 vs 平行辩论的耗时 / 回答重合度对比")
+    parser.add_argument("--queries", help="JSONL 文件，每行 {\"query\": ..., \"class\": ...}")
+    parser.add_argument("--repeat", type=int, default=1, help="每种模式对每个问题运行的次数")
+    parser.add_argument("--persist-dir", default="./data/chroma_db", help="知识库目录")
+    parser.add_argument("--output", help="把完整结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    kb = KnowledgeBase(persist_dir=args.persist_dir, reset_db=False)
+    # 基准测试不把决议写进 Mem0，避免污染用户画像；同一个问题要反复真正开会，所以关掉会议缓存
+    orchestrator = BoardOrchestrator(
+        vector_store=kb, remember_verdicts=False, checkpoint_path=None, meeting_cache=False
+    )
+    report = asyncio.run(benchmark(orchestrator, load_queries(args.queries), repeat=args.repeat))
+
+    print("\n📊 辩论模式对比 (按问题类别)")
+    for name, summary in report["classes"].items():
+        print(
+            f"- {name}: 加速 {summary['speedup']}x | 决议重合度 {summary['verdict_overlap']}"
+            f" (基线 {summary['baseline_verdict_overlap']}) → 推荐 {summary['recommended_mode']}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
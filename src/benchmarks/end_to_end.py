@@ -0,0 +1,419 @@
+# benchmarks/end_to_end.py
+"""
+端到端性能基准：导入 → 检索 → 史官 → 整场会议。
+
+默认使用离线的确定性后端 (ECHO_BOARD_LLM_BACKEND=fake / ECHO_BOARD_EMBED_BACKEND=hash)，
+不需要 OpenAI 兼容服务和 Ollama，同样的参数每次生成完全相同的数据和回答，结果可以逐次对比。
+
+对每个库规模 (笔记数)：
+1. 生成合成的 Obsidian 库：中英文混合，按日期标题 (# 2023-10-25 工作复盘) 组织，分布在年 / 月子目录里
+2. ingest_folder 全量导入的吞吐 (files/s, chunks/s)，以及没有任何修改时再同步一次的耗时 (增量扫描)
+3. KnowledgeBase.search 的延迟分布 (p50 / p95 / p99)，问题里一部分带日期 (走时间索引)
+4. Archivist.consult 的延迟 (关闭报告缓存)
+5. BoardOrchestrator 整场会议的延迟和各节点耗时的中位数 (关闭会议缓存，不写 Mem0)
+结果写成 JSON；传入 --baseline 时和上一次的结果逐项对比，变慢超过 --tolerance 的指标视为回归 (退出码 1)。
+
+用法:
+    python -m src.benchmarks.end_to_end --sizes 1000,10000 --output bench.json
+    python -m src.benchmarks.end_to_end --sizes 1000 --baseline bench.json --tolerance 0.2
+    python -m src.benchmarks.end_to_end --llm-latency 0.3 --llm-tps 50   # 模拟真实 LLM 的速度
+所有数据 (库、向量库、各种 SQLite) 都放在 --workdir 里，默认是一个用完即删的临时目录。
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+SCHEMA_VERSION = 1
+
+# (中文主题, 英文主题, 中文句子, 英文句子)：每篇笔记从中选主题，检索的问题也从这里生成
+TOPICS = [
+    ("工作复盘", "Work Review",
+     ["今天项目进度有些滞后，主要卡在接口联调。", "和同事讨论了架构选型，决定先做最小可用版本。", "写完了数据导入模块，效率不错。"],
+     ["The project is behind schedule because of integration issues.", "We agreed to ship a minimal version first.", "Finished the import module today."]),
+    ("心情日记", "Mood Journal",
+     ["昨晚失眠了，一直在想房贷的事情。", "感觉收入结构太单一，抗风险能力差。", "今天心情不错，去公园散了步。"],
+     ["Could not sleep last night, worried about the mortgage.", "Feeling anxious about having a single income source.", "Good mood today after a walk in the park."]),
+    ("财务", "Finance",
+     ["买了新的机械键盘，花了 1200 元。", "这个月餐饮支出超了预算。", "开始每月定投指数基金。"],
+     ["Bought a new mechanical keyboard for 1200.", "Dining expenses exceeded the monthly budget.", "Started a monthly index fund investment plan."]),
+    ("健身", "Fitness",
+     ["跑了五公里，配速比上周快。", "膝盖有点疼，休息了一天。", "开始尝试力量训练。"],
+     ["Ran five kilometers, faster than last week.", "Knee hurts a bit, took a rest day.", "Started strength training."]),
+    ("学习", "Learning",
+     ["读完了一本关于分布式系统的书。", "学习 Rust 的所有权机制，有点难。", "整理了 Go 语言并发模型的笔记。"],
+     ["Finished a book on distributed systems.", "Learning Rust ownership is hard.", "Wrote notes on the Go concurrency model."]),
+    ("家庭", "Family",
+     ["陪父母吃了晚饭，聊了很多。", "周末带孩子去了科技馆。", "和伴侣讨论了明年的旅行计划。"],
+     ["Had dinner with my parents and talked a lot.", "Took the kids to the science museum.", "Planned next year's trip with my partner."]),
+]
+SECTIONS_ZH = ["进度", "想法", "反思", "记录"]
+SECTIONS_EN = ["Progress", "Thoughts", "Reflection", "Notes"]
+START_DATE = date(2020, 1, 1)
+
+
+# ==========================================
+# 合成数据
+# ==========================================
+
+def _note_date(index: int) -> date:
+    # 每天大约 3 篇笔记，100k 篇覆盖约 90 年的日期也不会重复到失真
+    return START_DATE + timedelta(days=index // 3)
+
+
+def generate_vault(root: str, notes: int, seed: int = 42, english_ratio: float = 0.5) -> List[Dict]:
+    """
+    生成 notes 篇笔记 (同样的 seed → 完全相同的库)
+    :return: 每篇笔记的 {date, topic, lang}，用于生成检索问题
+    """
+    rng = random.Random(seed)
+    catalog = []
+    for i in range(notes):
+        day = _note_date(i)
+        topic_zh, topic_en, sentences_zh, sentences_en = rng.choice(TOPICS)
+        english = rng.random() < english_ratio
+        title, sections, sentences = (
+            (topic_en, SECTIONS_EN, sentences_en) if english else (topic_zh, SECTIONS_ZH, sentences_zh)
+        )
+        lines = [f"# {day.isoformat()} {title}"]
+        for section in rng.sample(sections, rng.randint(1, 3)):
+            lines.append(f"## {section}")
+            lines.extend(rng.choice(sentences) for _ in range(rng.randint(2, 5)))
+        folder = os.path.join(root, f"{day.year}", f"{day.month:02d}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{day.isoformat()}-{i}.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        catalog.append({"date": day.isoformat(), "topic": topic_en if english else topic_zh, "lang": "en" if english else "zh"})
+    return catalog
+
+
+def generate_queries(catalog: List[Dict], count: int, seed: int = 7) -> List[str]:
+    """检索问题：主题类 (中英文) + 带具体日期的问题 (走时间索引)，比例约 3:1"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        note = rng.choice(catalog)
+        kind = rng.random()
+        if kind < 0.25:
+            queries.append(f"{note['date']} 我做了什么？" if note["lang"] == "zh" else f"What did I do on {note['date']}?")
+        elif note["lang"] == "zh":
+            queries.append(rng.choice([f"我最近在{note['topic']}方面的状态怎么样？", f"帮我总结一下{note['topic']}相关的记录"]))
+        else:
+            queries.append(rng.choice([f"How is my {note['topic'].lower()} going?", f"Summarize my notes about {note['topic'].lower()}"]))
+    return queries
+
+
+# ==========================================
+# 统计
+# ==========================================
+
+def percentile(values: Sequence[float], p: float) -> Optional[float]:
+    """最近秩法的百分位数 (样本少时不插值，p99 就是最慢的那几次之一)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def latency_summary(values: Sequence[float]) -> Dict:
+    """延迟分布 (毫秒)"""
+    ms = [value * 1000 for value in values]
+    return {
+        "count": len(ms),
+        "mean_ms": round(statistics.mean(ms), 3) if ms else None,
+        "p50_ms": round(percentile(ms, 50), 3) if ms else None,
+        "p95_ms": round(percentile(ms, 95), 3) if ms else None,
+        "p99_ms": round(percentile(ms, 99), 3) if ms else None,
+        "max_ms": round(max(ms), 3) if ms else None,
+    }
+
+
+# ==========================================
+# 各项测量
+# ==========================================
+
+def bench_ingest(engine, vault: str, sync_mode: str) -> Dict:
+    from src.infrastructure.ingestion_scheduler import IngestionBudget
+
+    started = time.perf_counter()
+    # 测量全量导入的吞吐：显式不限预算
+    stats = engine.ingest_folder(vault, budget=IngestionBudget.no_limits(), sync_mode=sync_mode)
+    elapsed = time.perf_counter() - started
+    # 没有任何修改时再同步一次：只剩扫描 + 哈希比对的开销
+    started = time.perf_counter()
+    rescan = engine.ingest_folder(vault, budget=IngestionBudget.no_limits(), sync_mode=sync_mode)
+    rescan_elapsed = time.perf_counter() - started
+    return {
+        "files": stats["total_files"],
+        "chunks": stats["chunks"],
+        "failed": stats["failed"],
+        "seconds": round(elapsed, 3),
+        "files_per_sec": round(stats["total_files"] / elapsed, 2) if elapsed > 0 else None,
+        "chunks_per_sec": round(stats["chunks"] / elapsed, 2) if elapsed > 0 else None,
+        "rescan_seconds": round(rescan_elapsed, 3),
+        "rescan_unchanged": rescan["unchanged"],
+    }
+
+
+def bench_search(kb, queries: List[str], k: int, warmup: int = 5) -> Dict:
+    from src.infrastructure.date_resolver import resolve_date_range
+
+    for query in queries[:warmup]:
+        kb.search(query, k=k, date_range=resolve_date_range(query))
+    latencies, dated = [], 0
+    for query in queries:
+        started = time.perf_counter()
+        date_range = resolve_date_range(query)
+        kb.search(query, k=k, date_range=date_range)
+        latencies.append(time.perf_counter() - started)
+        dated += date_range is not None
+    return {"k": k, "dated_queries": dated, **latency_summary(latencies)}
+
+
+def bench_consult(archivist, queries: List[str], warmup: int = 1) -> Dict:
+    # 预热：第一次调用会加载分词器、建立连接等
+    for query in queries[:warmup]:
+        archivist.consult(query, use_cache=False)
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        archivist.consult(query, use_cache=False)
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies)
+
+
+async def bench_meetings(orchestrator, queries: List[str], warmup: int = 1) -> Dict:
+    for query in queries[:warmup]:
+        await orchestrator.run_meeting(query)
+    latencies, first_tokens = [], []
+    nodes: Dict[str, List[float]] = defaultdict(list)
+    for query in queries:
+        started = time.perf_counter()
+        first_token = None
+        async for event in orchestrator.astream_meeting(query):
+            if event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter() - started
+            elif event["type"] == "node_end" and event.get("duration") is not None:
+                nodes[event["node"]].append(event["duration"])
+        latencies.append(time.perf_counter() - started)
+        if first_token is not None:
+            first_tokens.append(first_token)
+    return {
+        **latency_summary(latencies),
+        "first_token_p50_ms": round(percentile(first_tokens, 50) * 1000, 3) if first_tokens else None,
+        "node_p50_ms": {node: round(percentile(values, 50) * 1000, 3) for node, values in sorted(nodes.items())},
+    }
+
+
+def run_size(notes: int, workdir: str, args) -> Dict:
+    from src.agents.archivist import Archivist
+    from src.agents.orchestrator import BoardOrchestrator
+    from src.infrastructure.obsidian_loader import MemoryIngestionEngine
+    from src.infrastructure.vector_store import KnowledgeBase
+
+    vault = os.path.join(workdir, f"vault_{notes}")
+    print(f"\n📝 生成 {notes} 篇笔记的合成库...")
+    started = time.perf_counter()
+    catalog = generate_vault(vault, notes, seed=args.seed)
+    generate_seconds = time.perf_counter() - started
+
+    kb = KnowledgeBase(persist_dir=os.path.join(workdir, f"chroma_{notes}"), reset_db=True)
+    engine = MemoryIngestionEngine(knowledge_base=kb)
+    print("📥 导入...")
+    ingest = bench_ingest(engine, vault, args.sync_mode)
+    print(f"   {ingest['files_per_sec']} files/s | {ingest['chunks_per_sec']} chunks/s | 增量重扫 {ingest['rescan_seconds']}s")
+
+    print("🔍 检索...")
+    search = bench_search(kb, generate_queries(catalog, args.search_queries, seed=args.seed), k=args.k)
+    print(f"   p50 {search['p50_ms']}ms | p99 {search['p99_ms']}ms")
+
+    print("🕵️ 史官...")
+    consult = bench_consult(Archivist(kb), generate_queries(catalog, args.consult_queries, seed=args.seed + 1))
+    print(f"   p50 {consult['p50_ms']}ms | p99 {consult['p99_ms']}ms")
+
+    print("🏛️ 整场会议...")
+    orchestrator = BoardOrchestrator(
+        vector_store=kb,
+        remember_verdicts=False,
+        checkpoint_path=os.path.join(workdir, f"checkpoints_{notes}.sqlite"),
+        meeting_cache=False,
+        coalesce=False,
+        report_cache=False,
+    )
+    meeting = asyncio.run(bench_meetings(orchestrator, generate_queries(catalog, args.meetings, seed=args.seed + 2)))
+    print(f"   p50 {meeting['p50_ms']}ms | p99 {meeting['p99_ms']}ms")
+
+    return {
+        "notes": notes,
+        "generate_seconds": round(generate_seconds, 3),
+        "ingest": ingest,
+        "search": search,
+        "consult": consult,
+        "meeting": meeting,
+    }
+
+
+# ==========================================
+# 和基线对比
+# ==========================================
+
+# (路径, 越大越好?, 噪声下限)：参与回归判断的指标；绝对变化小于噪声下限时不算回归 (毫秒级的指标抖动很大)
+COMPARED_METRICS = [
+    (("ingest", "files_per_sec"), True, 0.0),
+    (("ingest", "chunks_per_sec"), True, 0.0),
+    (("ingest", "rescan_seconds"), False, 0.05),
+    (("search", "p50_ms"), False, 1.0),
+    (("search", "p99_ms"), False, 1.0),
+    (("consult", "p50_ms"), False, 1.0),
+    (("consult", "p99_ms"), False, 1.0),
+    (("meeting", "p50_ms"), False, 5.0),
+    (("meeting", "p99_ms"), False, 5.0),
+]
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    按库规模逐项对比，返回每个指标的变化；regression=True 表示比基线差了超过 tolerance (相对值)
+    """
+    baseline_runs = {run["notes"]: run for run in baseline.get("runs", [])}
+    rows = []
+    for run in report["runs"]:
+        base = baseline_runs.get(run["notes"])
+        if base is None:
+            continue
+        for (section, metric), higher_is_better, noise_floor in COMPARED_METRICS:
+            current, previous = run.get(section, {}).get(metric), base.get(section, {}).get(metric)
+            if not current or not previous:
+                continue
+            change = (current - previous) / previous
+            worse = -change if higher_is_better else change
+            rows.append({
+                "notes": run["notes"],
+                "metric": f"{section}.{metric}",
+                "baseline": previous,
+                "current": current,
+                "change": round(change, 4),
+                "regression": worse > tolerance and abs(current - previous) > noise_floor,
+            })
+    return rows
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入 / 检索 / 史官 / 整场会议的端到端性能基准")
+    parser.add_argument("--sizes", default="1000", help="逗号分隔的库规模 (笔记数)，例如 1000,10000,100000")
+    parser.add_argument("--search-queries", type=int, default=200, help="检索测量的问题数")
+    parser.add_argument("--consult-queries", type=int, default=20, help="史官测量的问题数")
+    parser.add_argument("--meetings", type=int, default=5, help="整场会议测量的问题数")
+    parser.add_argument("--k", type=int, default=5, help="检索返回的条数")
+    parser.add_argument("--sync-mode", default="vector_only", choices=("vector_only", "full"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="脚本化 LLM 的首 token 延迟 (秒)")
+    parser.add_argument("--llm-tps", type=float, default=0.0, help="脚本化 LLM 的输出速率 (tokens/s)，0 表示瞬间输出")
+    parser.add_argument("--real-backends", action="store_true", help="使用环境变量里配置的真实 LLM / Embedding 服务")
+    parser.add_argument("--workdir", help="数据目录 (默认临时目录，结束后删除)")
+    parser.add_argument("--keep", action="store_true", help="保留数据目录")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--baseline", help="上一次的结果 JSON，用于对比回归")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="变慢超过这个比例视为回归")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    # 后端在模块导入时读取环境变量：必须在导入 src 的模块之前设置
+    if not args.real_backends:
+        os.environ["ECHO_BOARD_LLM_BACKEND"] = "fake"
+        os.environ["ECHO_BOARD_EMBED_BACKEND"] = "hash"
+        os.environ["FAKE_LLM_LATENCY"] = str(args.llm_latency)
+        os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = str(args.llm_tps)
+    os.environ.setdefault("MEM0_TELEMETRY", "False")
+
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="echo-board-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    # 各种默认的相对路径 (./data/...、./mem0/...) 都落在数据目录里，不碰真实数据
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from src.infrastructure.embedding_cache import EMBED_BACKEND
+        from src.infrastructure.llm_registry import get_llm_registry
+
+        # 每个文件一条 INFO 日志会严重拖慢大库的导入，只保留警告
+        logging.getLogger().setLevel(logging.WARNING)
+        report = {
+            "schema_version": SCHEMA_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "environment": {
+                "git_commit": _git_commit(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "llm_backend": get_llm_registry().backend,
+                "embed_backend": EMBED_BACKEND,
+                "llm_latency": args.llm_latency,
+                "llm_tps": args.llm_tps,
+            },
+            "parameters": {
+                "sizes": sizes,
+                "search_queries": args.search_queries,
+                "consult_queries": args.consult_queries,
+                "meetings": args.meetings,
+                "k": args.k,
+                "sync_mode": args.sync_mode,
+                "seed": args.seed,
+            },
+            "runs": [run_size(notes, workdir, args) for notes in sizes],
+        }
+    finally:
+        os.chdir(previous_cwd)
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    regressions = []
+    if baseline is not None:
+        report["comparison"] = compare(report, baseline, args.tolerance)
+        regressions = [row for row in report["comparison"] if row["regression"]]
+        print(f"\n📊 和基线对比 (容忍 {args.tolerance:.0%})")
+        for row in report["comparison"]:
+            icon = "❌" if row["regression"] else "✅"
+            print(f"{icon} [{row['notes']}] {row['metric']}: {row['baseline']} → {row['current']} ({row['change']:+.1%})")
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 结果已写入 {output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
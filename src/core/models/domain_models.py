@@ -1,10 +1,14 @@
 # core/domain_models.py
+import hashlib
 import uuid
 from typing import Dict, Any, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 from langchain_core.documents import Document
 
+# 内容寻址 ID 的命名空间 (固定值，修改它会让所有已入库的 chunk ID 失效)
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c9a52-3d4e-4b8a-9f27-5e0c8d1b2a74")
+
 class LifeEvent(BaseModel):
     """
     领域模型：代表发生过的任何事实（日记、账单、提交记录）。
@@ -20,6 +24,16 @@ class LifeEvent(BaseModel):
         # 允许从 attributes 初始化
         from_attributes = True
 
+    @staticmethod
+    def content_id(source_file: str, header_path: str, content: str) -> str:
+        """
+        [内容寻址]: 由 (来源文件, 标题路径, 文本哈希) 推导出确定性的 ID
+        同一个 chunk 无论导入多少次都得到同一个 ID，向量库 upsert 即可保持幂等。
+        source_file 要能区分不同的库 (用绝对路径)，否则两个库里相同的笔记会共用 chunk，删一边会连带删掉另一边。
+        """
+        text_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{source_file}\x1f{header_path}\x1f{text_hash}"))
+
     def to_langchain_document(self) -> Document:
         """
         [Adapter]: 将领域模型转换为 LangChain 能够理解的 Document 对象
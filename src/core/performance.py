@@ -32,6 +32,9 @@ class PerformanceMetrics:
     num_context_docs: int = 0
     errors: List[str] = field(default_factory=list)
 
+    # Nodes that missed their deadline and were replaced by a placeholder
+    degradations: Dict[str, str] = field(default_factory=dict)
+
     def complete(self) -> None:
         """Mark session as complete and calculate total time."""
         self.end_time = time.time()
@@ -45,6 +48,10 @@ class PerformanceMetrics:
         """Add an error to the metrics."""
         self.errors.append(error)
 
+    def add_degradation(self, node: str, reason: str) -> None:
+        """Record a degraded (timed out) node."""
+        self.degradations[node] = reason
+
     def to_dict(self) -> Dict:
         """Convert metrics to dictionary."""
         return {
@@ -57,6 +64,7 @@ class PerformanceMetrics:
             "database_time": self.database_time,
             "num_context_docs": self.num_context_docs,
             "errors": self.errors,
+            "degradations": self.degradations,
         }
 
 
@@ -108,6 +116,7 @@ class PerformanceMonitor:
         logger.info(
             f"Session {session_id} completed in {metrics.total_time:.2f}s. "
             f"Agents: {metrics.agent_timings}"
+            + (f" Degraded: {metrics.degradations}" if metrics.degradations else "")
         )
 
         # Move to completed sessions
@@ -164,6 +173,18 @@ class PerformanceMonitor:
             self.current_metrics[session_id].add_error(error)
             logger.error(f"Error in session {session_id}: {error}")
 
+    def record_degradation(self, session_id: str, node: str, reason: str) -> None:
+        """Record a node that was cancelled and replaced by a placeholder.
+
+        Args:
+            session_id: Session identifier
+            node: Graph node name
+            reason: Why the node was degraded (e.g. deadline exceeded)
+        """
+        if session_id in self.current_metrics:
+            self.current_metrics[session_id].add_degradation(node, reason)
+            logger.warning(f"Node {node} degraded in session {session_id}: {reason}")
+
     def get_session_metrics(self, session_id: str) -> Optional[PerformanceMetrics]:
         """Get metrics for a specific session.
 
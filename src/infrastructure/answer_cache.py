@@ -0,0 +1,189 @@
+# infrastructure/answer_cache.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+
+
+def chunk_set_key(chunk_ids: Iterable[str]) -> str:
+    """检索结果的指纹：与顺序无关的 chunk id 集合哈希"""
+    return hashlib.sha256("\n".join(sorted(set(chunk_ids))).encode("utf-8")).hexdigest()
+
+
+class SemanticAnswerCache:
+    """
+    语义答案缓存：(命名空间, 检索到的 chunk id 集合, 查询向量相似度) → 之前生成的报告。
+
+    命中条件：
+    1. 命名空间相同 (Prompt 版本 / 时间范围等会影响答案的上下文)
+    2. 这次检索到的 chunk 集合和当时完全一样 (证据没变)
+    3. 查询向量的余弦相似度 ≥ similarity_threshold (问的是同一件事)
+
+    任何一个 chunk 被重新导入 (内容变化 → 旧 ID 被删除) 时，包含它的缓存条目会被清掉；
+    即使错过了删除通知 (例如另一个进程在导入)，chunk 集合不一致也不会命中。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        max_entries: int = 1000,
+    ):
+        self.db_path = db_path
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                namespace TEXT NOT NULL,
+                chunk_key TEXT NOT NULL,
+                query TEXT NOT NULL,
+                query_vector BLOB NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_hit_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_lookup ON entries (namespace, chunk_key);
+            CREATE TABLE IF NOT EXISTS entry_chunks (
+                entry_id INTEGER NOT NULL REFERENCES entries (entry_id) ON DELETE CASCADE,
+                chunk_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_entry_chunks_chunk ON entry_chunks (chunk_id);
+            CREATE INDEX IF NOT EXISTS idx_entry_chunks_entry ON entry_chunks (entry_id);
+            """
+        )
+        self._conn.commit()
+
+    def lookup(self, namespace: str, query_vector: List[float], chunk_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        :return: 命中时返回缓存的 payload (附带 cached_query / similarity)，否则 None
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry_id, query, query_vector, payload FROM entries WHERE namespace = ? AND chunk_key = ?",
+                (namespace, chunk_set_key(chunk_ids)),
+            ).fetchall()
+        if not rows:
+            return None
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query_norm = np.linalg.norm(query) or 1.0
+        best = None
+        for entry_id, cached_query, blob, payload in rows:
+            cached = np.frombuffer(blob, dtype=np.float32)
+            if cached.shape != query.shape:
+                continue
+            similarity = float(cached @ query / ((np.linalg.norm(cached) or 1.0) * query_norm))
+            if similarity >= self.similarity_threshold and (best is None or similarity > best[0]):
+                best = (similarity, entry_id, cached_query, payload)
+        if best is None:
+            return None
+
+        similarity, entry_id, cached_query, payload = best
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET hits = hits + 1, last_hit_at = ? WHERE entry_id = ?", (time.time(), entry_id)
+            )
+            self._conn.commit()
+        result = json.loads(payload)
+        result.update({"cached_query": cached_query, "similarity": round(similarity, 4)})
+        return result
+
+    def store(
+        self,
+        namespace: str,
+        query: str,
+        query_vector: List[float],
+        chunk_ids: List[str],
+        payload: Dict[str, Any],
+    ):
+        """
+        :param payload: 需要缓存的结果 (必须可以 JSON 序列化)
+        """
+        now = time.time()
+        unique_ids = sorted(set(chunk_ids))
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                INSERT INTO entries (namespace, chunk_key, query, query_vector, payload, created_at, last_hit_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    namespace,
+                    chunk_set_key(unique_ids),
+                    query,
+                    array("f", query_vector).tobytes(),
+                    json.dumps(payload, ensure_ascii=False),
+                    now,
+                    now,
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO entry_chunks (entry_id, chunk_id) VALUES (?, ?)",
+                [(cursor.lastrowid, chunk_id) for chunk_id in unique_ids],
+            )
+            # 超出容量时淘汰最久没被用到的条目
+            self._conn.execute(
+                """
+                DELETE FROM entries WHERE entry_id IN (
+                    SELECT entry_id FROM entries ORDER BY last_hit_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def invalidate_chunks(self, chunk_ids: List[str]) -> int:
+        """chunk 被删除 / 重新导入：清掉所有引用它的缓存条目"""
+        if not chunk_ids:
+            return 0
+        removed = 0
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                removed += self._conn.execute(
+                    f"""
+                    DELETE FROM entries WHERE entry_id IN (
+                        SELECT DISTINCT entry_id FROM entry_chunks WHERE chunk_id IN ({placeholders})
+                    )
+                    """,
+                    batch,
+                ).rowcount
+            self._conn.commit()
+        if removed:
+            logger.info(f"🧹 [AnswerCache] {removed} 条缓存的报告因证据更新而失效")
+        return removed
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,248 @@
+# infrastructure/context_budget.py
+import logging
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.infrastructure.lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# 计数用的 tiktoken 编码 (离线 / 没装 tiktoken 时退化为按字符估算)
+TOKENIZER_ENCODING = os.getenv("CONTEXT_TOKENIZER", "cl100k_base")
+
+# 董事会成员 Prompt 里各段上下文的 token 预算，可用 CONTEXT_BUDGET_<SECTION> 单独覆盖
+SECTION_BUDGET_DEFAULTS = {
+    "context": 1500,             # 史官的报告
+    "user_profile": 400,         # Mem0 用户画像
+    "financial_report": 800,     # CFO 的财务背景
+    "strategist_opinion": 1200,  # 战略官的观点 (教练 / 决议者读)
+    "coach_opinion": 1200,       # 教练的观点 (决议者读)
+    "draft": 1200,               # 平行辩论时教练的草稿
+}
+SECTION_BUDGETS = {
+    section: int(os.getenv(f"CONTEXT_BUDGET_{section.upper()}", default))
+    for section, default in SECTION_BUDGET_DEFAULTS.items()
+}
+# 去掉重复行的段落：检索证据和画像里重叠的 chunk / 记忆。成员的观点和财务报告原样保留
+# (Markdown 的分隔线、表格线、重复的 "- 风险:" 条目都是有意义的重复)
+DEDUPED_SECTIONS = ("context", "user_profile")
+# 单次成员调用的上下文总预算 (不含问题本身和 System Prompt)
+MAX_CONTEXT_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+# 史官交给 LLM 的原始证据预算，以及按相关度排名保留全文的条数 (其余的压缩成关键句)
+EVIDENCE_BUDGET = int(os.getenv("CONTEXT_BUDGET_EVIDENCE", "3000"))
+EVIDENCE_FULL_RECORDS = int(os.getenv("CONTEXT_FULL_RECORDS", "3"))
+# 压缩时每条低排名证据最多保留的句子数
+COMPRESSED_SENTENCES = 2
+
+_SENTENCE_RE = re.compile(r"[^。！？!?；;\n]+(?:[。！？!?；;]+|$)|\n")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+_SPACE_RE = re.compile(r"\s+")
+TRUNCATED_MARK = "…"
+
+
+@lru_cache(maxsize=1)
+def _get_encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        logger.warning(f"⚠️ [ContextBudget] tiktoken 不可用，改用按字符估算 token 数: {e}")
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    """
+    文本的 token 数。编码器只加载一次，同一段文本 (例如每场会议都会出现的证据块) 只计算一次
+    """
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    # 估算：中日韩每字约 1 个 token，其余约 4 个字符 1 个 token
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def split_sentences(text: str) -> List[str]:
+    """按中英文句末标点和换行切句 (保留标点，换行单独成一项)"""
+    return [s for s in _SENTENCE_RE.findall(text) if s.strip() or s == "\n"]
+
+
+def _normalize(sentence: str) -> str:
+    return _SPACE_RE.sub("", sentence).casefold()
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """保留开头不超过 budget 个 token 的部分，尽量在句子边界截断"""
+    if budget <= 0:
+        return ""
+    if count_tokens(text) <= budget:
+        return text
+    budget -= count_tokens(TRUNCATED_MARK)
+    kept, used = [], 0
+    for sentence in split_sentences(text):
+        cost = count_tokens(sentence)
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return "".join(kept).rstrip() + TRUNCATED_MARK
+    # 第一句就超出预算：硬截断
+    encoder = _get_encoder()
+    if encoder is not None:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:max(budget, 0)]) + TRUNCATED_MARK
+    ratio = max(budget, 0) / count_tokens(text)
+    return text[:int(len(text) * ratio)] + TRUNCATED_MARK
+
+
+def compress_text(text: str, budget: int, query: str = "", max_sentences: Optional[int] = None) -> str:
+    """
+    超出预算时按句压缩：有 query 时优先保留和问题用词重合最多的句子，否则保留开头；
+    输出保持原文顺序。max_sentences 限制保留的句子数 (用于把低排名证据压成关键句)
+    """
+    sentences = [s for s in split_sentences(text) if s.strip()]
+    if not sentences:
+        return ""
+    if count_tokens(text) <= budget and (max_sentences is None or len(sentences) <= max_sentences):
+        return text
+    query_terms = set(tokenize(query))
+    if query_terms:
+        scores = [len(query_terms & set(tokenize(s))) for s in sentences]
+        order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+    else:
+        order = list(range(len(sentences)))
+
+    chosen, used = [], 0
+    for i in order:
+        if max_sentences is not None and len(chosen) >= max_sentences:
+            break
+        cost = count_tokens(sentences[i])
+        if used + cost > budget:
+            continue
+        chosen.append(i)
+        used += cost
+    if not chosen:
+        return truncate_to_tokens(sentences[order[0]], budget)
+    return " ".join(sentences[i].strip() for i in sorted(chosen))
+
+
+def dedupe_lines(text: str) -> str:
+    """去掉段落内完全重复的行 (忽略空白)，例如 Mem0 返回的重复记忆"""
+    seen, kept = set(), []
+    for line in text.split("\n"):
+        key = _normalize(line)
+        if key and key in seen:
+            continue
+        if key:
+            seen.add(key)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def pack_evidence(
+    records: Sequence[Tuple[str, str]],
+    query: str = "",
+    budget: int = EVIDENCE_BUDGET,
+    full_records: int = EVIDENCE_FULL_RECORDS,
+) -> List[Tuple[str, str]]:
+    """
+    按相关度排好序的证据 (header, content) → 装入 token 预算：
+    1. 去重：切块时相邻 chunk 有重叠，前面已经出现过的句子不再重复；整条都重复的证据只保留出处
+    2. 排名前 full_records 条保留全文，其余压缩成和问题最相关的几句
+    3. 按排名依次装入，放不下的先尝试压缩，仍放不下就停止 (排名更低的证据价值更小)
+    :return: 装入的 (header, content) 列表，顺序和排名一致
+    """
+    seen: Dict[str, str] = {}  # 句子 → 第一次出现在哪条证据
+    packed, used = [], 0
+    for rank, (header, content) in enumerate(records):
+        sentences = [s for s in split_sentences(content) if s.strip()]
+        fresh = [s for s in sentences if _normalize(s) not in seen]
+        header_cost = count_tokens(header) + 2
+        remaining = budget - used - header_cost
+        if remaining <= 0:
+            break
+        if not fresh:
+            if sentences:
+                # 不同日期的完全相同的记录：只保留出处 (重复出现本身也是信息)
+                text = f"(内容同 {seen[_normalize(sentences[0])]})"
+                packed.append((header, text))
+                used += header_cost + count_tokens(text)
+            continue
+        for sentence in fresh:
+            seen.setdefault(_normalize(sentence), header)
+        text = " ".join(s.strip() for s in fresh)
+
+        if rank >= full_records:
+            text = compress_text(text, remaining, query, max_sentences=COMPRESSED_SENTENCES)
+        elif count_tokens(text) > remaining:
+            text = compress_text(text, remaining, query)
+        if not text:
+            break
+        packed.append((header, text))
+        used += header_cost + count_tokens(text)
+
+    if len(packed) < len(records):
+        logger.info(f"✂️ [ContextBudget] 证据 {len(records)} 条 → {len(packed)} 条 ({used} tokens)")
+    return packed
+
+
+class ContextBudget:
+    """
+    Prompt 上下文的分段 token 预算。
+
+    每段 (史官报告 / 用户画像 / 财务报告 / 其他成员的观点) 有自己的预算，
+    没用完的预算按比例分给超出的段落，总量不超过 max_tokens；超出的段落按和问题的相关度压缩。
+    只有 dedupe_sections 里的段落 (证据 / 画像) 会去掉重复行。
+    不在预算表里的字段 (例如 query) 原样保留。
+    """
+
+    def __init__(
+        self,
+        section_budgets: Optional[Dict[str, int]] = None,
+        max_tokens: int = MAX_CONTEXT_TOKENS,
+        dedupe_sections: Sequence[str] = DEDUPED_SECTIONS,
+    ):
+        self.section_budgets = dict(section_budgets or SECTION_BUDGETS)
+        self.max_tokens = max_tokens
+        self.dedupe_sections = frozenset(dedupe_sections)
+
+    def allocate(self, counts: Dict[str, int]) -> Dict[str, int]:
+        """各段最终可用的 token 数"""
+        budgets = {name: self.section_budgets[name] for name in counts}
+        allowance = min(self.max_tokens, sum(budgets.values())) if self.max_tokens > 0 else sum(budgets.values())
+        # 先按预算缩放到总额以内，再把没用完的部分分给超出的段落
+        scale = allowance / sum(budgets.values()) if sum(budgets.values()) else 0
+        budgets = {name: int(budget * scale) for name, budget in budgets.items()}
+        allotted = {name: min(counts[name], budgets[name]) for name in counts}
+        spare = allowance - sum(allotted.values())
+        over = {name: budgets[name] for name in counts if counts[name] > budgets[name]}
+        if spare > 0 and over:
+            total = sum(over.values()) or 1
+            for name, budget in over.items():
+                allotted[name] = min(counts[name], allotted[name] + int(spare * budget / total))
+        return allotted
+
+    def fit(self, inputs: Dict[str, Any], query: Optional[str] = None) -> Dict[str, Any]:
+        """返回一份各段都在预算内的 inputs 副本"""
+        query = inputs.get("query", "") if query is None else query
+        fitted = dict(inputs)
+        counts = {}
+        for name in self.section_budgets:
+            value = inputs.get(name)
+            if isinstance(value, str) and value:
+                if name in self.dedupe_sections:
+                    fitted[name] = dedupe_lines(value)
+                counts[name] = count_tokens(fitted[name])
+        if not counts:
+            return fitted
+        for name, allotted in self.allocate(counts).items():
+            if counts[name] > allotted:
+                fitted[name] = compress_text(fitted[name], allotted, query)
+                logger.info(f"✂️ [ContextBudget] {name}: {counts[name]} → {count_tokens(fitted[name])} tokens")
+        return fitted
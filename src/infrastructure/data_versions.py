@@ -0,0 +1,82 @@
+# infrastructure/data_versions.py
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# 会议结果依赖的数据源的版本号 (单调递增)：知识库、Mem0 用户画像、账本
+# 存在 SQLite 里，导入脚本和 UI 在不同进程里也能看到彼此的写入
+DEFAULT_VERSIONS_PATH = os.getenv("DATA_VERSIONS_PATH", "./data/data_versions.sqlite")
+
+# 账本 (Firefly III) 的版本名：本系统每次记账后 +1
+LEDGER = "ledger"
+
+
+class DataVersions:
+    """数据源名 → 版本号。写入数据的一方调用 bump，依赖数据的缓存把版本号放进缓存键里"""
+
+    def __init__(self, db_path: str = DEFAULT_VERSIONS_PATH):
+        self.db_path = db_path
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM versions WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def snapshot(self, names: Iterable[str]) -> Dict[str, int]:
+        """一次读出多个数据源的版本号 (版本向量)"""
+        names = list(names)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT name, version FROM versions WHERE name IN ({','.join('?' * len(names))})", names
+            ).fetchall()
+        found = dict(rows)
+        return {name: found.get(name, 0) for name in names}
+
+    def bump(self, name: str) -> int:
+        """数据源发生了变化：版本号 +1，返回新的版本号"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO versions (name, version, updated_at) VALUES (?, 1, ?)
+                ON CONFLICT(name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at
+                """,
+                (name, time.time()),
+            )
+            self._conn.commit()
+            row = self._conn.execute("SELECT version FROM versions WHERE name = ?", (name,)).fetchone()
+        return row[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 进程级单例：KnowledgeBase / UserProfileService / BoardOrchestrator 共用
+_shared_versions: Optional[DataVersions] = None
+_shared_lock = threading.Lock()
+
+
+def get_data_versions() -> DataVersions:
+    global _shared_versions
+    with _shared_lock:
+        if _shared_versions is None:
+            _shared_versions = DataVersions()
+        return _shared_versions
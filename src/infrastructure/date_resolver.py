@@ -0,0 +1,217 @@
+# infrastructure/date_resolver.py
+import calendar
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+# 注意：这个模块会被切分进程池 import (markdown_splitter)，只能依赖标准库
+
+
+@dataclass(frozen=True)
+class DateRange:
+    """闭区间 [start, end]，expression 是查询中被识别出的原文"""
+    start: date
+    end: date
+    expression: str = ""
+
+    @property
+    def start_key(self) -> int:
+        return to_date_key(self.start)
+
+    @property
+    def end_key(self) -> int:
+        return to_date_key(self.end)
+
+    def __str__(self) -> str:
+        if self.start == self.end:
+            return self.start.isoformat()
+        return f"{self.start.isoformat()} ~ {self.end.isoformat()}"
+
+
+def to_date_key(value: date) -> int:
+    """date → yyyymmdd 整数 (可以直接比较大小，也能存进 Chroma metadata)"""
+    return value.year * 10000 + value.month * 100 + value.day
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _month_range(year: int, month: int) -> Optional[DateRange]:
+    if not 1 <= month <= 12:
+        return None
+    return DateRange(date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1]))
+
+
+# ----------------------------------------------------------------------
+# 写入侧：从笔记标题 / 文件名中解析日期
+# ----------------------------------------------------------------------
+_NOTE_DATE_RE = re.compile(r"(?<!\d)(\d{4})\s*[-/._年]\s*(\d{1,2})\s*[-/._月]\s*(\d{1,2})(?!\d)")
+_COMPACT_DATE_RE = re.compile(r"(?<!\d)(\d{4})(\d{2})(\d{2})(?!\d)")
+
+
+def parse_note_date(text: str) -> Optional[date]:
+    """从 "2023-10-25 财务" / "2023年10月25日" / "20231025.md" 这样的标题或文件名中取日期"""
+    if not text:
+        return None
+    for pattern in (_NOTE_DATE_RE, _COMPACT_DATE_RE):
+        match = pattern.search(text)
+        if match:
+            parsed = _safe_date(*(int(group) for group in match.groups()))
+            if parsed:
+                return parsed
+    return None
+
+
+def event_date_key(metadata: Dict[str, Any]) -> Optional[int]:
+    """
+    chunk 的日期 (yyyymmdd)：优先用一级标题 (Date/Title)，其次是文件名 (日记通常以日期命名)
+    """
+    if isinstance(metadata.get("date"), int):
+        return metadata["date"]
+    parsed = parse_note_date(str(metadata.get("Date/Title", "")))
+    if parsed is None:
+        parsed = parse_note_date(os.path.basename(str(metadata.get("source_file", ""))))
+    return to_date_key(parsed) if parsed else None
+
+
+# ----------------------------------------------------------------------
+# 查询侧：把"昨天 / 上周 / 2023-10-18"解析成日期区间
+# ----------------------------------------------------------------------
+_CN_DIGITS = {"零": 0, "一": 1, "两": 2, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_CN_NUMBER = r"[\d零一两二三四五六七八九十]+"
+
+
+def _parse_number(text: str) -> Optional[int]:
+    if text.isdigit():
+        return int(text)
+    if "十" in text:
+        tens, _, ones = text.partition("十")
+        return (_CN_DIGITS.get(tens, 1) if tens else 1) * 10 + (_CN_DIGITS.get(ones, 0) if ones else 0)
+    if len(text) == 1 and text in _CN_DIGITS:
+        return _CN_DIGITS[text]
+    return None
+
+
+def _week_range(today: date, weeks_ago: int) -> DateRange:
+    monday = today - timedelta(days=today.weekday()) - timedelta(weeks=weeks_ago)
+    end = monday + timedelta(days=6)
+    return DateRange(monday, min(end, today) if weeks_ago == 0 else end)
+
+
+def _months_ago(today: date, months: int) -> Optional[DateRange]:
+    year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+    month_range = _month_range(year, month + 1)
+    if month_range and months == 0:
+        return DateRange(month_range.start, today)
+    return month_range
+
+
+def _relative_days(today: date, days_ago: int) -> DateRange:
+    day = today - timedelta(days=days_ago)
+    return DateRange(day, day)
+
+
+# (正则, 解析函数(match, today) → DateRange)；按顺序匹配，长的表达式放在前面
+_RELATIVE_PATTERNS = [
+    (r"大前天", lambda m, t: _relative_days(t, 3)),
+    (r"前天|day before yesterday", lambda m, t: _relative_days(t, 2)),
+    (r"昨天|昨日|昨晚|yesterday", lambda m, t: _relative_days(t, 1)),
+    (r"今天|今日|今晚|today|tonight", lambda m, t: _relative_days(t, 0)),
+    (r"上上(?:周|个?星期|个?礼拜)", lambda m, t: _week_range(t, 2)),
+    (r"上(?:周|个?星期|个?礼拜)|last week", lambda m, t: _week_range(t, 1)),
+    (r"(?:本|这)(?:周|个?星期|个?礼拜)|this week", lambda m, t: _week_range(t, 0)),
+    (r"上上个?月", lambda m, t: _months_ago(t, 2)),
+    (r"上个?月|last month", lambda m, t: _months_ago(t, 1)),
+    (r"(?:本|这个?)月|this month", lambda m, t: _months_ago(t, 0)),
+    (r"去年|last year", lambda m, t: DateRange(date(t.year - 1, 1, 1), date(t.year - 1, 12, 31))),
+    (r"今年|this year", lambda m, t: DateRange(date(t.year, 1, 1), t)),
+    (
+        rf"(?:最近|过去|近)\s*({_CN_NUMBER})\s*(?:天|日)|(?:last|past)\s+(\d+)\s+days?",
+        lambda m, t: _recent_days(t, m.group(1) or m.group(2)),
+    ),
+    (
+        rf"(?:最近|过去|近)\s*({_CN_NUMBER})?\s*个?(?:周|星期|礼拜)",
+        lambda m, t: _recent_days(t, str((_parse_number(m.group(1)) if m.group(1) else 1) * 7)),
+    ),
+    (
+        rf"(?:最近|过去|近)\s*({_CN_NUMBER})?\s*个月",
+        lambda m, t: _recent_days(t, str((_parse_number(m.group(1)) if m.group(1) else 1) * 30)),
+    ),
+]
+_RELATIVE_PATTERNS = [(re.compile(pattern, re.IGNORECASE), resolve) for pattern, resolve in _RELATIVE_PATTERNS]
+
+
+def _recent_days(today: date, count_text: str) -> Optional[DateRange]:
+    count = _parse_number(count_text)
+    if not count:
+        return None
+    return DateRange(today - timedelta(days=count - 1), today)
+
+
+_FULL_DATE_RE = re.compile(r"(?<!\d)(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})\s*[日号]?(?!\d)")
+_YEAR_MONTH_RE = re.compile(r"(?<!\d)(\d{4})\s*(?:-|/|年)\s*(\d{1,2})\s*月?(?![\d\-/.])")
+_MONTH_DAY_RE = re.compile(r"(?<![\d年])(\d{1,2})\s*月\s*(\d{1,2})\s*[日号]")
+
+
+def _explicit_ranges(query: str, today: date) -> List[DateRange]:
+    ranges: List[DateRange] = []
+    consumed = query
+
+    for match in _FULL_DATE_RE.finditer(query):
+        day = _safe_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        if day:
+            ranges.append(DateRange(day, day, match.group(0)))
+            consumed = consumed.replace(match.group(0), " ")
+
+    for match in _MONTH_DAY_RE.finditer(consumed):
+        day = _safe_date(today.year, int(match.group(1)), int(match.group(2)))
+        if day and day > today:
+            # 没写年份的未来日期，指的是去年
+            day = _safe_date(today.year - 1, day.month, day.day)
+        if day:
+            ranges.append(DateRange(day, day, match.group(0)))
+            consumed = consumed.replace(match.group(0), " ")
+
+    for match in _YEAR_MONTH_RE.finditer(consumed):
+        month_range = _month_range(int(match.group(1)), int(match.group(2)))
+        if month_range:
+            ranges.append(DateRange(month_range.start, month_range.end, match.group(0)))
+
+    return ranges
+
+
+def resolve_date_range(query: str, today: Optional[date] = None) -> Optional[DateRange]:
+    """
+    识别查询中的时间表达，返回对应的日期区间 (闭区间)；没有时间表达时返回 None。
+    - 相对时间：今天 / 昨天 / 前天 / 本周 / 上周 / 上个月 / 最近 7 天 / 去年 (也支持常见英文)
+    - 绝对时间：2023-10-18 / 2023年10月18日 / 10月18日 / 2023-10
+    多个时间表达 (例如"10月1日到10月7日") 取覆盖它们的最小区间。
+    """
+    if not query:
+        return None
+    today = today or date.today()
+
+    ranges = _explicit_ranges(query, today)
+    remaining = query
+    for pattern, resolve in _RELATIVE_PATTERNS:
+        match = pattern.search(remaining)
+        if match:
+            resolved = resolve(match, today)
+            if resolved:
+                ranges.append(DateRange(resolved.start, resolved.end, match.group(0)))
+            # 已识别的部分不再参与后续匹配 ("大前天"里的"前天"、"上上周"里的"上周")
+            remaining = remaining.replace(match.group(0), " ")
+
+    if not ranges:
+        return None
+    return DateRange(
+        start=min(r.start for r in ranges),
+        end=max(r.end for r in ranges),
+        expression=" / ".join(r.expression for r in ranges),
+    )
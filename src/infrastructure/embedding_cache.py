@@ -0,0 +1,169 @@
+# infrastructure/embedding_cache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_ollama import OllamaEmbeddings
+
+from src.infrastructure.hash_embeddings import HASH_EMBED_DIM, HashEmbeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBED_MODEL = "nomic-embed-text:latest"
+DEFAULT_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.sqlite")
+# ollama = 本地 Ollama 服务；hash = 离线的确定性哈希 Embedding (基准测试 / 离线演练用)
+EMBED_BACKEND = os.getenv("ECHO_BOARD_EMBED_BACKEND", "ollama")
+# 单次 Ollama 请求的超时 (秒)，0 表示不限。
+# 董事会节点超时只能取消协程，线程里卡住的 Embedding 请求要靠这个超时释放
+EMBED_TIMEOUT = float(os.getenv("EMBED_TIMEOUT", "30"))
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    本地 SQLite 向量缓存：(模型名, 文本哈希) → 向量 (float32)
+
+    放在向量库目录之外，reset_db=True 清空 Chroma 时缓存依然保留，
+    重建向量库时见过的文本不需要再调用 Ollama。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, text_hashes: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        # SQLite 默认最多 999 个绑定参数，分批查询
+        for start in range(0, len(text_hashes), 500):
+            batch = text_hashes[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+            for text_hash, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[text_hash] = vector.tolist()
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        if not vectors:
+            return
+        rows = [
+            (model, text_hash, array("f", vector).tobytes())
+            for text_hash, vector in vectors.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def count(self, model: Optional[str] = None) -> int:
+        with self._lock:
+            if model is None:
+                return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)
+            ).fetchone()[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    套在真实 Embedding 模型外面的缓存层。
+    命中缓存的文本直接返回；未命中的去重后按 batch_size 批量请求底层模型。
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache, batch_size: int = 256):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = batch_size
+        # 统计信息 (调试 / 基准测试用)
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        hashes = [_text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model_name, list(dict.fromkeys(hashes)))
+
+        # 未命中的文本去重后再请求
+        missing: Dict[str, str] = {}
+        for text, text_hash in zip(texts, hashes):
+            if text_hash not in vectors and text_hash not in missing:
+                missing[text_hash] = text
+
+        self.hits += len(texts) - sum(1 for h in hashes if h in missing)
+        self.misses += len(missing)
+
+        if missing:
+            missing_items = list(missing.items())
+            for start in range(0, len(missing_items), self.batch_size):
+                batch = missing_items[start:start + self.batch_size]
+                embedded = self.embeddings.embed_documents([text for _, text in batch])
+                new_vectors = {text_hash: vector for (text_hash, _), vector in zip(batch, embedded)}
+                self.cache.put_many(self.model_name, new_vectors)
+                vectors.update(new_vectors)
+            logger.info(
+                f"🧮 [EmbeddingCache] {self.model_name}: 命中 {len(texts) - len(missing)} / 请求 {len(missing)}"
+            )
+
+        return [vectors[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+# 进程级单例：KnowledgeBase 和 UserProfileService 共用同一个缓存实例
+_shared_embeddings: Dict[str, CachedEmbeddings] = {}
+_shared_lock = threading.Lock()
+
+
+def get_embeddings(model: str = DEFAULT_EMBED_MODEL, cache_path: str = DEFAULT_CACHE_PATH) -> CachedEmbeddings:
+    """
+    获取共享的 (带缓存的) Embedding 模型
+    ECHO_BOARD_EMBED_BACKEND=hash 时换成哈希 Embedding (缓存里按 hash-<维度> 单独存放，不会和真实模型的向量混用)
+    """
+    if EMBED_BACKEND == "hash":
+        model = f"hash-{HASH_EMBED_DIM}"
+    key = f"{model}@{cache_path}"
+    with _shared_lock:
+        if key not in _shared_embeddings:
+            _shared_embeddings[key] = CachedEmbeddings(
+                embeddings=HashEmbeddings() if EMBED_BACKEND == "hash" else OllamaEmbeddings(
+                    model=model, client_kwargs={"timeout": EMBED_TIMEOUT or None}
+                ),
+                model_name=model,
+                cache=EmbeddingCache(cache_path),
+            )
+        return _shared_embeddings[key]
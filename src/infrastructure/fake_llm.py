@@ -0,0 +1,208 @@
+# infrastructure/fake_llm.py
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from src.infrastructure.context_budget import count_tokens
+
+# 离线的脚本化 LLM (ECHO_BOARD_LLM_BACKEND=fake)：不需要任何服务，输出只取决于 (角色, Prompt)，
+# 用于基准测试 / 离线演练整张会议图。延迟和吞吐按下面的参数模拟
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))                  # 首 token 延迟 (秒)
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0"))  # 0 表示瞬间输出
+FAKE_LLM_RESPONSE_TOKENS = int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", "120"))  # 自动生成的回答长度
+# 脚本文件 (JSON)：{角色: "固定回答" | [{"match": "正则", "response": "..."}, ...]}，"default" 对所有角色生效
+FAKE_LLM_SCRIPT = os.getenv("FAKE_LLM_SCRIPT", "")
+
+# 需要结构化输出的角色的默认回答 (其余角色按 Prompt 的哈希生成一段确定的文本)
+ROLE_RESPONSES = {
+    "router": '{"intent": "board_advisory", "reasoning": "scripted router"}',
+    "mem0": '{"facts": []}',
+}
+
+_PHRASES = (
+    "从长期目标来看", "投入产出比", "需要控制风险", "先把精力放在最重要的事情上", "情绪需要被看见",
+    "保持可持续的节奏", "数据显示", "建议分阶段推进", "每周复盘一次", "预算要留出余量",
+    "睡眠是一切的基础", "拒绝不必要的会议", "把大目标拆成小步骤", "这件事值得做", "可以再观察一周",
+    "the evidence suggests", "focus on leverage", "protect your energy", "measure the outcome",
+)
+_TOKEN_RE = re.compile(r"[\u3400-\u9fff]|[^\u3400-\u9fff\s]+\s*|\s+")
+
+
+@lru_cache(maxsize=4)
+def _load_script(path: str) -> Dict[str, Any]:
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def split_tokens(text: str) -> List[str]:
+    """模拟流式输出的切分：中文按字，其余按词 (带上后面的空白)"""
+    return _TOKEN_RE.findall(text)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    确定性的脚本化 Chat 模型：同样的 (角色, Prompt) 永远得到同样的回答。
+    回答优先取脚本里匹配的条目，其次是角色的默认回答，最后按 Prompt 的哈希从短语表里生成。
+    模拟首 token 延迟和输出速率，并像真实服务一样报告 token 用量 (按 count_tokens 计)。
+    """
+
+    role: str = "default"
+    model_name: str = "scripted"
+    script: Dict[str, Any] = {}
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    response_tokens: int = 120
+
+    @classmethod
+    def from_env(cls, role: str = "default", model_name: Optional[str] = None) -> "ScriptedChatModel":
+        return cls(
+            role=role,
+            model_name=model_name or "scripted",
+            script=_load_script(FAKE_LLM_SCRIPT),
+            latency=FAKE_LLM_LATENCY,
+            tokens_per_second=FAKE_LLM_TOKENS_PER_SECOND,
+            response_tokens=FAKE_LLM_RESPONSE_TOKENS,
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "role": self.role}
+
+    def bind_tools(self, tools, **kwargs):
+        # 脚本化模型从不发起工具调用，Agent 拿到的总是最终回答
+        return self
+
+    @staticmethod
+    def _prompt_text(messages: List[BaseMessage]) -> str:
+        return "\n".join(
+            message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+            for message in messages
+        )
+
+    def respond(self, prompt: str) -> str:
+        for key in (self.role, "default"):
+            entry = self.script.get(key)
+            if isinstance(entry, str):
+                return entry
+            for rule in entry or []:
+                if re.search(rule.get("match", ""), prompt):
+                    return rule["response"]
+        if self.role in ROLE_RESPONSES:
+            return ROLE_RESPONSES[self.role]
+        return self._generate_text(prompt)
+
+    def _generate_text(self, prompt: str) -> str:
+        seed = hashlib.sha256(f"{self.role}\n{prompt}".encode("utf-8")).digest()
+        rng = random.Random(seed)
+        parts, used = [], 0
+        while used < self.response_tokens:
+            phrase = rng.choice(_PHRASES)
+            parts.append(phrase)
+            used += count_tokens(phrase) + 1
+        return f"[{self.role}] " + "，".join(parts) + "。"
+
+    def _usage(self, prompt: str, text: str) -> UsageMetadata:
+        input_tokens, output_tokens = count_tokens(prompt), count_tokens(text)
+        return UsageMetadata(
+            input_tokens=input_tokens, output_tokens=output_tokens, total_tokens=input_tokens + output_tokens
+        )
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _result(self, prompt: str, text: str) -> ChatResult:
+        message = AIMessage(
+            content=text,
+            usage_metadata=self._usage(prompt, text),
+            response_metadata={"model_name": self.model_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _final_chunk(self, prompt: str, text: str) -> ChatGenerationChunk:
+        return ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            usage_metadata=self._usage(prompt, text),
+            response_metadata={"model_name": self.model_name},
+        ))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = self._prompt_text(messages)
+        text = self.respond(prompt)
+        time.sleep(self.latency + len(split_tokens(text)) * self._token_delay())
+        return self._result(prompt, text)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        prompt = self._prompt_text(messages)
+        text = self.respond(prompt)
+        await asyncio.sleep(self.latency + len(split_tokens(text)) * self._token_delay())
+        return self._result(prompt, text)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        prompt = self._prompt_text(messages)
+        text = self.respond(prompt)
+        time.sleep(self.latency)
+        delay = self._token_delay()
+        for token in split_tokens(text):
+            if delay:
+                time.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield self._final_chunk(prompt, text)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        prompt = self._prompt_text(messages)
+        text = self.respond(prompt)
+        await asyncio.sleep(self.latency)
+        delay = self._token_delay()
+        for token in split_tokens(text):
+            if delay:
+                await asyncio.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield self._final_chunk(prompt, text)
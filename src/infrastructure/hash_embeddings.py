@@ -0,0 +1,43 @@
+# infrastructure/hash_embeddings.py
+import hashlib
+import math
+import os
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from src.infrastructure.lexical_index import tokenize
+
+# 离线的哈希 Embedding (ECHO_BOARD_EMBED_BACKEND=hash) 的维度
+HASH_EMBED_DIM = int(os.getenv("HASH_EMBED_DIM", "256"))
+
+
+class HashEmbeddings(Embeddings):
+    """
+    确定性的特征哈希 Embedding：不需要任何模型服务，同一段文本在任何机器上都得到同样的向量。
+
+    分词和关键词索引一致 (中文二元组 + 英文单词)，每个词哈希到一个维度并带上正负号，
+    最后做 L2 归一化。用词重合越多的文本余弦相似度越高，检索结果有意义 (只是没有语义泛化)。
+    """
+
+    def __init__(self, dim: int = HASH_EMBED_DIM):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for token in tokenize(text):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += 1.0 if (value >> 63) & 1 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector))
+        if norm == 0:
+            # 没有可用的词 (空文本 / 纯标点)：给一个固定的单位向量，避免零向量让余弦相似度无意义
+            vector[0] = 1.0
+            return vector
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -0,0 +1,325 @@
+# infrastructure/ingestion_journal.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 单个文件的阶段推进：writing → indexed → profiled
+STAGE_WRITING = "writing"      # 预写：即将写入向量库 (崩溃后停在这里的文件先补齐侧索引，再重新导入)
+STAGE_INDEXED = "indexed"      # 向量 + 清单已提交，等待画像提取
+STAGE_PROFILED = "profiled"    # 全部阶段完成 (vector_only 模式下直接到这里)
+
+# 冷启动时至少处理这么多文件后，才用本次运行的实测速度估算剩余时间
+_MIN_SAMPLES_FOR_LIVE_ETA = 5
+
+
+class JournalRun:
+    """一次同步运行 (ingest_folder / sync_paths) 在日志中的句柄，交给导入流水线使用"""
+
+    def __init__(
+        self,
+        journal: "IngestionJournal",
+        run_id: int,
+        folder: str,
+        total_files: int,
+        extract_profile: bool,
+        historical_cost: Optional[float],
+    ):
+        self.journal = journal
+        self.run_id = run_id
+        self.folder = folder
+        self.total_files = total_files
+        self.extract_profile = extract_profile
+        # 历史运行实测的"每个文件平均耗时" (秒)，本次样本不足时用它估算
+        self.historical_cost = historical_cost
+        self.started_at = time.time()
+
+    def log_intent(self, files: List[Tuple[str, str]]):
+        """写入向量库之前先落盘 (path, content_hash)"""
+        self.journal._set_stage(self.run_id, self.folder, files, STAGE_WRITING)
+
+    def mark_indexed(self, files: List[Tuple[str, str]]):
+        """向量 + 清单提交成功"""
+        stage = STAGE_INDEXED if self.extract_profile else STAGE_PROFILED
+        self.journal._set_stage(self.run_id, self.folder, files, stage)
+
+    def set_workload(self, total_files: int):
+        """
+        mtime / size 没变的文件在进入流水线之前就被跳过：只有剩下的文件计入进度和 ETA，
+        计时也从这里重新开始 (每个文件的平均耗时只反映真正需要导入的文件)
+        """
+        self.total_files = total_files
+        self.started_at = time.time()
+        self.journal._set_run_workload(self.run_id, total_files, self.started_at)
+
+    def eta(self, processed: int) -> Optional[float]:
+        """
+        估算剩余时间 (秒)
+        :param processed: 本次运行需要导入的文件中已经处理完 (含失败 / 推迟) 的文件数
+        """
+        remaining = max(self.total_files - processed, 0)
+        elapsed = time.time() - self.started_at
+        if processed >= _MIN_SAMPLES_FOR_LIVE_ETA and elapsed > 0:
+            cost = elapsed / processed
+        elif self.historical_cost is not None:
+            cost = self.historical_cost
+        else:
+            return None
+        return remaining * cost
+
+
+class IngestionJournal:
+    """
+    导入预写日志 (write-ahead journal)：记录每次同步运行和每个文件走到了哪个阶段。
+
+    - 向量写入是幂等的 (chunk ID 由内容推导 + 清单只在提交后更新)，中断后重跑只会处理
+      没提交的文件，不会重复写 chunk
+    - 停在 writing 阶段的文件可能已经写进 Chroma、但还没进关键词 / 时间索引
+      (重跑时这些 chunk 会被当作已存在而跳过)：下一次同步开始前按 Chroma 补齐侧索引
+    - 画像提取在后台队列里，进程退出就丢了；日志里停在 indexed 阶段的文件
+      会在下一次同步时重新提交给画像队列
+    - 每次运行的耗时 / 文件数被保存下来，用于估算 ETA
+    - 预算用尽被推迟的文件记在待导入队列 (backlog) 里，下次同步优先处理
+    - 文件按 (同步目录, 相对路径) 记录：两个库里相同的相对路径互不影响
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+        legacy_files = bool(columns) and "folder" not in columns
+        if legacy_files:
+            # 旧版的 files 表只按相对路径记录：改名保留，建好新表后按 run_id 补上目录再迁移
+            self._conn.executescript(
+                "DROP INDEX IF EXISTS idx_files_stage; ALTER TABLE files RENAME TO files_legacy;"
+            )
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                folder TEXT NOT NULL,
+                sync_mode TEXT NOT NULL,
+                total_files INTEGER NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                status TEXT NOT NULL,
+                processed_files INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                folder TEXT NOT NULL,
+                path TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                run_id INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (folder, path)
+            );
+            CREATE INDEX IF NOT EXISTS idx_files_stage ON files (stage);
+            CREATE TABLE IF NOT EXISTS backlog (
+                folder TEXT NOT NULL,
+                path TEXT NOT NULL,
+                deferred_at REAL NOT NULL,
+                PRIMARY KEY (folder, path)
+            );
+            """
+        )
+        if legacy_files:
+            self._conn.executescript(
+                """
+                INSERT OR REPLACE INTO files (folder, path, content_hash, stage, run_id, updated_at)
+                SELECT runs.folder, f.path, f.content_hash, f.stage, f.run_id, f.updated_at
+                FROM files_legacy AS f JOIN runs USING (run_id) ORDER BY f.updated_at;
+                DROP TABLE files_legacy;
+                """
+            )
+        self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # 运行级别
+    # ------------------------------------------------------------------
+    def begin_run(self, folder: str, sync_mode: str, total_files: int) -> JournalRun:
+        """开始一次同步；如果同一目录上一次同步没有正常结束，记录为中断并汇报断点"""
+        folder = os.path.abspath(folder)
+        now = time.time()
+        with self._lock:
+            interrupted = self._conn.execute(
+                "SELECT run_id, total_files FROM runs WHERE folder = ? AND status = 'running'",
+                (folder,),
+            ).fetchall()
+            for run_id, total in interrupted:
+                committed = self._conn.execute(
+                    "SELECT COUNT(*) FROM files WHERE run_id = ? AND stage != ?",
+                    (run_id, STAGE_WRITING),
+                ).fetchone()[0]
+                logger.warning(
+                    f"♻️ [Journal] 上次同步 (#{run_id}) 在 {committed}/{total} 个文件处中断，"
+                    f"已提交的文件不会重复导入"
+                )
+            self._conn.execute(
+                "UPDATE runs SET status = 'interrupted' WHERE folder = ? AND status = 'running'",
+                (folder,),
+            )
+            cursor = self._conn.execute(
+                "INSERT INTO runs (folder, sync_mode, total_files, started_at, status) VALUES (?, ?, ?, ?, 'running')",
+                (folder, sync_mode, total_files, now),
+            )
+            self._conn.commit()
+            run_id = cursor.lastrowid
+
+        return JournalRun(
+            self,
+            run_id=run_id,
+            folder=folder,
+            total_files=total_files,
+            extract_profile=sync_mode == "full",
+            historical_cost=self.historical_cost(),
+        )
+
+    def _set_run_workload(self, run_id: int, total_files: int, started_at: float):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET total_files = ?, started_at = ? WHERE run_id = ?",
+                (total_files, started_at, run_id),
+            )
+            self._conn.commit()
+
+    def finish_run(self, run: JournalRun, processed_files: int, status: str = "completed"):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET finished_at = ?, status = ?, processed_files = ? WHERE run_id = ?",
+                (time.time(), status, processed_files, run.run_id),
+            )
+            self._conn.commit()
+
+    def historical_cost(self, last_runs: int = 10) -> Optional[float]:
+        """最近几次正常完成的运行里，平均每个文件的耗时 (秒)"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT SUM(finished_at - started_at), SUM(processed_files) FROM (
+                    SELECT started_at, finished_at, processed_files FROM runs
+                    WHERE status = 'completed' AND processed_files > 0
+                    ORDER BY run_id DESC LIMIT ?
+                )
+                """,
+                (last_runs,),
+            ).fetchone()
+        if not row or not row[1]:
+            return None
+        return row[0] / row[1]
+
+    # ------------------------------------------------------------------
+    # 文件级别
+    # ------------------------------------------------------------------
+    def _set_stage(self, run_id: int, folder: str, files: List[Tuple[str, str]], stage: str):
+        if not files:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO files (folder, path, content_hash, stage, run_id, updated_at) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(folder, path) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    stage = excluded.stage,
+                    run_id = excluded.run_id,
+                    updated_at = excluded.updated_at
+                """,
+                [(folder, path, content_hash, stage, run_id, now) for path, content_hash in files],
+            )
+            self._conn.commit()
+
+    def mark_profiled(self, files: List[Tuple[str, str]]):
+        """
+        画像提取完成；文件在此期间又被修改 (哈希不同) 的记录保持不动。
+        不区分目录：画像按内容哈希去重，同样的 (路径, 内容) 在哪个库里都已经提取过了
+        """
+        if not files:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE files SET stage = ?, updated_at = ? WHERE path = ? AND content_hash = ? AND stage = ?",
+                [(STAGE_PROFILED, time.time(), path, content_hash, STAGE_INDEXED) for path, content_hash in files],
+            )
+            self._conn.commit()
+
+    def pending_profiles(self, folder: str) -> Dict[str, str]:
+        """folder 下已经写入向量库、但画像提取还没完成的文件: path → content_hash"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, content_hash FROM files WHERE folder = ? AND stage = ?",
+                (os.path.abspath(folder), STAGE_INDEXED),
+            ).fetchall()
+        return dict(rows)
+
+    def interrupted_writes(self, folder: str, exclude_run_id: Optional[int] = None) -> Dict[str, str]:
+        """
+        folder 下之前的运行里停在 writing 阶段的文件 (写入过程中崩溃 / 提交失败): path → content_hash
+        :param exclude_run_id: 排除当前这次运行
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, content_hash FROM files WHERE folder = ? AND stage = ? AND run_id != ?",
+                (os.path.abspath(folder), STAGE_WRITING, -1 if exclude_run_id is None else exclude_run_id),
+            ).fetchall()
+        return dict(rows)
+
+    def resolve_writes(self, folder: str, files: List[Tuple[str, str]]):
+        """侧索引已经补齐：推进到 indexed (画像提取当时也没完成，交给画像队列重新排队)"""
+        if not files:
+            return
+        folder = os.path.abspath(folder)
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE files SET stage = ?, updated_at = ? WHERE folder = ? AND path = ? AND content_hash = ? AND stage = ?",
+                [(STAGE_INDEXED, now, folder, path, content_hash, STAGE_WRITING) for path, content_hash in files],
+            )
+            self._conn.commit()
+
+    def forget(self, folder: str, path: str):
+        """笔记被删除时清理它在 folder 下的日志记录"""
+        folder = os.path.abspath(folder)
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE folder = ? AND path = ?", (folder, path))
+            self._conn.execute("DELETE FROM backlog WHERE folder = ? AND path = ?", (folder, path))
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # 待导入队列 (预算用尽时推迟的文件)
+    # ------------------------------------------------------------------
+    def backlog(self, folder: str) -> Dict[str, float]:
+        """path → 第一次被推迟的时间"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, deferred_at FROM backlog WHERE folder = ?", (os.path.abspath(folder),)
+            ).fetchall()
+        return dict(rows)
+
+    def update_backlog(self, folder: str, deferred: List[str], finished: List[str]):
+        """本次被推迟的文件加入队列 (保留最早的推迟时间)，已经处理完的移出队列"""
+        folder = os.path.abspath(folder)
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO backlog (folder, path, deferred_at) VALUES (?, ?, ?)",
+                [(folder, path, now) for path in deferred],
+            )
+            self._conn.executemany(
+                "DELETE FROM backlog WHERE folder = ? AND path = ?",
+                [(folder, path) for path in finished],
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,192 @@
+# infrastructure/ingestion_manifest.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+def compute_content_hash(content: str) -> str:
+    """计算文件内容的哈希 (用于判断文件是否真的被修改)"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def manifest_key(path: str) -> str:
+    """清单的键：文件的绝对路径 (不同的库 / 子目录之间不会互相覆盖)"""
+    return os.path.abspath(path)
+
+
+def _folder_prefix(folder: str) -> str:
+    return os.path.join(manifest_key(folder), "")
+
+
+@dataclass
+class ManifestEntry:
+    """清单中的一条记录：某个笔记文件上一次被导入时的状态"""
+    path: str  # 绝对路径
+    content_hash: str
+    mtime_ns: int
+    size: int
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+class IngestionManifest:
+    """
+    持久化的导入清单 (绝对路径 → 内容哈希, mtime, size, chunk ids)。
+    按绝对路径记录：同一个向量库可以先后同步多个库或某个子目录，互不影响。
+
+    增量同步的依据：
+    - mtime + size 没变 → 直接跳过，连文件都不读
+    - 内容哈希没变 → 只刷新 mtime，不重新 Embedding
+    - 内容变了 → 重新切分/Embedding，并删除旧的 chunk
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        # 同步按钮 / 后台线程都可能访问，统一用一把锁保护连接
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                chunk_ids TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, path: str) -> Optional[ManifestEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, content_hash, mtime_ns, size, chunk_ids FROM files WHERE path = ?",
+                (manifest_key(path),),
+            ).fetchone()
+        if row is None:
+            return None
+        return ManifestEntry(
+            path=row[0],
+            content_hash=row[1],
+            mtime_ns=row[2],
+            size=row[3],
+            chunk_ids=json.loads(row[4]),
+        )
+
+    def all_entries(self) -> Dict[str, ManifestEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, content_hash, mtime_ns, size, chunk_ids FROM files"
+            ).fetchall()
+        return self._to_entries(rows)
+
+    def entries_under(self, folder: str) -> Dict[str, ManifestEntry]:
+        """某个目录 (含子目录) 下的记录：绝对路径 → 记录"""
+        prefix = _folder_prefix(folder)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, content_hash, mtime_ns, size, chunk_ids FROM files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            ).fetchall()
+        return self._to_entries(rows)
+
+    def adopt_relative(self, folder: str) -> int:
+        """
+        旧版本的清单按相对路径记录：在 folder 下能找到对应文件的记录改成绝对路径
+        (找不到的可能属于别的库，保持不动)
+        :return: 迁移的记录数
+        """
+        with self._lock:
+            relative = [
+                row[0] for row in self._conn.execute("SELECT path FROM files").fetchall()
+                if not os.path.isabs(row[0])
+            ]
+            adopted = 0
+            for path in relative:
+                absolute = manifest_key(os.path.join(folder, path))
+                if not os.path.isfile(absolute):
+                    continue
+                self._conn.execute("DELETE FROM files WHERE path = ?", (absolute,))
+                self._conn.execute("UPDATE files SET path = ? WHERE path = ?", (absolute, path))
+                adopted += 1
+            if adopted:
+                self._conn.commit()
+        return adopted
+
+    @staticmethod
+    def _to_entries(rows) -> Dict[str, ManifestEntry]:
+        return {
+            row[0]: ManifestEntry(
+                path=row[0],
+                content_hash=row[1],
+                mtime_ns=row[2],
+                size=row[3],
+                chunk_ids=json.loads(row[4]),
+            )
+            for row in rows
+        }
+
+    def record(self, path: str, content_hash: str, mtime_ns: int, size: int, chunk_ids: List[str]):
+        """文件导入成功后写入 (或覆盖) 清单记录"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO files (path, content_hash, mtime_ns, size, chunk_ids)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    mtime_ns = excluded.mtime_ns,
+                    size = excluded.size,
+                    chunk_ids = excluded.chunk_ids
+                """,
+                (manifest_key(path), content_hash, mtime_ns, size, json.dumps(chunk_ids)),
+            )
+            self._conn.commit()
+
+    def record_many(self, entries: List[ManifestEntry]):
+        """批量写入 (导入流水线的写入阶段一次事务提交一批文件)"""
+        if not entries:
+            return
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO files (path, content_hash, mtime_ns, size, chunk_ids)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    mtime_ns = excluded.mtime_ns,
+                    size = excluded.size,
+                    chunk_ids = excluded.chunk_ids
+                """,
+                [
+                    (manifest_key(entry.path), entry.content_hash, entry.mtime_ns, entry.size, json.dumps(entry.chunk_ids))
+                    for entry in entries
+                ],
+            )
+            self._conn.commit()
+
+    def touch(self, path: str, mtime_ns: int, size: int):
+        """内容没变但 mtime 变了 (例如编辑器只是保存了一下)：只刷新文件状态"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                (mtime_ns, size, manifest_key(path)),
+            )
+            self._conn.commit()
+
+    def remove(self, path: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (manifest_key(path),))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,468 @@
+# infrastructure/ingestion_pipeline.py
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from src.core.models.domain_models import LifeEvent
+from src.infrastructure.ingestion_journal import JournalRun
+from src.infrastructure.ingestion_manifest import IngestionManifest, ManifestEntry, compute_content_hash, manifest_key
+from src.infrastructure.ingestion_scheduler import BudgetTracker
+from src.infrastructure.markdown_splitter import split_into_events
+from src.infrastructure.vector_store import KnowledgeBase
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_STOP = object()
+
+
+@dataclass
+class FileWorkItem:
+    """流水线中流转的单个文件"""
+    path: str
+    relative_path: str
+    content: str
+    content_hash: str
+    mtime_ns: int
+    size: int
+    previous_chunk_ids: List[str] = field(default_factory=list)
+    is_new: bool = True
+    events: List[LifeEvent] = field(default_factory=list)      # 切分出的全部 chunk
+    new_events: List[LifeEvent] = field(default_factory=list)  # 库里还没有、需要 Embedding 的 chunk
+    vectors: List[List[float]] = field(default_factory=list)   # new_events 对应的向量
+
+
+@dataclass
+class PipelineStats:
+    total_files: int = 0
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    deferred: int = 0          # 超出预算，留到下次同步
+    chunks: int = 0            # 写入文件的 chunk 总数
+    embedded_chunks: int = 0   # 真正新写入向量库的 chunk 数
+    bytes: int = 0
+    elapsed: float = 0.0
+    eta_seconds: Optional[float] = None  # 剩余时间估算 (需要 journal_run)
+
+    @property
+    def processed(self) -> int:
+        return self.added + self.updated + self.unchanged + self.failed + self.deferred
+
+    @property
+    def files_per_sec(self) -> float:
+        done = self.added + self.updated + self.unchanged
+        return done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["files_per_sec"] = round(self.files_per_sec, 2)
+        data["chunks_per_sec"] = round(self.chunks_per_sec, 2)
+        return data
+
+
+def unchanged_by_stat(manifest: IngestionManifest, path: str) -> bool:
+    """mtime + size 和清单一致 (只 stat，不读文件)"""
+    entry = manifest.get(path)
+    if entry is None:
+        return False
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size
+
+
+def check_file(manifest: IngestionManifest, path: str, relative_path: str) -> Optional[FileWorkItem]:
+    """
+    对照导入清单检查文件
+    :return: None 表示文件没有变化 (可以跳过)；否则返回需要重新导入的 FileWorkItem
+    """
+    stat = os.stat(path)
+    entry: Optional[ManifestEntry] = manifest.get(path)
+
+    # 1. mtime + size 都没变：连文件都不用读
+    if entry and entry.mtime_ns == stat.st_mtime_ns and entry.size == stat.st_size:
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    content_hash = compute_content_hash(content)
+
+    # 2. 只是被"摸"了一下 (内容哈希相同)：刷新清单，不重新 Embedding
+    if entry and entry.content_hash == content_hash:
+        manifest.touch(path, stat.st_mtime_ns, stat.st_size)
+        return None
+
+    return FileWorkItem(
+        path=path,
+        relative_path=relative_path,
+        content=content,
+        content_hash=content_hash,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        previous_chunk_ids=entry.chunk_ids if entry else [],
+        is_new=entry is None,
+    )
+
+
+class IngestionPipeline:
+    """
+    多阶段并行导入流水线：
+
+        读取线程池 → 切分 (进程池) → 批量 Embedding → 单写入线程 (大事务提交 Chroma)
+
+    阶段之间用有界队列连接，下游慢时上游自动阻塞 (背压)，内存占用可控。
+    """
+
+    def __init__(
+        self,
+        kb: KnowledgeBase,
+        manifest: IngestionManifest,
+        on_file_committed: Optional[Callable[[FileWorkItem], None]] = None,
+        on_progress: Optional[Callable[[str, str, PipelineStats], None]] = None,
+        reader_workers: int = 4,
+        split_workers: Optional[int] = None,
+        embed_workers: int = 2,
+        embed_batch_size: int = 256,
+        write_batch_size: int = 1024,
+        queue_size: int = 64,
+        budget: Optional[BudgetTracker] = None,
+        process_pool_threshold: int = 64,
+        journal_run: Optional[JournalRun] = None,
+    ):
+        """
+        :param on_file_committed: 文件写入向量库后的回调 (在写入线程中调用)
+        :param on_progress: 进度回调 (relative_path, status, stats)，可能在任意线程中调用
+        :param split_workers: 切分进程数，默认 CPU 核数 - 1 (给主进程留一个核)；
+                              0 表示不启动进程池，直接在线程里切分 (单核机器上的默认行为)
+        :param embed_workers: 同时发往 Embedding 服务的批次数
+        :param budget: 预算 (Embedding token / LLM 调用 / 墙钟时间)，超出的文件留到下次 (None 表示不限)
+        :param process_pool_threshold: 需要切分的文件超过这个数才启动进程池
+                                       (进程启动本身要好几秒，少量改动直接在线程里切分更快)
+        :param journal_run: 导入日志句柄：写入前预写、提交后推进阶段，并提供 ETA 估算
+        """
+        self.kb = kb
+        self.manifest = manifest
+        self.on_file_committed = on_file_committed
+        self.on_progress = on_progress
+        self.reader_workers = max(1, reader_workers)
+        self.split_workers = max(0, (os.cpu_count() or 1) - 1) if split_workers is None else split_workers
+        self.embed_workers = max(1, embed_workers)
+        self.embed_batch_size = embed_batch_size
+        self.write_batch_size = write_batch_size
+        self.queue_size = queue_size
+        self.budget = budget
+        self.process_pool_threshold = process_pool_threshold
+        self.journal_run = journal_run
+
+        self.stats = PipelineStats()
+        self._stats_lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._split_count = 0
+        self._skipped = 0
+
+    # ------------------------------------------------------------------
+    # 公共入口
+    # ------------------------------------------------------------------
+    def run(self, files: List[Tuple[str, str]]) -> PipelineStats:
+        """
+        :param files: [(绝对路径, 相对路径), ...]
+        """
+        start_time = time.time()
+        self.stats = PipelineStats(total_files=len(files))
+        self._split_count = 0
+        self._skipped = 0
+
+        # mtime + size 都没变的文件在进入流水线之前就跳过：不占读取线程，也不计入 ETA
+        candidates = []
+        for path, relative_path in files:
+            if unchanged_by_stat(self.manifest, path):
+                self._skip(relative_path)
+            else:
+                candidates.append((path, relative_path))
+        files = candidates
+        if self.journal_run:
+            self.journal_run.set_workload(len(files))
+
+        file_queue: queue.Queue = queue.Queue()
+        read_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        embed_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        write_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        for item in files:
+            file_queue.put(item)
+
+        split_count = max(1, self.split_workers)
+        stages = [
+            self._start_stage("reader", self.reader_workers, self._reader, file_queue, read_queue, split_count),
+            self._start_stage("splitter", split_count, self._splitter, read_queue, embed_queue, 1),
+            self._start_stage("embedder", 1, self._embedder, embed_queue, write_queue, 1),
+            self._start_stage("writer", 1, self._writer, write_queue, None, 0),
+        ]
+        for _ in range(self.reader_workers):
+            file_queue.put(_STOP)
+
+        try:
+            for threads in stages:
+                for thread in threads:
+                    thread.join()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+        self.stats.elapsed = time.time() - start_time
+        logger.info(
+            f"⚡ [Pipeline] {self.stats.total_files} 个文件 | 耗时 {self.stats.elapsed:.2f}s | "
+            f"{self.stats.files_per_sec:.1f} files/s | {self.stats.chunks_per_sec:.1f} chunks/s"
+        )
+        return self.stats
+
+    # ------------------------------------------------------------------
+    # 阶段调度
+    # ------------------------------------------------------------------
+    def _start_stage(self, name, workers, target, in_queue, out_queue, downstream_workers) -> List[threading.Thread]:
+        """
+        启动一个阶段的 N 个工作线程；全部结束后向下游发送结束标记
+        """
+        threads = [
+            threading.Thread(target=target, args=(in_queue, out_queue), name=f"ingest-{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        def close_downstream():
+            for thread in threads:
+                thread.join()
+            if out_queue is not None:
+                for _ in range(downstream_workers):
+                    out_queue.put(_STOP)
+
+        closer = threading.Thread(target=close_downstream, name=f"ingest-{name}-closer", daemon=True)
+        closer.start()
+        return threads + [closer]
+
+    def _count(self, relative_path: str, status: str, **increments):
+        with self._stats_lock:
+            setattr(self.stats, status, getattr(self.stats, status) + 1)
+            for key, value in increments.items():
+                setattr(self.stats, key, getattr(self.stats, key) + value)
+            if self.journal_run:
+                self.stats.eta_seconds = self.journal_run.eta(self.work_processed)
+        if self.on_progress:
+            self.on_progress(relative_path, status, self.stats)
+
+    def _skip(self, relative_path: str):
+        """进入流水线之前就确定没变的文件 (不影响 ETA)"""
+        with self._stats_lock:
+            self.stats.unchanged += 1
+            self._skipped += 1
+        if self.on_progress:
+            self.on_progress(relative_path, "unchanged", self.stats)
+
+    @property
+    def work_processed(self) -> int:
+        """真正进入流水线 (需要读取 / 导入) 的文件中已经处理完的数量"""
+        return self.stats.processed - self._skipped
+
+    def _fail(self, item: FileWorkItem, error: Exception):
+        logger.warning(f"跳过文件 {item.relative_path}: {error}")
+        self._count(item.relative_path, "failed")
+
+    def _reserve_slot(self, item: FileWorkItem) -> bool:
+        return self.budget is None or self.budget.try_reserve(item.content)
+
+    def _split(self, item: FileWorkItem) -> List[LifeEvent]:
+        with self._executor_lock:
+            self._split_count += 1
+            use_processes = self.split_workers > 0 and self._split_count > self.process_pool_threshold
+            # 懒加载：无改动 / 少量改动的同步根本不需要启动进程池
+            if use_processes and self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.split_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        if not use_processes:
+            return split_into_events(item.content, item.relative_path, manifest_key(item.path))
+        return self._executor.submit(
+            split_into_events, item.content, item.relative_path, manifest_key(item.path)
+        ).result()
+
+    # ------------------------------------------------------------------
+    # 各阶段工作函数
+    # ------------------------------------------------------------------
+    def _reader(self, in_queue: queue.Queue, out_queue: queue.Queue):
+        while True:
+            task = in_queue.get()
+            if task is _STOP:
+                return
+            path, relative_path = task
+            try:
+                item = check_file(self.manifest, path, relative_path)
+            except Exception as e:
+                logger.warning(f"跳过文件 {relative_path}: {e}")
+                self._count(relative_path, "failed")
+                continue
+
+            if item is None:
+                self._count(relative_path, "unchanged")
+                continue
+            if not self._reserve_slot(item):
+                self._count(relative_path, "deferred")
+                continue
+            out_queue.put(item)
+
+    def _splitter(self, in_queue: queue.Queue, out_queue: queue.Queue):
+        while True:
+            item = in_queue.get()
+            if item is _STOP:
+                return
+            try:
+                item.events = self._split(item)
+            except Exception as e:
+                self._fail(item, e)
+                continue
+            out_queue.put(item)
+
+    def _embedder(self, in_queue: queue.Queue, out_queue: queue.Queue):
+        """
+        攒够 embed_batch_size 个 chunk 再发一次 Embedding 请求；
+        多个批次并发发送 (受 embed_workers 限制)。
+        """
+        pool = ThreadPoolExecutor(max_workers=self.embed_workers, thread_name_prefix="ingest-embed")
+        in_flight = threading.Semaphore(self.embed_workers * 2)
+        pending: List[FileWorkItem] = []
+        pending_chunks = 0
+
+        def embed_group(group: List[FileWorkItem]):
+            try:
+                texts = [event.content for item in group for event in item.new_events]
+                vectors = self.kb.embeddings.embed_documents(texts) if texts else []
+                offset = 0
+                for item in group:
+                    item.vectors = vectors[offset:offset + len(item.new_events)]
+                    offset += len(item.new_events)
+                out_queue.put(group)
+            except Exception as e:
+                for item in group:
+                    self._fail(item, e)
+            finally:
+                in_flight.release()
+
+        def flush():
+            nonlocal pending, pending_chunks
+            if not pending:
+                return
+            in_flight.acquire()
+            pool.submit(embed_group, pending)
+            pending, pending_chunks = [], 0
+
+        while True:
+            try:
+                item = in_queue.get(timeout=0.2)
+            except queue.Empty:
+                # 上游暂时没有数据：不要让已攒的批次干等
+                flush()
+                continue
+            if item is _STOP:
+                break
+            try:
+                # 内容寻址 ID：库里已有的 chunk 不需要再 Embedding
+                item.new_events = self.kb.filter_new_events(item.events)
+            except Exception as e:
+                self._fail(item, e)
+                continue
+            pending.append(item)
+            pending_chunks += len(item.new_events)
+            if pending_chunks >= self.embed_batch_size:
+                flush()
+
+        flush()
+        pool.shutdown(wait=True)
+
+    def _writer(self, in_queue: queue.Queue, _out_queue):
+        """
+        单写入线程：把多个文件的 chunk 合并成一个大批次提交到 Chroma
+        """
+        batch: List[FileWorkItem] = []
+        batch_chunks = 0
+        while True:
+            try:
+                group = in_queue.get(timeout=0.2)
+            except queue.Empty:
+                group = None
+
+            if group is _STOP:
+                self._commit(batch)
+                return
+            if group is not None:
+                batch.extend(group)
+                batch_chunks += sum(len(item.new_events) for item in group)
+            if batch and (group is None or batch_chunks >= self.write_batch_size):
+                self._commit(batch)
+                batch, batch_chunks = [], 0
+
+    def _commit(self, batch: List[FileWorkItem]):
+        if not batch:
+            return
+        journaled = [(item.relative_path, item.content_hash) for item in batch]
+        try:
+            if self.journal_run:
+                self.journal_run.log_intent(journaled)
+
+            events = [event for item in batch for event in item.new_events]
+            vectors = [vector for item in batch for vector in item.vectors]
+            self.kb.add_embedded_events(events, vectors)
+
+            # 删除被修改文件中已经不存在的旧 chunk
+            stale_ids = []
+            for item in batch:
+                current_ids = {event.id for event in item.events}
+                stale_ids.extend(cid for cid in item.previous_chunk_ids if cid not in current_ids)
+            self.kb.delete_events(stale_ids)
+
+            self.manifest.record_many([
+                ManifestEntry(
+                    path=item.path,
+                    content_hash=item.content_hash,
+                    mtime_ns=item.mtime_ns,
+                    size=item.size,
+                    chunk_ids=[event.id for event in item.events],
+                )
+                for item in batch
+            ])
+
+            if self.journal_run:
+                self.journal_run.mark_indexed(journaled)
+        except Exception as e:
+            for item in batch:
+                self._fail(item, e)
+            return
+
+        for item in batch:
+            if self.on_file_committed:
+                try:
+                    self.on_file_committed(item)
+                except Exception as e:
+                    logger.warning(f"⚠️ [Pipeline] 写入后回调失败 {item.relative_path}: {e}")
+            self._count(
+                item.relative_path,
+                "added" if item.is_new else "updated",
+                chunks=len(item.events),
+                embedded_chunks=len(item.new_events),
+                bytes=item.size,
+            )
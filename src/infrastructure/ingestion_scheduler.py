@@ -0,0 +1,147 @@
+# infrastructure/ingestion_scheduler.py
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# 中日韩字符大约 1 字 1 token，其余文本大约 4 个字符 1 token
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+# 优先级打分的参数
+RECENCY_SCALE_DAYS = 7.0   # 7 天前修改的笔记，新鲜度分数减半
+POPULARITY_WEIGHT = 0.5    # 检索命中次数 (取 log) 的权重
+BACKLOG_BONUS = 1.0        # 上次因为预算被推迟的文件优先处理，避免一直饿死
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 Embedding token 数 (不加载分词器，只用于预算控制)"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+@dataclass
+class IngestionBudget:
+    """
+    一次同步的资源预算 (None 表示不限)：
+    - max_embed_tokens: 需要重新 Embedding 的文本 token 数
+    - max_llm_calls: 画像提取的 LLM 调用次数 (只在 full 模式下计算)
+    - max_seconds: 墙钟时间，超过后不再接纳新的改动文件 (已经在流水线里的会完成)
+    """
+    max_embed_tokens: Optional[int] = None
+    max_llm_calls: Optional[int] = None
+    max_seconds: Optional[float] = None
+
+    @property
+    def unlimited(self) -> bool:
+        return self.max_embed_tokens is None and self.max_llm_calls is None and self.max_seconds is None
+
+    @classmethod
+    def no_limits(cls) -> "IngestionBudget":
+        """显式不限预算 (用户手动要求一次导入全部改动 / 基准测试)"""
+        return cls()
+
+    @classmethod
+    def from_env(cls) -> "IngestionBudget":
+        """默认预算：环境变量未设置时，防止一次同步把整个库都送去 Embedding / LLM"""
+        def read(name: str, default: str, cast):
+            value = os.getenv(name, default)
+            return cast(value) if value else None
+
+        return cls(
+            max_embed_tokens=read("INGEST_MAX_EMBED_TOKENS", "2000000", int),
+            max_llm_calls=read("INGEST_MAX_LLM_CALLS", "100", int),
+            max_seconds=read("INGEST_MAX_SECONDS", "", float),
+        )
+
+
+class BudgetTracker:
+    """
+    在导入流水线的读取阶段为每个改动文件"预约"预算。
+    预约失败的文件标记为 deferred，写入待导入队列留给下一次同步。
+    每次同步至少接纳一个文件：单个文件超过整个预算时也能导入，不会被永远推迟。
+    """
+
+    def __init__(self, budget: IngestionBudget, extract_profile: bool, profile_batch_chars: int):
+        """
+        :param extract_profile: 是否会做画像提取 (vector_only 模式下 LLM 调用预算不生效)
+        :param profile_batch_chars: 画像队列单次调用合并的字符上限，用于估算调用次数
+        """
+        self.budget = budget
+        self.extract_profile = extract_profile
+        self.profile_batch_chars = profile_batch_chars
+        self.started_at = time.time()
+
+        self.embed_tokens = 0
+        self.llm_calls = 0
+        self.admitted = 0
+        self._batch_chars = 0  # 当前画像批次已经装了多少字符
+        self.exhausted: List[str] = []
+        self._lock = threading.Lock()
+
+    def _estimate_calls(self, chars: int) -> Tuple[int, int]:
+        """模拟画像队列的合并策略：返回 (新增调用次数, 当前批次字符数)"""
+        if self._batch_chars and self._batch_chars + chars <= self.profile_batch_chars:
+            return 0, self._batch_chars + chars
+        return 1, chars
+
+    def _exhaust(self, reason: str) -> bool:
+        if reason not in self.exhausted:
+            self.exhausted.append(reason)
+        return False
+
+    def try_reserve(self, content: str) -> bool:
+        budget = self.budget
+        with self._lock:
+            first = self.admitted == 0
+            if not first and budget.max_seconds is not None and time.time() - self.started_at >= budget.max_seconds:
+                return self._exhaust("wall_clock")
+
+            tokens = estimate_tokens(content)
+            if not first and budget.max_embed_tokens is not None and self.embed_tokens + tokens > budget.max_embed_tokens:
+                return self._exhaust("embed_tokens")
+
+            new_calls, batch_chars = self._estimate_calls(len(content)) if self.extract_profile else (0, 0)
+            if not first and budget.max_llm_calls is not None and self.llm_calls + new_calls > budget.max_llm_calls:
+                return self._exhaust("llm_calls")
+
+            self.admitted += 1
+            self.embed_tokens += tokens
+            self.llm_calls += new_calls
+            self._batch_chars = batch_chars
+            return True
+
+    def usage(self) -> Dict[str, object]:
+        return {
+            "embed_tokens": self.embed_tokens,
+            "llm_calls": self.llm_calls,
+            "elapsed": round(time.time() - self.started_at, 2),
+            "exhausted": list(self.exhausted),
+        }
+
+
+def prioritize(
+    files: List[Tuple[str, str]],
+    retrieval_hits: Dict[str, int],
+    backlog: Dict[str, float],
+) -> List[Tuple[str, str]]:
+    """
+    按优先级排序待同步文件：最近修改 + 经常被检索 + 上次被推迟
+    :param files: [(绝对路径, 相对路径), ...]
+    """
+    now = time.time()
+
+    def score(item: Tuple[str, str]) -> float:
+        path, relative_path = item
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = 0.0
+        age_days = max(now - mtime, 0.0) / 86400
+        recency = 1.0 / (1.0 + age_days / RECENCY_SCALE_DAYS)
+        popularity = POPULARITY_WEIGHT * math.log1p(retrieval_hits.get(relative_path, 0))
+        return recency + popularity + (BACKLOG_BONUS if relative_path in backlog else 0.0)
+
+    return sorted(files, key=score, reverse=True)
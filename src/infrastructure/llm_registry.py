@@ -0,0 +1,246 @@
+# infrastructure/llm_registry.py
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from dotenv import find_dotenv, load_dotenv
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_openai import ChatOpenAI
+from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+from pydantic import SecretStr
+
+import httpx
+
+from src.core.config import LLMConfig
+from src.infrastructure.fake_llm import ScriptedChatModel
+
+load_dotenv(find_dotenv())
+
+logger = logging.getLogger(__name__)
+
+# 各角色的默认参数；环境变量 LLM_<ROLE>_MODEL / LLM_<ROLE>_TEMPERATURE 可以单独覆盖
+# (例如 LLM_ROUTER_MODEL=gpt-4o-mini 让路由用小模型)
+ROLE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "default": {"temperature": 0.7},
+    "router": {"temperature": 0.0},
+    "archivist": {"temperature": 0.2},
+    "strategist": {"temperature": 0.7},
+    "coach": {"temperature": 0.7},
+    "synthesizer": {"temperature": 0.7},
+    "cfo": {"temperature": 0.7},
+    "mem0": {"temperature": 0.7},
+}
+
+
+# openai = OpenAI 兼容的服务；fake = 离线的脚本化模型 (见 fake_llm，基准测试 / 离线演练用)
+LLM_BACKEND = os.getenv("ECHO_BOARD_LLM_BACKEND", "openai")
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """响应体读完 / 关闭时归还并发名额 (流式输出要等整段 token 收完才算请求结束)"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """
+    异步请求的传输层：每个事件循环各自一个 httpx.AsyncClient (连接池) + 一个并发信号量。
+    httpx 的连接绑定在打开它的事件循环上，批量运行 / 测试 / 基准测试里多次 asyncio.run 时，
+    后面的循环不能复用前面 (已经关闭的) 循环里的连接。循环被回收后它的客户端也跟着释放。
+    内层用完整的客户端而不是裸传输层：环境变量里的代理设置照常生效。
+    """
+
+    def __init__(self, max_concurrency: int, make_client: Callable[[], httpx.AsyncClient]):
+        self.max_concurrency = max_concurrency
+        self._make_client = make_client
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _for_running_loop(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._loops.get(loop)
+            if entry is None:
+                entry = (self._make_client(), asyncio.Semaphore(self.max_concurrency))
+                self._loops[loop] = entry
+            return entry
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        client, slots = self._for_running_loop()
+        await slots.acquire()
+        try:
+            response = await client.send(request, stream=True)
+        except BaseException:
+            slots.release()
+            raise
+        if response.is_closed:
+            # 响应体已经完整读进内存 (不会再有 aclose)
+            slots.release()
+        else:
+            response.stream = _ReleasingStream(response.stream, slots.release)
+        return response
+
+    async def aclose(self) -> None:
+        """只关闭当前事件循环的连接池 (其他循环的连接不能在这里关闭)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._loops.pop(loop, None)
+        if entry is not None:
+            await entry[0].aclose()
+
+
+class LLMRegistry:
+    """
+    进程级 LLM 客户端注册表：所有角色共用同一组 HTTP 连接池、限流器和重试策略。
+
+    - 连接复用：同步 / 异步各一个 httpx 客户端 (keep-alive)，不再每个 ChatOpenAI 各建一个连接池；
+      异步客户端按事件循环各用一个连接池 (连接不能跨循环复用)
+    - 并发上限：每个事件循环一个信号量，同时在途的异步 LLM 请求 (含流式输出) 不超过 LLM_MAX_CONCURRENCY，
+      超出的请求排队；同步客户端由连接池的最大连接数限制
+    - 令牌桶限流：所有角色共享一个 InMemoryRateLimiter (每秒请求数 + 突发上限)
+    - 重试：交给 OpenAI SDK 的指数退避 (429 / 5xx / 连接错误，遵守 Retry-After)
+    - 超时：单次请求的超时取 LLM_TIMEOUT (默认 LLMConfig.timeout)，卡住的连接不会一直占着并发名额
+    - 用量：流式调用也让服务端返回 token 用量 (stream_usage，LLM_STREAM_USAGE=0 关闭)，
+      批量开会时可以用 get_usage_metadata_callback 按会议统计
+    - 按角色覆盖模型和温度，同一组参数只创建一个实例
+    - backend="fake" 时所有角色都换成确定性的 ScriptedChatModel，不需要 API Key
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        default_model: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        max_burst: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        backend: Optional[str] = None,
+    ):
+        self.backend = backend or LLM_BACKEND
+        self.api_key = api_key or os.getenv("OPEN_AI_API_KEY")
+        self.base_url = base_url or os.getenv("OPEN_AI_API_BASE")
+        self.default_model = default_model or os.getenv("CHAT_MODEL")
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "4"))
+        if requests_per_second is None:
+            requests_per_second = _env_float("LLM_REQUESTS_PER_SECOND", 5.0)
+        max_burst = max_burst or int(os.getenv("LLM_MAX_BURST", "10"))
+        self.timeout = timeout or _env_float("LLM_TIMEOUT", LLMConfig.model_fields["timeout"].default)
+        # 有些 OpenAI 兼容的服务不支持 stream_options，可以关掉
+        self.stream_usage = os.getenv("LLM_STREAM_USAGE", "1") == "1"
+
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+            keepalive_expiry=60,
+        )
+        self.http_client = DefaultHttpxClient(limits=limits)
+        self.http_async_client = DefaultAsyncHttpxClient(
+            transport=_PerLoopTransport(self.max_concurrency, lambda: httpx.AsyncClient(limits=limits))
+        )
+        # requests_per_second <= 0 表示不限流
+        self.rate_limiter = (
+            InMemoryRateLimiter(
+                requests_per_second=requests_per_second,
+                check_every_n_seconds=0.05,
+                max_bucket_size=max_burst,
+            )
+            if requests_per_second > 0
+            else None
+        )
+        self._models: Dict[tuple, BaseChatModel] = {}
+        self._lock = threading.Lock()
+
+    def role_settings(self, role: str, **overrides) -> Dict[str, Any]:
+        """角色的最终参数：全局默认 < 角色默认 < 环境变量 < 调用方传入"""
+        settings = {**ROLE_DEFAULTS["default"], **ROLE_DEFAULTS.get(role, {})}
+        prefix = f"LLM_{role.upper()}_"
+        if os.getenv(prefix + "MODEL"):
+            settings["model"] = os.getenv(prefix + "MODEL")
+        if os.getenv(prefix + "TEMPERATURE"):
+            settings["temperature"] = float(os.getenv(prefix + "TEMPERATURE"))
+        settings.update(overrides)
+        settings.setdefault("model", self.default_model)
+        return settings
+
+    def get(self, role: str = "default", **overrides) -> BaseChatModel:
+        """
+        获取某个角色的 LLM (共享连接池 / 限流器)
+        :param overrides: 额外的 ChatOpenAI 参数 (model / temperature / max_tokens ...)，必须可哈希
+        """
+        settings = self.role_settings(role, **overrides)
+        if self.backend == "fake":
+            key = ("fake", role) + tuple(sorted(settings.items()))
+            with self._lock:
+                if key not in self._models:
+                    self._models[key] = ScriptedChatModel.from_env(role, model_name=settings["model"])
+                return self._models[key]
+        if not settings["model"] or not self.api_key:
+            raise ValueError("CHAT_MODEL and OPEN_AI_API_KEY must be set")
+        key = tuple(sorted(settings.items()))
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = ChatOpenAI(
+                    api_key=SecretStr(self.api_key),
+                    base_url=self.base_url,
+                    http_client=self.http_client,
+                    http_async_client=self.http_async_client,
+                    rate_limiter=self.rate_limiter,
+                    max_retries=self.max_retries,
+                    timeout=self.timeout,
+                    stream_usage=self.stream_usage,
+                    **settings,
+                )
+                self._models[key] = model
+                logger.info(f"🔌 [LLMRegistry] {role}: {settings['model']} (temperature={settings.get('temperature')})")
+            return model
+
+
+# 进程级单例：所有 Agent / Mem0 共用
+_shared_registry: Optional[LLMRegistry] = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_registry() -> LLMRegistry:
+    global _shared_registry
+    with _shared_lock:
+        if _shared_registry is None:
+            _shared_registry = LLMRegistry()
+        return _shared_registry
+
+
+def get_llm(role: str = "default", **overrides) -> BaseChatModel:
+    """
+    获取共享的 LLM 客户端
+    :param role: 角色名 (router / archivist / strategist / coach / synthesizer / cfo / mem0 ...)
+    """
+    return get_llm_registry().get(role, **overrides)
@@ -0,0 +1,60 @@
+# infrastructure/markdown_splitter.py
+from typing import List, Optional
+
+from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+
+from src.core.models.domain_models import LifeEvent
+from src.infrastructure.date_resolver import event_date_key
+
+# 注意：这个模块会被切分进程池 import，只能依赖纯计算的库
+# (不要在这里引入 Chroma / Ollama / Mem0 等有副作用的模块)
+
+HEADERS_TO_SPLIT_ON = [
+    ("#", "Date/Title"),
+    ("##", "Section"),
+    ("###", "SubSection"),
+]
+
+# 切分器是无状态的，每个进程只构建一次
+_markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=HEADERS_TO_SPLIT_ON)
+_text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+
+
+def split_into_events(file_content: str, source_name: str, source_key: Optional[str] = None) -> List[LifeEvent]:
+    """
+    Markdown → LifeEvent 列表
+    1. 结构化切分 (按标题)
+    2. 长度切分
+    3. 转换为 LifeEvent (ID 由内容推导，重复导入同一文件不会产生重复向量)
+    :param source_name: 展示用的来源 (库内的相对路径，写入 metadata 的 source_file)
+    :param source_key: 参与 chunk ID 的来源标识，默认等于 source_name。
+        从库里导入时传文件的绝对路径：两个库里相对路径 / 标题 / 内容都相同的段落不会得到同一个 ID
+    """
+    md_header_splits = _markdown_splitter.split_text(file_content)
+    final_splits = _text_splitter.split_documents(md_header_splits)
+
+    life_events = []
+    seen_ids = set()
+    for doc in final_splits:
+        header_path = " > ".join(
+            str(doc.metadata[key])
+            for _, key in HEADERS_TO_SPLIT_ON
+            if key in doc.metadata
+        )
+        event_id = LifeEvent.content_id(source_key or source_name, header_path, doc.page_content)
+        if event_id in seen_ids:
+            # 同一标题下完全相同的段落，只保留一份
+            continue
+        seen_ids.add(event_id)
+        metadata = {"source_file": source_name, **doc.metadata}
+        # 标题 / 文件名里的日期归一化成 yyyymmdd，供时间索引和按日期过滤使用
+        date_key = event_date_key(metadata)
+        if date_key is not None:
+            metadata["date"] = date_key
+        life_events.append(LifeEvent(
+            id=event_id,
+            content=doc.page_content,
+            source_type="obsidian",
+            metadata=metadata
+        ))
+    return life_events
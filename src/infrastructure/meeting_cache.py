@@ -0,0 +1,134 @@
+# infrastructure/meeting_cache.py
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.getenv("MEETING_CACHE_PATH", "./data/meeting_cache.sqlite")
+# 账本可能在 Firefly III 里被直接修改 (本系统感知不到)，缓存的决议最多复用这么久 (秒)；0 表示不过期
+DEFAULT_TTL = float(os.getenv("MEETING_CACHE_TTL", "3600"))
+
+_SPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCT = " \t\n.。!！?？,，;；~～…"
+
+
+def normalize_query(query: str) -> str:
+    """问题归一化：全半角统一 (NFKC)、忽略大小写、合并空白、去掉首尾标点"""
+    normalized = unicodedata.normalize("NFKC", query).casefold()
+    return _SPACE_RE.sub(" ", normalized).strip(_EDGE_PUNCT)
+
+
+class MeetingCache:
+    """
+    整场会议的结果缓存：(归一化的问题, 数据版本向量, 会议参数) → 会议结束时的完整 State。
+
+    版本向量 = 知识库 / Mem0 用户画像 / 账本各自的版本号 (见 data_versions)，
+    任何一个数据源变化后版本号不同，旧结果自然不会再命中，不需要主动清理。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL, max_entries: int = 500):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS meetings (
+                cache_key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                versions TEXT NOT NULL,
+                final_state TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_hit_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(query: str, versions: Dict[str, int], variant: str = "") -> str:
+        """
+        :param versions: 数据源 → 版本号
+        :param variant: 其他会影响结果的会议参数 (辩论模式、相对日期解析出来的日期范围等)
+        """
+        payload = json.dumps(
+            {"query": normalize_query(query), "versions": versions, "variant": variant},
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """:return: 命中时返回缓存的 final_state，否则 None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT final_state, created_at FROM meetings WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            final_state, created_at = row
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM meetings WHERE cache_key = ?", (cache_key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE meetings SET hits = hits + 1, last_hit_at = ? WHERE cache_key = ?", (now, cache_key)
+            )
+            self._conn.commit()
+        return json.loads(final_state)
+
+    def store(self, cache_key: str, query: str, versions: Dict[str, int], final_state: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO meetings (cache_key, query, versions, final_state, created_at, last_hit_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """,
+                (
+                    cache_key,
+                    query,
+                    json.dumps(versions, sort_keys=True),
+                    json.dumps(final_state, ensure_ascii=False),
+                    now,
+                    now,
+                ),
+            )
+            # 超出容量时淘汰最久没有命中的结果
+            self._conn.execute(
+                """
+                DELETE FROM meetings WHERE cache_key IN (
+                    SELECT cache_key FROM meetings ORDER BY last_hit_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM meetings").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM meetings")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
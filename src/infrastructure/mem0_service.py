@@ -1,29 +1,31 @@
+import asyncio
 import os
 from dotenv import find_dotenv
 from dotenv.main import load_dotenv
 from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
-from langchain_openai import ChatOpenAI
 from mem0 import Memory
-from pydantic import SecretStr
+
+from src.infrastructure.data_versions import get_data_versions
+from src.infrastructure.embedding_cache import get_embeddings
+from src.infrastructure.llm_registry import get_llm
 
 load_dotenv(find_dotenv())
 
 api_key = os.getenv("OPEN_AI_API_KEY")
-base_url = os.getenv("OPEN_AI_API_BASE")
-chat_model = os.getenv("CHAT_MODEL")
 
-os.environ["OPENAI_API_KEY"] = api_key
+# 离线模式 (ECHO_BOARD_LLM_BACKEND=fake) 下可以没有 API Key
+if api_key:
+    os.environ["OPENAI_API_KEY"] = api_key
+
+
+# 共享注册表里的 LLM (和董事会成员共用连接池 / 限流)
+llm = get_llm("mem0")
 
 
-llm = ChatOpenAI(
-    temperature=0.7,
-    model=chat_model,
-    api_key=SecretStr(api_key),
-    base_url=base_url
-)
 class UserProfileService:
     def __init__(self, user_id: str = "default_user"):
+        # 和 KnowledgeBase 共用同一个带缓存的 Embedding 实例
+        embeddings = get_embeddings()
 
         config = {
             "llm": {
@@ -35,7 +37,7 @@ class UserProfileService:
             "embedder": {
                 "provider": "langchain",
                 "config": {
-                    "model": OllamaEmbeddings(model="nomic-embed-text:latest"),
+                    "model": embeddings,
                 }
             },
             "vector_store": {
@@ -43,7 +45,7 @@ class UserProfileService:
                 "config": {
                     "client": Chroma(
                         persist_directory="./mem0/chroma_db",
-                        embedding_function=OllamaEmbeddings(model="nomic-embed-text:latest"),
+                        embedding_function=embeddings,
                         collection_name="mem0"  # Required collection name
                     )
                 }
@@ -52,21 +54,34 @@ class UserProfileService:
 
         self.m = Memory.from_config(config)
         self.user_id = user_id
+        # 用户画像的数据版本：每次写入 +1，整场会议的结果缓存用它判断画像是否变过
+        self.version_key = f"mem0:{user_id}"
 
-    def remember(self, text: str):
+    def remember(self, text: str, bump_version: bool = True):
         """
         [写入路径]: 让系统记住一个新的事实/偏好
         通常在处理日记或对话结束后调用
+        :param bump_version: 是否更新画像的数据版本。会议记住自己的决议时传 False，
+            否则刚缓存的会议结果会被它自己的这次写入作废
         """
         print(f"🧠 [Mem0] Extracting facts from: {text[:30]}...")
         self.m.add(text, user_id=self.user_id)
+        if bump_version:
+            get_data_versions().bump(self.version_key)
 
     def get_profile(self, query: str) -> str:
         """
         [读取路径]: 获取与当前话题相关的用户画像
         """
         # Mem0 的 search 会返回一个列表，元素可能是字符串，也可能是 dict
-        memories = self.m.search(query, user_id=self.user_id)
+        try:
+            memories = self.m.search(query, user_id=self.user_id)
+        except ValueError:
+            # mem0 2.x 不再接受顶层的 user_id，改为放在 filters 里
+            memories = self.m.search(query, filters={"user_id": self.user_id})
+        if isinstance(memories, dict):
+            # 新版本返回 {"results": [...]}
+            memories = memories.get("results", [])
 
         if not memories:
             return "No specific user preferences found."
@@ -85,6 +100,14 @@ class UserProfileService:
         print("User profile: ", profile_text)
         return profile_text
 
+    async def aremember(self, text: str, bump_version: bool = True):
+        """remember 的异步版本 (mem0 的 SDK 是同步的，放在线程里执行，不阻塞事件循环)"""
+        await asyncio.to_thread(self.remember, text, bump_version)
+
+    async def aget_profile(self, query: str) -> str:
+        """get_profile 的异步版本"""
+        return await asyncio.to_thread(self.get_profile, query)
+
     def get_all_memories(self):
         """获取所有记忆 (用于调试)"""
         return self.m.get_all(user_id=self.user_id)
@@ -1,9 +1,15 @@
 import os
 import logging
-from typing import List
-from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from src.core.models.domain_models import LifeEvent
+from src.infrastructure.ingestion_journal import IngestionJournal
+from src.infrastructure.ingestion_manifest import IngestionManifest, compute_content_hash, manifest_key
+from src.infrastructure.ingestion_pipeline import FileWorkItem, IngestionPipeline, PipelineStats, check_file
+from src.infrastructure.ingestion_scheduler import BudgetTracker, IngestionBudget, prioritize
+from src.infrastructure.markdown_splitter import split_into_events
 from src.infrastructure.mem0_service import UserProfileService
+from src.infrastructure.profile_extraction import ProfileExtractionQueue, ProfileJob
 from src.infrastructure.vector_store import KnowledgeBase
 
 # 配置日志
@@ -13,49 +19,65 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def scan_markdown_files(folder_path: str) -> List[str]:
+    """
+    递归扫描目录下所有 .md 文件 (跳过 .obsidian / .git 等隐藏目录)
+    """
+    md_files = []
+    for root, dirs, files in os.walk(folder_path):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for file in files:
+            if file.endswith(".md"):
+                md_files.append(os.path.join(root, file))
+    return md_files
+
+
+SYNC_MODES = ("full", "vector_only")
+
+
 class MemoryIngestionEngine:
-    def __init__(self, knowledge_base: KnowledgeBase):
+    def __init__(self, knowledge_base: KnowledgeBase, manifest_path: Optional[str] = None):
         self.kb = knowledge_base
-        self.mem0 = UserProfileService()
+        self._mem0: Optional[UserProfileService] = None
+        # 导入清单默认和向量库放在一起：reset_db 清空向量库时清单也一起被清掉
+        self.manifest = IngestionManifest(
+            manifest_path or os.path.join(self.kb.persist_dir, "ingestion_manifest.sqlite")
+        )
+        # 导入日志：记录每次同步和每个文件的阶段 (中断恢复 / ETA)
+        self.journal = IngestionJournal(os.path.join(self.kb.persist_dir, "ingestion_journal.sqlite"))
+        # 画像提取 (LLM 调用) 走后台队列，不阻塞向量导入
+        self.profile_queue = ProfileExtractionQueue(
+            remember=lambda text: self.mem0.remember(text),
+            on_extracted=self._on_profiles_extracted,
+        )
+        # 同步按钮和文件监听可能同时触发，串行执行避免对同一文件重复导入
+        self._sync_lock = threading.RLock()
 
-    def process_file(self, file_content: str, source_name: str = "unknown") -> List[LifeEvent]:
+    @property
+    def mem0(self) -> UserProfileService:
+        """懒加载：vector_only 模式下根本不需要初始化 Mem0"""
+        if self._mem0 is None:
+            self._mem0 = UserProfileService()
+        return self._mem0
+
+    def process_file(
+        self,
+        file_content: str,
+        source_name: str = "unknown",
+        extract_profile: bool = True,
+        source_key: Optional[str] = None,
+    ) -> List[LifeEvent]:
         """
-        处理单个文件内容 (逻辑保持不变)
+        处理单个文件内容
+        :param extract_profile: 是否把内容提交给后台画像提取队列 (False = 只做向量导入)
+        :param source_key: 参与 chunk ID 的来源标识 (文件的绝对路径)，默认用 source_name
         """
         logger.info(f"📄 开始处理文件: {source_name} (长度: {len(file_content)} 字符)")
 
-        # 1. 结构化切分 (按标题)
-        headers_to_split_on = [
-            ("#", "Date/Title"),
-            ("##", "Section"),
-            ("###", "SubSection"),
-        ]
-        markdown_splitter = MarkdownHeaderTextSplitter(
-            headers_to_split_on=headers_to_split_on
-        )
-        md_header_splits = markdown_splitter.split_text(file_content)
-        logger.info(f"  └─ 结构化切分完成: {len(md_header_splits)} 个片段")
-
-        # 2. 长度切分
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50
-        )
-        final_splits = text_splitter.split_documents(md_header_splits)
-        logger.info(f"  └─ 长度切分完成: {len(final_splits)} 个块")
-
-        # 3. 转换为 LifeEvent
-        life_events = []
-        for doc in final_splits:
-            event = LifeEvent(
-                content=doc.page_content,
-                source_type="obsidian",
-                metadata={
-                    "source_file": source_name,
-                    **doc.metadata
-                }
-            )
-            life_events.append(event)
+        # 1~3. 按标题结构化切分 + 长度切分 + 转换为 LifeEvent
+        life_events = split_into_events(file_content, source_name, source_key)
+        logger.info(f"  └─ 切分完成: {len(life_events)} 个块")
 
         # 4. 存入仓库
         if life_events:
@@ -64,52 +86,267 @@ class MemoryIngestionEngine:
         else:
             logger.warning(f"⚠️ 未从文件 {source_name} 中提取到有效内容")
 
-        self.mem0.remember(file_content)
-        
+        if extract_profile:
+            self.profile_queue.submit(file_content, source=source_name)
+
         return life_events
 
-    def ingest_folder(self, folder_path: str, max_files: int = 100):
+    def sync_file(self, file_path: str, folder_path: str, sync_mode: str = "full") -> str:
+        """
+        增量同步单个文件
+        :param sync_mode: "full" (向量 + 后台画像提取) / "vector_only" (跳过画像提取)
+        :return: "unchanged" (跳过) / "added" (新文件) / "updated" (已修改)
+        """
+        relative_path = os.path.relpath(file_path, folder_path)
+        item = check_file(self.manifest, file_path, relative_path)
+        if item is None:
+            return "unchanged"
+
+        # 新文件 / 内容已修改：先 upsert 新 chunk，成功后再删除不再存在的旧 chunk
+        # (chunk ID 由内容推导，没改动的段落 ID 不变，不会被误删)
+        # (如果中途失败，清单不更新，下次同步会自动重试)
+        life_events = self.process_file(
+            item.content,
+            source_name=relative_path,
+            extract_profile=sync_mode == "full",
+            source_key=manifest_key(file_path),
+        )
+        new_ids = {event.id for event in life_events}
+        self.kb.delete_events([cid for cid in item.previous_chunk_ids if cid not in new_ids])
+
+        self.manifest.record(
+            file_path,
+            item.content_hash,
+            item.mtime_ns,
+            item.size,
+            [event.id for event in life_events],
+        )
+        return "added" if item.is_new else "updated"
+
+    def remove_file(self, folder_path: str, relative_path: str) -> bool:
+        """
+        笔记被删除：清理它在向量库中的 chunk 和清单记录
+        :return: 该文件之前是否被索引过
+        """
+        file_path = os.path.join(folder_path, relative_path)
+        entry = self.manifest.get(file_path)
+        if entry is None:
+            return False
+        self.kb.delete_events(entry.chunk_ids)
+        self.manifest.remove(file_path)
+        self.journal.forget(folder_path, relative_path)
+        logger.info(f"🗑️ [Loader] 已移除被删除笔记的索引: {relative_path}")
+        return True
+
+    def prune_missing(self, folder_path: str, seen_paths: List[str]) -> int:
+        """
+        清理清单中位于 folder_path 之下、但本次扫描已经找不到的文件
+        (其他库 / 目录之外的记录不受影响)
+        :param seen_paths: 本次扫描到的相对路径
+        :return: 被清理的文件数
+        """
+        seen = {manifest_key(os.path.join(folder_path, relative_path)) for relative_path in seen_paths}
+        removed = 0
+        for path in self.manifest.entries_under(folder_path):
+            if path not in seen:
+                self.remove_file(folder_path, os.path.relpath(path, folder_path))
+                removed += 1
+        return removed
+
+    def _submit_profile(self, relative_path: str, content: str, content_hash: str):
+        """提交画像提取；内容之前已经提取过的直接在日志中标记完成"""
+        if not self.profile_queue.submit(content, source=relative_path) and self.profile_queue.is_extracted(content_hash):
+            self.journal.mark_profiled([(relative_path, content_hash)])
+
+    def _on_file_committed(self, item: FileWorkItem):
+        """流水线写入向量库之后：提交画像提取任务 (只排队，不阻塞写入线程)"""
+        self._submit_profile(item.relative_path, item.content, item.content_hash)
+
+    def _on_profiles_extracted(self, jobs: List[ProfileJob]):
+        self.journal.mark_profiled([(job.source, job.content_hash) for job in jobs])
+
+    def _resume_profiles(self, folder_path: str) -> int:
+        """
+        上次进程退出时还没完成画像提取的文件 (向量已经写入，后台队列丢失)：重新排队
+        :return: 重新提交的文件数
+        """
+        resumed = 0
+        for relative_path, content_hash in self.journal.pending_profiles(folder_path).items():
+            file_path = os.path.join(folder_path, relative_path)
+            if not os.path.isfile(file_path):
+                continue
+            with open(file_path, "r", encoding="utf-8") as f:
+                content = f.read()
+            # 文件之后又被修改过：本次同步会重新导入并重新排队
+            if compute_content_hash(content) != content_hash:
+                continue
+            self._submit_profile(relative_path, content, content_hash)
+            resumed += 1
+        if resumed:
+            logger.info(f"♻️ [Loader] {resumed} 个文件的画像提取在上次中断，已重新排队")
+        return resumed
+
+    def _repair_interrupted_writes(self, folder_path: str, current_run_id: int) -> int:
+        """
+        folder_path 下之前的运行停在 writing 阶段的文件：chunk 可能已经写进 Chroma，但关键词 / 时间索引还没更新。
+        重跑时这些 chunk 会被当作已存在而跳过，所以先按 Chroma 补齐侧索引
+        (清单没更新的文件随后还会被流水线重新导入一次)
+        :return: 补齐的文件数
+        """
+        interrupted = self.journal.interrupted_writes(folder_path, exclude_run_id=current_run_id)
+        if not interrupted:
+            return 0
+        chunks = self.kb.reindex_sources(list(interrupted))
+        self.journal.resolve_writes(folder_path, list(interrupted.items()))
+        logger.warning(
+            f"♻️ [Loader] {len(interrupted)} 个文件上次在写入向量库时中断，已按 Chroma 补齐侧索引 ({chunks} 个 chunk)"
+        )
+        return len(interrupted)
+
+    def _run_pipeline(
+        self,
+        folder_path: str,
+        files: List[Tuple[str, str]],
+        sync_mode: str,
+        budget: Optional[IngestionBudget] = None,
+        on_progress: Optional[Callable[[str, str, PipelineStats], None]] = None,
+        **pipeline_options: Any,
+    ) -> Dict[str, Any]:
+        if sync_mode not in SYNC_MODES:
+            raise ValueError(f"未知的同步模式: {sync_mode}，可选: {SYNC_MODES}")
+
+        tracker = None
+        if budget is not None and not budget.unlimited:
+            tracker = BudgetTracker(
+                budget,
+                extract_profile=sync_mode == "full",
+                profile_batch_chars=self.profile_queue.batch_max_chars,
+            )
+            # 预算有限：最近修改 / 常被检索 / 上次被推迟的文件先处理
+            files = prioritize(files, self.kb.retrieval_stats.hits(), self.journal.backlog(folder_path))
+
+        deferred: List[str] = []
+        finished: List[str] = []
+
+        def track_progress(relative_path: str, status: str, stats: PipelineStats):
+            if status == "deferred":
+                deferred.append(relative_path)
+            elif status != "failed":
+                finished.append(relative_path)
+            if on_progress:
+                on_progress(relative_path, status, stats)
+
+        journal_run = self.journal.begin_run(folder_path, sync_mode, len(files))
+        self._repair_interrupted_writes(folder_path, journal_run.run_id)
+        pipeline = IngestionPipeline(
+            self.kb,
+            self.manifest,
+            on_file_committed=self._on_file_committed if sync_mode == "full" else None,
+            on_progress=track_progress,
+            budget=tracker,
+            journal_run=journal_run,
+            **pipeline_options,
+        )
+        # 向量导入期间画像队列只排队，导入结束后再开始调用 LLM
+        with self.profile_queue.paused():
+            profile_resumed = self._resume_profiles(folder_path) if sync_mode == "full" else 0
+            try:
+                pipeline_stats = pipeline.run(files)
+            except BaseException:
+                self.journal.finish_run(journal_run, pipeline.work_processed, status="failed")
+                raise
+        # 只记录真正进入流水线的文件数：历史平均耗时 (ETA) 不被没变的文件拉低
+        self.journal.finish_run(journal_run, pipeline.work_processed)
+        self.journal.update_backlog(folder_path, deferred, finished)
+
+        stats = pipeline_stats.to_dict()
+        stats["budget"] = tracker.usage() if tracker else None
+        stats["backlog"] = len(self.journal.backlog(folder_path))
+        stats["run_id"] = journal_run.run_id
+        stats["profile_jobs_resumed"] = profile_resumed
+        stats["profile_jobs_pending"] = self.profile_queue.pending()
+        return stats
+
+    def sync_paths(
+        self,
+        folder_path: str,
+        relative_paths: List[str],
+        sync_mode: str = "full",
+        budget: Optional[IngestionBudget] = None,
+    ) -> Dict[str, Any]:
+        """
+        只同步指定的文件 (文件监听触发)：存在的走增量流水线，不存在的清理索引
+        :param budget: 同 ingest_folder，默认读取环境变量；超出预算的文件进入待导入队列
+        """
+        if budget is None:
+            budget = IngestionBudget.from_env()
+
+        existing = []
+        missing = []
+        for relative_path in dict.fromkeys(relative_paths):
+            file_path = os.path.join(folder_path, relative_path)
+            if os.path.isfile(file_path):
+                existing.append((file_path, relative_path))
+            else:
+                missing.append(relative_path)
+
+        with self._sync_lock:
+            self.manifest.adopt_relative(folder_path)
+            stats = self._run_pipeline(folder_path, existing, sync_mode, budget)
+            stats["deleted"] = sum(1 for relative_path in missing if self.remove_file(folder_path, relative_path))
+        return stats
+
+    def ingest_folder(
+        self,
+        folder_path: str,
+        budget: Optional[IngestionBudget] = None,
+        on_progress: Optional[Callable[[str, str, PipelineStats], None]] = None,
+        sync_mode: str = "full",
+        **pipeline_options: Any,
+    ) -> Dict[str, Any]:
         """
-        [新增功能] 递归扫描文件夹并导入
+        递归扫描文件夹，并通过多阶段并行流水线增量导入 (未修改的文件直接跳过)
         :param folder_path: Obsidian 库的根目录路径
-        :param max_files: 安全限制，防止一次性读入几千个文件把钱烧光
+        :param budget: 资源预算 (Embedding token / LLM 调用 / 墙钟时间)，默认读取环境变量
+                       (IngestionBudget.from_env)；超出预算的文件进入待导入队列，下次同步优先处理。
+                       IngestionBudget.no_limits() 表示不限 (用户手动要求一次导入全部时使用)
+        :param on_progress: 进度回调 (relative_path, status, stats)，会在流水线的工作线程中调用；
+                            stats.eta_seconds 为按实测单文件耗时估算的剩余时间
+        :param sync_mode: "full" = 向量导入完成后在后台做画像提取；"vector_only" = 完全跳过画像提取
+        :param pipeline_options: 透传给 IngestionPipeline 的并发参数 (reader_workers / embed_workers 等)
+        :return: 各状态的文件数统计 + 吞吐量 (files/sec, chunks/sec)
         """
-        logger.info(f"📂 [Loader] 开始扫描目录: {folder_path}")
+        logger.info(f"📂 [Loader] 开始扫描目录: {folder_path} (模式: {sync_mode})")
 
         if not os.path.exists(folder_path):
             error_msg = f"路径不存在: {folder_path}"
             logger.error(error_msg)
             raise ValueError(error_msg)
 
-        processed_count = 0
-
-        # os.walk 递归遍历所有子目录
-        for root, dirs, files in os.walk(folder_path):
-            # 过滤掉隐藏文件夹 (如 .obsidian, .git)
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
-
-            for file in files:
-                if processed_count >= max_files:
-                    logger.warning(f"🛑 [Loader] 达到最大文件限制 ({max_files})，停止加载。")
-                    return
-
-                if file.endswith(".md"):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, "r", encoding="utf-8") as f:
-                            content = f.read()
+        files = [
+            (file_path, os.path.relpath(file_path, folder_path))
+            for file_path in scan_markdown_files(folder_path)
+        ]
 
-                        # 获取相对路径作为 source_name (例如: "Work/2023-10-10.md")
-                        relative_path = os.path.relpath(file_path, folder_path)
+        if budget is None:
+            budget = IngestionBudget.from_env()
 
-                        # 调用之前的单文件处理逻辑
-                        self.process_file(content, source_name=relative_path)
-                        processed_count += 1
-                        logger.info(f"✅ [{processed_count}] 已处理: {relative_path}")
+        with self._sync_lock:
+            # 旧版本按相对路径记录的清单：迁移成绝对路径
+            self.manifest.adopt_relative(folder_path)
+            stats = self._run_pipeline(folder_path, files, sync_mode, budget, on_progress, **pipeline_options)
+            # 清理这个目录下已经被删除的笔记
+            stats["deleted"] = self.prune_missing(folder_path, [relative_path for _, relative_path in files])
 
-                    except Exception as e:
-                        error_msg = f"跳过文件 {file}: {e}"
-                        logger.warning(error_msg)
+        if stats["deferred"]:
+            logger.warning(
+                f"🛑 [Loader] 预算用尽 ({', '.join(stats['budget']['exhausted'])})，"
+                f"{stats['deferred']} 个文件进入待导入队列 (共 {stats['backlog']} 个)，下次同步优先处理。"
+            )
 
-        logger.info(f"🎉 [Loader] 批量导入完成，共处理 {processed_count} 个文件。")
-        
+        logger.info(
+            f"🎉 [Loader] 增量导入完成: 新增 {stats['added']} | 修改 {stats['updated']} | "
+            f"未变 {stats['unchanged']} | 删除 {stats['deleted']} | 失败 {stats['failed']} | "
+            f"{stats['files_per_sec']} files/s | {stats['chunks_per_sec']} chunks/s"
+        )
+        return stats
@@ -0,0 +1,199 @@
+# infrastructure/profile_extraction.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterator, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = os.getenv("PROFILE_EXTRACTION_STATE_PATH", "./mem0/profile_extraction.sqlite")
+
+
+@dataclass
+class ProfileJob:
+    content_hash: str
+    text: str
+    source: str
+
+
+class ProfileExtractionQueue:
+    """
+    Mem0 画像提取的后台任务队列。
+
+    mem0.remember() 是一次同步的 LLM 事实抽取调用，放在导入主路径上会拖慢同步、烧钱。
+    这里把它挪到后台线程：
+    - 按内容哈希去重 (已经提取过的内容不会再花钱)
+    - 把多篇小笔记合并成一次调用 (batch_max_chars)
+    - 限速 (max_calls_per_minute)，不和会议抢 LLM 额度
+    - 可以暂停：向量导入期间只排队，导入结束后再开始提取
+    """
+
+    def __init__(
+        self,
+        remember: Callable[[str], None],
+        state_path: str = DEFAULT_STATE_PATH,
+        max_calls_per_minute: int = 20,
+        batch_max_chars: int = 6000,
+        on_extracted: Optional[Callable[[List[ProfileJob]], None]] = None,
+    ):
+        """
+        :param remember: 真正执行画像提取的函数 (通常是 UserProfileService.remember)
+        :param state_path: 已提取内容哈希的持久化位置 (跟 Mem0 的存储放在一起)
+        :param on_extracted: 一批任务提取成功后的回调 (在后台线程中调用，用于推进导入日志)
+        """
+        self.remember = remember
+        self.on_extracted = on_extracted
+        self.min_interval = 60.0 / max_calls_per_minute if max_calls_per_minute > 0 else 0.0
+        self.batch_max_chars = batch_max_chars
+
+        parent = os.path.dirname(state_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(state_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS extracted (content_hash TEXT PRIMARY KEY, source TEXT, extracted_at REAL)"
+        )
+        self._conn.commit()
+
+        self._jobs: Deque[ProfileJob] = deque()
+        self._queued_hashes: Set[str] = set()
+        self._cond = threading.Condition()
+        self._pause_depth = 0
+        self._busy = False
+        self._stopped = False
+        self._last_call = 0.0
+        self._worker: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # 生产者接口
+    # ------------------------------------------------------------------
+    def submit(self, text: str, source: str = "unknown") -> bool:
+        """
+        提交一段文本等待画像提取
+        :return: False 表示内容已经提取过 / 已在队列中 (被去重)
+        """
+        if not text or not text.strip():
+            return False
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+        with self._cond:
+            if content_hash in self._queued_hashes or self.is_extracted(content_hash):
+                return False
+            self._queued_hashes.add(content_hash)
+            self._jobs.append(ProfileJob(content_hash=content_hash, text=text, source=source))
+            self._cond.notify_all()
+
+        self._ensure_worker()
+        return True
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._jobs) + (1 if self._busy else 0)
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """
+        暂停提取 (只排队不执行)，退出上下文后自动恢复。
+        用于"先把向量导入跑完，再做画像提取"。
+        """
+        with self._cond:
+            self._pause_depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._pause_depth -= 1
+                self._cond.notify_all()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        阻塞直到队列清空
+        :return: 是否在超时前清空
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._jobs or self._busy:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(timeout=remaining)
+        return True
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def is_extracted(self, content_hash: str) -> bool:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM extracted WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return row is not None
+
+    def _mark_extracted(self, jobs: List[ProfileJob]):
+        now = time.time()
+        with self._db_lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO extracted (content_hash, source, extracted_at) VALUES (?, ?, ?)",
+                [(job.content_hash, job.source, now) for job in jobs],
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # 后台线程
+    # ------------------------------------------------------------------
+    def _ensure_worker(self):
+        with self._cond:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name="profile-extraction", daemon=True)
+            self._worker.start()
+
+    def _take_batch(self) -> List[ProfileJob]:
+        """调用方需持有 self._cond"""
+        batch = [self._jobs.popleft()]
+        size = len(batch[0].text)
+        while self._jobs and size + len(self._jobs[0].text) <= self.batch_max_chars:
+            job = self._jobs.popleft()
+            batch.append(job)
+            size += len(job.text)
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._jobs or self._pause_depth > 0):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                batch = self._take_batch()
+                self._busy = True
+
+            # 限速：两次 LLM 调用之间至少间隔 min_interval 秒
+            wait = self._last_call + self.min_interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_call = time.time()
+
+            try:
+                self.remember("\n\n---\n\n".join(job.text for job in batch))
+                self._mark_extracted(batch)
+                if self.on_extracted:
+                    self.on_extracted(batch)
+                logger.info(f"🧠 [ProfileQueue] 已提取 {len(batch)} 篇笔记的画像，剩余 {len(self._jobs)} 篇")
+            except Exception as e:
+                logger.warning(f"⚠️ [ProfileQueue] 画像提取失败 ({len(batch)} 篇): {e}")
+            finally:
+                with self._cond:
+                    for job in batch:
+                        self._queued_hashes.discard(job.content_hash)
+                    self._busy = False
+                    self._cond.notify_all()
@@ -0,0 +1,107 @@
+# infrastructure/retrieval_stats.py
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+# 命中计数先攒在内存里，攒够这么多次命中或者距上次写入超过这么久才落盘
+RETRIEVAL_STATS_FLUSH_HITS = int(os.getenv("RETRIEVAL_STATS_FLUSH_HITS", "200"))
+RETRIEVAL_STATS_FLUSH_SECONDS = float(os.getenv("RETRIEVAL_STATS_FLUSH_SECONDS", "30"))
+
+
+class RetrievalStats:
+    """
+    记录每个笔记文件被检索命中的次数 (source_file → hits, last_hit_at)。
+    导入调度器用它判断哪些笔记"常被用到"，预算不够时优先导入它们。
+
+    检索是热路径，record 只在内存里累加，批量写入 SQLite；
+    进程退出时未落盘的计数会尽量写入，意外崩溃最多丢掉一个批次 (只影响调度优先级)。
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        flush_hits: int = RETRIEVAL_STATS_FLUSH_HITS,
+        flush_seconds: float = RETRIEVAL_STATS_FLUSH_SECONDS,
+    ):
+        self.db_path = db_path
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS retrievals (
+                path TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL,
+                last_hit_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+        self.flush_hits = flush_hits
+        self.flush_seconds = flush_seconds
+        self._pending: Counter = Counter()
+        self._pending_hits = 0
+        self._last_flush = time.time()
+        atexit.register(self.flush)
+
+    def record(self, source_files: List[str]):
+        """一次检索命中的 chunk 所属文件 (同一文件的多个 chunk 各算一次)"""
+        counts = Counter(path for path in source_files if path)
+        if not counts:
+            return
+        with self._lock:
+            self._pending.update(counts)
+            self._pending_hits += sum(counts.values())
+            due = (
+                self._pending_hits >= self.flush_hits
+                or time.time() - self._last_flush >= self.flush_seconds
+            )
+            if due:
+                self._flush_locked()
+
+    def flush(self):
+        """把内存里的命中计数写入 SQLite"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        now = time.time()
+        self._last_flush = now
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_hits = self._pending, Counter(), 0
+        try:
+            self._conn.executemany(
+                """
+                INSERT INTO retrievals (path, hits, last_hit_at) VALUES (?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    hits = hits + excluded.hits,
+                    last_hit_at = excluded.last_hit_at
+                """,
+                [(path, hits, now) for path, hits in pending.items()],
+            )
+            self._conn.commit()
+        except sqlite3.ProgrammingError:
+            pass  # 连接已关闭 (退出时 close 之后再次 flush)
+
+    def hits(self) -> Dict[str, int]:
+        """已落盘的计数 + 内存里还没写入的计数"""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, hits FROM retrievals").fetchall()
+            counts = Counter(dict(rows))
+            counts.update(self._pending)
+        return dict(counts)
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
+        atexit.unregister(self.flush)
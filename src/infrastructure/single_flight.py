@@ -0,0 +1,101 @@
+# infrastructure/single_flight.py
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """一次正在进行的调用：产出的事件按顺序记下来，后加入的订阅者先补发已有的事件，再跟随新事件"""
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, event: Any):
+        async with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None):
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: position < len(self.events) or self.done)
+                batch = self.events[position:]
+                done = self.done
+            position += len(batch)
+            for event in batch:
+                yield event
+            if done and position >= len(self.events):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class SingleFlight:
+    """
+    异步流的请求合并 (single-flight)：同一个 key 同时只执行一次，
+    并发的相同请求挂到正在进行的那一次上，收到完全相同的事件流 (包括加入之前已经产生的事件)。
+
+    执行在独立的 Task 里进行，和任何一个订阅者的生命周期无关：
+    发起者中途断开 (例如 Streamlit 页面重跑) 时，其他订阅者照常收到结果。
+    只能在同一个事件循环里使用。
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def running(self, key: Hashable) -> bool:
+        """key 是否有进行中的调用 (紧接着调用 stream 且中间没有 await 时，一定会挂到这次调用上)"""
+        return key in self._flights
+
+    async def stream(
+        self, key: Hashable, factory: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncIterator[Tuple[bool, Any]]:
+        """
+        :param factory: 没有进行中的调用时才会被调用，返回真正执行的异步迭代器
+        :return: 逐个产出 (是否挂在别人发起的调用上, 事件)
+        """
+        flight = self._flights.get(key)
+        joined = flight is not None
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._drive(key, flight, factory))
+        flight.subscribers += 1
+        if joined:
+            logger.info(f"🔗 [SingleFlight] 合并到进行中的调用 (当前 {flight.subscribers} 个请求)")
+        try:
+            async for event in flight.subscribe():
+                yield joined, event
+        finally:
+            # 收完 / 中途断开都算离开
+            flight.subscribers -= 1
+
+    async def _drive(self, key: Hashable, flight: _Flight, factory: Callable[[], AsyncIterator[Any]]):
+        error = None
+        try:
+            async for event in factory():
+                await flight.publish(event)
+        except BaseException as e:  # 包括取消：订阅者要收到同样的异常，而不是一直等下去
+            error = e
+        finally:
+            # 先摘掉再通知：结束之后到来的相同请求会重新执行 (拿到的是新的数据)
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            await flight.finish(error)
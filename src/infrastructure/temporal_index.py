@@ -0,0 +1,74 @@
+# infrastructure/temporal_index.py
+import os
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+
+class TemporalIndex:
+    """
+    按日期排序的 chunk 索引 (chunk_id → yyyymmdd)，和 Chroma 同步增删。
+
+    "昨天 / 上周 / 2023-10-18"这类查询先用它圈出时间范围内的 chunk，
+    在这些候选里单独做一次向量 / 关键词排序，再和全库检索结果加权融合。没有日期的 chunk 也会记录 (date 为 NULL)，
+    这样行数和向量库保持一致，方便判断是否需要从 Chroma 重建。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        parent = os.path.dirname(db_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunk_dates (
+                chunk_id TEXT PRIMARY KEY,
+                date INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_chunk_dates_date ON chunk_dates (date);
+            """
+        )
+        self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunk_dates").fetchone()[0]
+
+    def add(self, entries: Iterable[Tuple[str, Optional[int]]]):
+        """
+        :param entries: [(chunk_id, yyyymmdd 或 None), ...]
+        """
+        rows = list(entries)
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO chunk_dates (chunk_id, date) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def delete(self, chunk_ids: List[str]):
+        if not chunk_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunk_dates WHERE chunk_id = ?", [(chunk_id,) for chunk_id in chunk_ids])
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM chunk_dates")
+            self._conn.commit()
+
+    def ids_between(self, start: int, end: int) -> List[str]:
+        """日期在 [start, end] 内的 chunk (按日期排序)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM chunk_dates WHERE date BETWEEN ? AND ? ORDER BY date, chunk_id",
+                (start, end),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
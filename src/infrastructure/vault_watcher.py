@@ -0,0 +1,296 @@
+# infrastructure/vault_watcher.py
+import argparse
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from src.infrastructure.obsidian_loader import MemoryIngestionEngine, scan_markdown_files
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # 可选依赖：没有安装 watchdog 时退化为轮询
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+
+def _is_note(relative_path: str) -> bool:
+    """只关心 .md 笔记，跳过 .obsidian / .git / 编辑器临时文件等隐藏路径"""
+    if not relative_path.endswith(".md"):
+        return False
+    return not any(part.startswith(".") for part in relative_path.split(os.sep))
+
+
+class _WatchdogHandler(FileSystemEventHandler):
+    """把 watchdog 事件翻译成"某个相对路径需要重新同步"""
+
+    def __init__(self, watcher: "VaultWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        if event.is_directory and event.event_type == "modified":
+            # 子文件变化时父目录也会收到 modified，文件本身的事件已经足够
+            return
+
+        paths = [event.src_path]
+        if event.event_type == "moved":
+            # 重命名 / 移动 = 旧路径删除 + 新路径新增
+            paths.append(event.dest_path)
+
+        for path in paths:
+            if event.is_directory:
+                self.watcher.mark_directory(path)
+            else:
+                self.watcher.mark(path)
+
+
+class VaultWatcher:
+    """
+    Obsidian 库的实时监听守护进程。
+
+    - 优先使用 watchdog (Linux 上是 inotify)，没有安装时退化为轮询 mtime/size
+    - 防抖：编辑器连续保存只会在安静 debounce_seconds 之后触发一次
+    - 合并：同一路径的多次事件、重命名的新旧路径在一个批次里统一处理
+    - 只把变化的文件交给增量流水线；被删除的笔记清理掉它的 chunk
+    - 同步失败的文件放回待同步列表，按指数退避重试 (不会丢失改动)
+    """
+
+    def __init__(
+        self,
+        engine: MemoryIngestionEngine,
+        folder_path: str,
+        sync_mode: str = "full",
+        debounce_seconds: float = 1.5,
+        max_delay_seconds: float = 10.0,
+        poll_interval: float = 2.0,
+        force_polling: bool = False,
+        max_retry_delay: float = 300.0,
+    ):
+        """
+        :param max_delay_seconds: 文件被持续写入时，最多推迟这么久也要索引一次
+        :param max_retry_delay: 同步失败后重试的最长间隔 (从 debounce_seconds 开始每次翻倍)
+        :param poll_interval: 轮询模式下的扫描间隔 (只 stat，不读文件内容)
+        :param force_polling: 强制使用轮询 (例如网络盘 / Docker 挂载目录上 inotify 不可靠)
+        """
+        self.engine = engine
+        self.folder_path = os.path.abspath(folder_path)
+        self.sync_mode = sync_mode
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling or Observer is None
+        self.max_retry_delay = max_retry_delay
+
+        # 相对路径 → (第一次事件时间, 最后一次事件时间)
+        self._pending: Dict[str, Tuple[float, float]] = {}
+        # 同步失败的路径 → 最早的重试时间 (退避期间即使有新事件也不提前重试)
+        self._retry_at: Dict[str, float] = {}
+        self._consecutive_failures = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._observer = None
+        self._last_snapshot: Dict[str, Tuple[int, int]] = {}
+
+        self.stats = {"events": 0, "batches": 0, "indexed": 0, "deleted": 0, "last_sync_at": None, "last_error": None}
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+    @property
+    def backend(self) -> str:
+        if self._observer is not None:
+            return type(self._observer).__name__
+        return "polling"
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        if self.is_running:
+            return
+        if not os.path.isdir(self.folder_path):
+            raise ValueError(f"路径不存在: {self.folder_path}")
+
+        self._stop_event.clear()
+        # 启动时先补齐"监听没运行期间"发生的改动 (只比较 stat，不读内容)
+        self._catch_up()
+
+        if self.force_polling:
+            self._threads = [threading.Thread(target=self._poll_loop, name="vault-poller", daemon=True)]
+        else:
+            self._observer = Observer()
+            self._observer.schedule(_WatchdogHandler(self), self.folder_path, recursive=True)
+            self._observer.start()
+            self._threads = []
+        self._threads.append(threading.Thread(target=self._flush_loop, name="vault-flusher", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"👀 [Watcher] 开始监听 {self.folder_path} (后端: {self.backend})")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        logger.info(f"🛑 [Watcher] 已停止监听 {self.folder_path}")
+
+    # ------------------------------------------------------------------
+    # 事件入口
+    # ------------------------------------------------------------------
+    def mark(self, path: str):
+        """标记一个文件需要重新同步 (新增 / 修改 / 删除 / 重命名都一样，同步时再判断)"""
+        relative_path = os.path.relpath(path, self.folder_path)
+        if relative_path.startswith("..") or not _is_note(relative_path):
+            return
+        now = time.time()
+        with self._lock:
+            first_seen, _ = self._pending.get(relative_path, (now, now))
+            self._pending[relative_path] = (first_seen, now)
+            self.stats["events"] += 1
+
+    def mark_directory(self, path: str):
+        """
+        目录级事件 (整个文件夹被移动 / 删除 / 移入)：
+        inotify 不会为里面的每个文件单独发事件，这里展开成文件级标记
+        """
+        # 旧位置：清单中这个目录下的所有文件
+        for file_path in self.engine.manifest.entries_under(path):
+            self.mark(file_path)
+        # 新位置：目录里现存的所有笔记
+        if os.path.isdir(path):
+            for file_path in scan_markdown_files(path):
+                self.mark(file_path)
+
+    # ------------------------------------------------------------------
+    # 后台线程
+    # ------------------------------------------------------------------
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for file_path in scan_markdown_files(self.folder_path):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[os.path.relpath(file_path, self.folder_path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _catch_up(self):
+        self.engine.manifest.adopt_relative(self.folder_path)
+        snapshot = self._snapshot()
+        entries = {
+            os.path.relpath(file_path, self.folder_path): entry
+            for file_path, entry in self.engine.manifest.entries_under(self.folder_path).items()
+        }
+        for relative_path, (mtime_ns, size) in snapshot.items():
+            entry = entries.get(relative_path)
+            if entry is None or entry.mtime_ns != mtime_ns or entry.size != size:
+                self.mark(os.path.join(self.folder_path, relative_path))
+        for relative_path in entries:
+            if relative_path not in snapshot:
+                self.mark(os.path.join(self.folder_path, relative_path))
+        self._last_snapshot = snapshot
+
+    def _poll_loop(self):
+        while not self._stop_event.wait(self.poll_interval):
+            snapshot = self._snapshot()
+            previous = self._last_snapshot
+            for relative_path, state in snapshot.items():
+                if previous.get(relative_path) != state:
+                    self.mark(os.path.join(self.folder_path, relative_path))
+            for relative_path in previous:
+                if relative_path not in snapshot:
+                    self.mark(os.path.join(self.folder_path, relative_path))
+            self._last_snapshot = snapshot
+
+    def _take_ready(self) -> List[str]:
+        now = time.time()
+        ready = []
+        with self._lock:
+            for relative_path, (first_seen, last_seen) in list(self._pending.items()):
+                if now < self._retry_at.get(relative_path, 0.0):
+                    continue
+                if now - last_seen >= self.debounce_seconds or now - first_seen >= self.max_delay_seconds:
+                    ready.append(relative_path)
+                    del self._pending[relative_path]
+        return ready
+
+    def _requeue(self, relative_paths: List[str]) -> float:
+        """
+        同步失败：把这批路径放回待同步列表，连续失败的次数越多，等待越久
+        :return: 本次退避的秒数
+        """
+        now = time.time()
+        with self._lock:
+            self._consecutive_failures += 1
+            delay = min(self.debounce_seconds * 2 ** self._consecutive_failures, self.max_retry_delay)
+            for relative_path in relative_paths:
+                # 失败期间又收到新事件的路径保留原来的时间
+                self._pending.setdefault(relative_path, (now, now))
+                self._retry_at[relative_path] = now + delay
+        return delay
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(0.25):
+            ready = self._take_ready()
+            if not ready:
+                continue
+            try:
+                result = self.engine.sync_paths(self.folder_path, ready, sync_mode=self.sync_mode)
+                self.stats["batches"] += 1
+                self.stats["indexed"] += result["added"] + result["updated"]
+                self.stats["deleted"] += result["deleted"]
+                self.stats["last_sync_at"] = time.time()
+                with self._lock:
+                    self._consecutive_failures = 0
+                    for relative_path in ready:
+                        self._retry_at.pop(relative_path, None)
+                logger.info(
+                    f"👀 [Watcher] 同步 {len(ready)} 个变化: 新增 {result['added']} | "
+                    f"修改 {result['updated']} | 删除 {result['deleted']}"
+                )
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                delay = self._requeue(ready)
+                logger.warning(f"⚠️ [Watcher] 同步失败: {e}，{len(ready)} 个文件 {delay:.0f}s 后重试")
+
+
+def main():
+    from src.infrastructure.vector_store import KnowledgeBase
+
+    parser = argparse.ArgumentParser(description="实时监听 Obsidian 库并增量索引")
+    parser.add_argument("folder", help="Obsidian 库的根目录")
+    parser.add_argument("--vector-only", action="store_true", help="跳过画像提取")
+    parser.add_argument("--polling", action="store_true", help="强制使用轮询模式")
+    args = parser.parse_args()
+
+    kb = KnowledgeBase(persist_dir="./data/chroma_db", reset_db=False)
+    engine = MemoryIngestionEngine(knowledge_base=kb)
+    watcher = VaultWatcher(
+        engine,
+        args.folder,
+        sync_mode="vector_only" if args.vector_only else "full",
+        force_polling=args.polling,
+    )
+    watcher.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,37 @@
 # infrastructure/vector_store.py
 import shutil
 import os
-from typing import List
+import threading
+from typing import Any, Dict, List, Optional
 from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.documents import Document
 # ⬇️ 引入我们的核心模型
 from src.core.models.domain_models import LifeEvent
+from src.infrastructure.answer_cache import SemanticAnswerCache
+from src.infrastructure.data_versions import get_data_versions
+from src.infrastructure.date_resolver import DateRange, event_date_key
+from src.infrastructure.embedding_cache import get_embeddings
+from src.infrastructure.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from src.infrastructure.markdown_splitter import HEADERS_TO_SPLIT_ON
+from src.infrastructure.retrieval_stats import RetrievalStats
+from src.infrastructure.temporal_index import TemporalIndex
+
+# 时间范围内候选的排名在融合时的权重 (全库检索的权重是 1)
+TEMPORAL_RANKING_WEIGHT = float(os.getenv("TEMPORAL_RANKING_WEIGHT", "2.0"))
+
+
+def _lexical_text(content: str, metadata: Dict[str, Any]) -> str:
+    """关键词索引的文本：标题 (日期 / 标题 / 小节) 在切分时被剥离到了 metadata 里，这里拼回来"""
+    headers = [str(metadata[key]) for _, key in HEADERS_TO_SPLIT_ON if key in metadata]
+    return "\n".join([*headers, content])
+
 
 class KnowledgeBase:
     def __init__(self, persist_dir: str = "./data/chroma_db", reset_db: bool = False):
         # ... (这部分保持不变) ...
         self.persist_dir = persist_dir
-        self.embeddings = OllamaEmbeddings(model="nomic-embed-text:latest")
+        # 共享的带缓存 Embedding：重建向量库时见过的文本不再调用 Ollama
+        self.embeddings = get_embeddings()
         if reset_db and os.path.exists(persist_dir):
             shutil.rmtree(persist_dir)
         self.vector_db = Chroma(
@@ -20,28 +39,215 @@ class KnowledgeBase:
             embedding_function=self.embeddings,
             persist_directory=self.persist_dir
         )
+        # 检索命中统计：导入调度器据此优先导入常用笔记
+        self.retrieval_stats = RetrievalStats(os.path.join(self.persist_dir, "retrieval_stats.sqlite"))
+        # 关键词倒排索引：和 Chroma 同步增删，检索时与向量结果做 RRF 融合
+        self.lexical_index = LexicalIndex(os.path.join(self.persist_dir, "lexical_index.sqlite"))
+        # 时间索引：按日期圈出候选并提升排名 ("昨天" / "上周" / "2023-10-18")
+        self.temporal_index = TemporalIndex(os.path.join(self.persist_dir, "temporal_index.sqlite"))
+        if self.vector_db._collection.count() > 0 and (
+            self.lexical_index.count() == 0 or self.temporal_index.count() == 0
+        ):
+            self.rebuild_side_indexes()
+        # 史官报告的语义缓存：任何参与生成报告的 chunk 被重新导入 / 删除时自动失效
+        self.answer_cache = SemanticAnswerCache(os.path.join(self.persist_dir, "answer_cache.sqlite"))
+        # 知识库的数据版本：每次写入 / 删除 +1，整场会议的结果缓存用它判断知识库是否变过
+        self.version_key = f"knowledge_base:{os.path.abspath(self.persist_dir)}"
+        if reset_db:
+            get_data_versions().bump(self.version_key)
+        # 内存倒排表在后台预热，避免第一次检索等待加载
+        threading.Thread(target=self.lexical_index.preload, daemon=True).start()
+
+    def rebuild_side_indexes(self, batch_size: int = 5000):
+        """从 Chroma 全量重建关键词索引和时间索引 (升级后第一次启动 / 索引文件丢失时)"""
+        collection = self.vector_db._collection
+        self.lexical_index.clear()
+        self.temporal_index.clear()
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            rows = [
+                (chunk_id, document, metadata or {})
+                for chunk_id, document, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"])
+            ]
+            self.lexical_index.add((chunk_id, _lexical_text(document, metadata)) for chunk_id, document, metadata in rows)
+            self.temporal_index.add((chunk_id, event_date_key(metadata)) for chunk_id, _, metadata in rows)
+        print(f"🔤 [KnowledgeBase] 已重建关键词索引和时间索引: {total} 个 chunk")
+
+    def reindex_sources(self, source_files: List[str], batch_size: int = 100) -> int:
+        """
+        按来源文件从 Chroma 重新写入关键词索引和时间索引
+        (写入 Chroma 之后、更新侧索引之前中断的文件：这些 chunk 之后会被当作已存在而跳过)
+        :return: 重新索引的 chunk 数
+        """
+        collection = self.vector_db._collection
+        ids: List[str] = []
+        for start in range(0, len(source_files), batch_size):
+            batch = collection.get(
+                where={"source_file": {"$in": source_files[start:start + batch_size]}},
+                include=["documents", "metadatas"],
+            )
+            rows = [
+                (chunk_id, document, metadata or {})
+                for chunk_id, document, metadata in zip(batch["ids"], batch["documents"], batch["metadatas"])
+            ]
+            self.lexical_index.add((chunk_id, _lexical_text(document, metadata)) for chunk_id, document, metadata in rows)
+            self.temporal_index.add((chunk_id, event_date_key(metadata)) for chunk_id, _, metadata in rows)
+            ids.extend(chunk_id for chunk_id, _, _ in rows)
+        if ids:
+            self.answer_cache.invalidate_chunks(ids)
+            get_data_versions().bump(self.version_key)
+        return len(ids)
+
+    def filter_new_events(self, events: List[LifeEvent]) -> List[LifeEvent]:
+        """
+        去掉批次内重复 ID 和库里已经存在的 ID，只留下真正需要 Embedding 的事件。
+        ID 是内容寻址的，库里已存在的 ID 说明内容完全相同，可以直接跳过。
+        """
+        # 同一批次内去重 (Chroma 不允许一次 upsert 里出现重复 ID)
+        unique_events = list({event.id: event for event in events}.values())
+        if not unique_events:
+            return []
+
+        existing_ids = set(self.vector_db.get(ids=[event.id for event in unique_events], include=[])["ids"])
+        return [event for event in unique_events if event.id not in existing_ids]
 
     def add_events(self, events: List[LifeEvent]):
         """
         [变更]: 现在接收强类型的 LifeEvent 列表
+        [幂等]: 按 LifeEvent.id upsert，已存在的 ID 直接跳过，不重复 Embedding。
         """
         if not events:
             return
-        
+
+        new_events = self.filter_new_events(events)
+        if not new_events:
+            print(f"💾 [KnowledgeBase] {len(events)} 个 LifeEvent 均已存在，跳过写入。")
+            return
+
+        vectors = self.embeddings.embed_documents([event.content for event in new_events])
+        self.add_embedded_events(new_events, vectors)
+
+        print(
+            f"💾 [KnowledgeBase] 已存入 {len(new_events)} 个 LifeEvent 对象"
+            f" (跳过已存在 {len(events) - len(new_events)} 个)。"
+        )
+
+    def add_embedded_events(self, events: List[LifeEvent], vectors: List[List[float]]):
+        """
+        写入已经算好向量的 LifeEvent (导入流水线的写入阶段一次提交一大批)
+        """
+        if not events:
+            return
+
         # 转换: LifeEvent -> LangChain Document
         docs = [event.to_langchain_document() for event in events]
-        
-        # 存入 Chroma (使用 LifeEvent 的 UUID 作为数据库 ID)
-        ids = [event.id for event in events]
-        self.vector_db.add_documents(documents=docs, ids=ids)
-        
-        print(f"💾 [KnowledgeBase] 已存入 {len(events)} 个 LifeEvent 对象。")
 
-    def search(self, query: str, k: int = 5) -> List[LifeEvent]:
+        # 存入 Chroma (使用 LifeEvent 的内容寻址 ID 作为数据库 ID，upsert 保证幂等)
+        # Chroma 单次写入有上限，超过时分批提交
+        collection = self.vector_db._collection
+        max_batch = self.vector_db._client.get_max_batch_size()
+        for start in range(0, len(docs), max_batch):
+            end = start + max_batch
+            collection.upsert(
+                ids=[event.id for event in events[start:end]],
+                embeddings=vectors[start:end],
+                documents=[doc.page_content for doc in docs[start:end]],
+                metadatas=[doc.metadata for doc in docs[start:end]],
+            )
+        self.lexical_index.add((event.id, _lexical_text(event.content, event.metadata)) for event in events)
+        self.temporal_index.add((event.id, event_date_key(event.metadata)) for event in events)
+        self.answer_cache.invalidate_chunks([event.id for event in events])
+        get_data_versions().bump(self.version_key)
+
+    def delete_events(self, ids: List[str]):
+        """
+        按 ID 删除向量 (增量同步时清理被修改/删除文件的旧 chunk)
+        """
+        if not ids:
+            return
+
+        self.vector_db.delete(ids=ids)
+        self.lexical_index.delete(ids)
+        self.temporal_index.delete(ids)
+        self.answer_cache.invalidate_chunks(ids)
+        get_data_versions().bump(self.version_key)
+        print(f"🗑️ [KnowledgeBase] 已删除 {len(ids)} 个过期的 LifeEvent 对象。")
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        hybrid: bool = True,
+        date_range: Optional[DateRange] = None,
+    ) -> List[LifeEvent]:
         """
         [变更]: 返回 LifeEvent 列表，而不是 Document
+        [混合检索]: 向量检索 + BM25 关键词检索，按倒数排名融合 (RRF)
+        [时间加权]: 传入 date_range 时，用时间索引圈出范围内的 chunk，在候选里再排一次序，
+                    和全库检索结果加权融合。时间范围只是提升排名，不是硬过滤：
+                    日期解析错了 / 笔记没写日期 / 范围内记录不足 k 条时，全库的相关记录照样能返回
+        :param hybrid: False 时只做向量检索
         """
-        raw_docs = self.vector_db.similarity_search(query, k=k)
-        
-        # 转换: LangChain Document -> LifeEvent
-        return [LifeEvent.from_langchain_document(doc) for doc in raw_docs]
+        # 混合检索时每一路都多取一些候选，融合后再截断
+        fetch_k = max(k * 4, 20) if hybrid else k
+        query_embedding = self.embeddings.embed_query(query)
+
+        vector_events: Dict[str, LifeEvent] = {}
+        rankings, weights = [], []
+
+        def add_rankings(candidate_ids: Optional[List[str]], weight: float):
+            ranked = self._vector_search(query_embedding, fetch_k, candidate_ids)
+            for event in ranked:
+                vector_events.setdefault(event.id, event)
+            rankings.append([event.id for event in ranked])
+            weights.append(weight)
+            if hybrid:
+                lexical = self.lexical_index.search(query, k=fetch_k, allowed_ids=candidate_ids)
+                rankings.append([chunk_id for chunk_id, _ in lexical])
+                weights.append(weight)
+
+        add_rankings(None, 1.0)
+        if date_range is not None:
+            candidate_ids = self.temporal_index.ids_between(date_range.start_key, date_range.end_key)
+            if candidate_ids:
+                add_rankings(candidate_ids, TEMPORAL_RANKING_WEIGHT)
+
+        fused_ids = reciprocal_rank_fusion(rankings, weights=weights)[:k]
+        events = self._resolve_events(fused_ids, vector_events)
+
+        self.retrieval_stats.record([event.metadata.get("source_file") for event in events])
+        return events
+
+    def _vector_search(
+        self, query_embedding: List[float], k: int, candidate_ids: Optional[List[str]] = None
+    ) -> List[LifeEvent]:
+        """
+        向量检索 (查询向量由调用方算好，全库和时间范围两路共用)
+        :param candidate_ids: 只在这些 chunk 中检索
+        """
+        collection = self.vector_db._collection
+        n_results = min(k, len(candidate_ids) if candidate_ids is not None else collection.count())
+        if n_results <= 0:
+            return []
+        result = collection.query(
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            ids=candidate_ids,
+            include=["documents", "metadatas"],
+        )
+        return [
+            LifeEvent.from_langchain_document(Document(page_content=document, metadata=metadata or {}))
+            for document, metadata in zip(result["documents"][0], result["metadatas"][0])
+        ]
+
+    def _resolve_events(self, ids: List[str], known: Dict[str, LifeEvent]) -> List[LifeEvent]:
+        """按 ID 顺序取回 LifeEvent (只命中关键词的 chunk 需要回 Chroma 取正文)"""
+        missing = [chunk_id for chunk_id in ids if chunk_id not in known]
+        if missing:
+            fetched = self.vector_db._collection.get(ids=missing, include=["documents", "metadatas"])
+            for chunk_id, document, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+                known[chunk_id] = LifeEvent.from_langchain_document(
+                    Document(page_content=document, metadata=metadata or {})
+                )
+        return [known[chunk_id] for chunk_id in ids if chunk_id in known]
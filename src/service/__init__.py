@@ -0,0 +1 @@
+"""Headless entry points: HTTP/SSE service (python -m src.service.server) and batch runner (python -m src.service.batch)."""
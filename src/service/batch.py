@@ -0,0 +1,238 @@
+# service/batch.py
+"""
+批量开会：把一组离线问题 (每周复盘、评估用例等) 以有限并发交给同一个 BoardOrchestrator。
+
+- 并发：最多 concurrency 场会议同时进行 (LLM 调用本身还受 llm_registry 的限流约束)
+- 共享查询：开会前把所有问题的向量一次性批量算好 (史官检索和 Mem0 画像检索共用同一个带缓存的 Embedding)，
+  归一化后相同的问题 (同样的辩论模式) 只开一场会，其余直接复用结果；记账不合并 (两行相同的记账是两笔账)
+- 结果：每个问题一行 JSON，包含决议、各节点耗时 / 输出 token 数、LLM 用量 (按模型)，按完成顺序写入
+
+用法:
+    python -m src.service.batch --queries questions.jsonl --output results.jsonl --concurrency 8
+questions.jsonl 每行一个 {"query": "...", "id"?: ..., "debate_mode"?: "sequential" | "parallel"}，
+其余字段原样放进结果的 meta 里。
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, TextIO
+
+from langchain_core.callbacks import get_usage_metadata_callback
+
+from src.infrastructure.context_budget import count_tokens
+from src.infrastructure.embedding_cache import get_embeddings
+from src.infrastructure.meeting_cache import normalize_query
+
+DEFAULT_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# 输入里除了这些字段，其余都原样放进结果的 meta
+_REQUEST_FIELDS = ("query", "id", "debate_mode")
+
+
+def load_requests(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+    for i, request in enumerate(requests):
+        if not isinstance(request, dict) or not str(request.get("query", "")).strip():
+            raise ValueError(f"第 {i + 1} 行缺少 query")
+    return requests
+
+
+def _usage_totals(usage: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    return {
+        field: sum(model_usage.get(field, 0) for model_usage in usage.values())
+        for field in ("input_tokens", "output_tokens", "total_tokens")
+    }
+
+
+class BatchRunner:
+    def __init__(self, orchestrator, concurrency: int = DEFAULT_CONCURRENCY, force_refresh: bool = False):
+        """
+        :param orchestrator: 已经初始化好的 BoardOrchestrator (所有问题共用)
+        :param force_refresh: 跳过整场会议的结果缓存，每个问题都真正开会
+        """
+        self.orchestrator = orchestrator
+        self.concurrency = max(1, concurrency)
+        self.force_refresh = force_refresh
+
+    def prefetch_embeddings(self, queries: List[str]) -> int:
+        """
+        所有问题的向量一次性批量计算并写入 Embedding 缓存：
+        之后每场会议里史官的检索、Mem0 的画像检索都直接命中缓存，不再各自请求一次 Embedding 模型
+        :return: 去重后的问题数
+        """
+        unique = list(dict.fromkeys(queries))
+        if unique:
+            get_embeddings().embed_documents(unique)
+        return len(unique)
+
+    async def run_one(self, index: int, request: Dict[str, Any]) -> Dict[str, Any]:
+        """开一场会，收集最终 State、各节点耗时 / 输出 token 数和本场会议的 LLM 用量"""
+        query = request["query"]
+        nodes: Dict[str, Dict[str, Any]] = {}
+        final: Dict[str, Any] = {}
+        started = time.perf_counter()
+        error = None
+        # 回调通过 contextvar 生效：会议在本协程 (或它创建的 Task) 里执行，只统计这一场会议的调用
+        with get_usage_metadata_callback() as usage_callback:
+            try:
+                async for event in self.orchestrator.astream_meeting(
+                    query, debate_mode=request.get("debate_mode"), force_refresh=self.force_refresh
+                ):
+                    if event["type"] == "node_end":
+                        output = event.get("output") or {}
+                        nodes[event["node"]] = {
+                            "duration": round(event["duration"], 3) if event.get("duration") is not None else None,
+                            "output_tokens": sum(
+                                count_tokens(value) for value in output.values() if isinstance(value, str)
+                            ),
+                            **({"degraded": event["degraded"]} if event.get("degraded") else {}),
+                        }
+                    elif event["type"] == "final":
+                        final = event
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            usage = {model: dict(model_usage) for model, model_usage in usage_callback.usage_metadata.items()}
+
+        state = final.get("state", {})
+        return {
+            "index": index,
+            "id": request.get("id", index),
+            "query": query,
+            "status": "error" if error else "ok",
+            "error": error,
+            "meeting_id": final.get("meeting_id"),
+            "final_verdict": state.get("final_verdict"),
+            "cfo_result": state.get("cfo_result"),
+            "degraded": state.get("degraded", []),
+            "cached": bool(final.get("cached")),
+            "coalesced": bool(final.get("coalesced")),
+            "latency": round(time.perf_counter() - started, 3),
+            "nodes": nodes,
+            "usage": usage,
+            "tokens": _usage_totals(usage),
+            "meta": {key: value for key, value in request.items() if key not in _REQUEST_FIELDS},
+        }
+
+    async def _split_transactions(self, requests: List[Dict[str, Any]], groups: List[List[int]]) -> List[List[int]]:
+        """有重复的问题先路由：记账的每一行都要单独执行，拆回单独的会议"""
+        duplicated = [indices for indices in groups if len(indices) > 1]
+        intents = await asyncio.gather(
+            *(self.orchestrator.router.adecide(requests[indices[0]]["query"]) for indices in duplicated)
+        )
+        meetings = [indices for indices in groups if len(indices) == 1]
+        for indices, intent in zip(duplicated, intents):
+            if intent == "finance_execution":
+                meetings.extend([index] for index in indices)
+            else:
+                meetings.append(indices)
+        return meetings
+
+    async def run(self, requests: List[Dict[str, Any]], output: Optional[TextIO] = None) -> Dict[str, Any]:
+        """
+        :param output: 每完成一个问题就写入一行 JSON 并 flush (中途中断时已完成的结果不会丢)
+        :return: 汇总统计 (总耗时、逐个顺序执行的估计耗时、token 总量等)
+        """
+        started = time.perf_counter()
+        print(f"📦 [Batch] {len(requests)} 个问题，并发 {self.concurrency}")
+        unique_queries = await asyncio.to_thread(
+            self.prefetch_embeddings, [request["query"] for request in requests]
+        )
+
+        # 归一化后相同的问题只开一场会，其余的等它的结果
+        groups: Dict[tuple, List[int]] = defaultdict(list)
+        for index, request in enumerate(requests):
+            debate_mode = request.get("debate_mode") or self.orchestrator.debate_mode
+            groups[(normalize_query(request["query"]), debate_mode)].append(index)
+        meetings = await self._split_transactions(requests, list(groups.values()))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: List[Dict[str, Any]] = []
+
+        def emit(result: Dict[str, Any]):
+            results.append(result)
+            if output is not None:
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+            icon = "✅" if result["status"] == "ok" else "❌"
+            print(f"{icon} [Batch] {len(results)}/{len(requests)} {result['query'][:20]}... {result['latency']:.2f}s")
+
+        async def run_group(indices: List[int]):
+            async with semaphore:
+                leader = await self.run_one(indices[0], requests[indices[0]])
+            emit(leader)
+            for index in indices[1:]:
+                request = requests[index]
+                emit({
+                    **leader,
+                    "index": index,
+                    "id": request.get("id", index),
+                    "query": request["query"],
+                    "shared_with": leader["index"],  # 复用了这个问题的会议结果，没有另开一场
+                    "latency": 0.0,
+                    "usage": {},
+                    "tokens": _usage_totals({}),
+                    "meta": {key: value for key, value in request.items() if key not in _REQUEST_FIELDS},
+                })
+
+        await asyncio.gather(*(run_group(indices) for indices in meetings))
+
+        wall_time = time.perf_counter() - started
+        # 逐个顺序执行时大约需要的时间：每场会议单独的耗时之和
+        sequential_time = sum(result["latency"] for result in results)
+        summary = {
+            "requests": len(requests),
+            "meetings": len(meetings),
+            "unique_queries": unique_queries,
+            "ok": sum(result["status"] == "ok" for result in results),
+            "errors": sum(result["status"] == "error" for result in results),
+            "cached": sum(result["cached"] for result in results),
+            "concurrency": self.concurrency,
+            "wall_time": round(wall_time, 3),
+            "sequential_time": round(sequential_time, 3),
+            "speedup": round(sequential_time / wall_time, 2) if wall_time > 0 else None,
+            "tokens": {
+                field: sum(result["tokens"][field] for result in results)
+                for field in ("input_tokens", "output_tokens", "total_tokens")
+            },
+        }
+        return summary
+
+
+def main():
+    from src.agents.orchestrator import BoardOrchestrator
+    from src.infrastructure.vector_store import KnowledgeBase
+
+    parser = argparse.ArgumentParser(description="批量开会：JSONL 问题集 → JSONL 结果")
+    parser.add_argument("--queries", required=True, help="JSONL 文件，每行 {\"query\": ..., \"id\"?: ..., \"debate_mode\"?: ...}")
+    parser.add_argument("--output", required=True, help="结果 JSONL 文件 (每个问题一行，按完成顺序)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="同时进行的会议数")
+    parser.add_argument("--persist-dir", default="./data/chroma_db", help="知识库目录")
+    parser.add_argument("--force-refresh", action="store_true", help="跳过整场会议的结果缓存")
+    parser.add_argument("--remember", action="store_true", help="把决议写入 Mem0 (默认不写，避免批量问题污染用户画像)")
+    parser.add_argument("--summary", help="把汇总统计写入 JSON 文件")
+    args = parser.parse_args()
+
+    requests = load_requests(args.queries)
+    kb = KnowledgeBase(persist_dir=args.persist_dir, reset_db=False)
+    orchestrator = BoardOrchestrator(vector_store=kb, remember_verdicts=args.remember)
+    runner = BatchRunner(orchestrator, concurrency=args.concurrency, force_refresh=args.force_refresh)
+    with open(args.output, "w", encoding="utf-8") as output:
+        summary = asyncio.run(runner.run(requests, output))
+
+    print(
+        f"\n📊 [Batch] {summary['ok']}/{summary['requests']} 成功 | 实际开会 {summary['meetings']} 场"
+        f" (缓存命中 {summary['cached']}) | 总耗时 {summary['wall_time']}s"
+        f" | 顺序执行约 {summary['sequential_time']}s ({summary['speedup']}x)"
+        f" | tokens {summary['tokens']['total_tokens']}"
+    )
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"💾 汇总已写入 {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# service/client.py
+"""
+Echo-Board HTTP / SSE 服务的同步客户端 (Streamlit 的脚本线程里直接用)。
+设置 ECHO_BOARD_API_URL 后 UI 只作为瘦客户端，会议和同步都交给服务端执行。
+"""
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+from httpx_sse import connect_sse
+
+API_URL = os.getenv("ECHO_BOARD_API_URL", "")
+API_TOKEN = os.getenv("ECHO_BOARD_API_TOKEN", "")
+# 轮询同步进度的间隔 (秒)
+INGEST_POLL_SECONDS = 0.5
+
+
+class BoardServiceError(RuntimeError):
+    """服务端返回错误 (HTTP 错误码，或会议事件流里的 error 事件)"""
+
+
+class BoardClient:
+    def __init__(self, base_url: str = API_URL, api_token: str = API_TOKEN, timeout: float = 30.0):
+        headers = {"Authorization": f"Bearer {api_token}"} if api_token else {}
+        # 会议事件流的读超时不设上限：服务端会定期发 SSE 心跳
+        self._http = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=httpx.Timeout(timeout, read=None),
+        )
+
+    @staticmethod
+    def _check(response: httpx.Response) -> Dict[str, Any]:
+        if response.is_error:
+            try:
+                message = response.json().get("error", response.text)
+            except ValueError:
+                message = response.text
+            raise BoardServiceError(f"HTTP {response.status_code}: {message}")
+        return response.json()
+
+    def health(self) -> Dict[str, Any]:
+        return self._check(self._http.get("/healthz"))
+
+    def stream_meeting(
+        self,
+        query: str,
+        debate_mode: Optional[str] = None,
+        meeting_id: Optional[str] = None,
+        force_refresh: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """逐个产出和 BoardOrchestrator.astream_meeting 相同结构的事件"""
+        body = {"query": query, "debate_mode": debate_mode, "meeting_id": meeting_id, "force_refresh": force_refresh}
+        with connect_sse(self._http, "POST", "/meetings/stream", json=body) as source:
+            if source.response.is_error:
+                source.response.read()
+                self._check(source.response)
+            for sse in source.iter_sse():
+                if not sse.data:
+                    continue
+                event = json.loads(sse.data)
+                if event["type"] == "error":
+                    raise BoardServiceError(event["error"])
+                yield event
+
+    def run_meeting(self, query: str, **options: Any) -> Dict[str, Any]:
+        """开会并返回会议结束时的完整 State"""
+        return self._check(self._http.post("/meetings", json={"query": query, **options}, timeout=None))["state"]
+
+    def replay_meeting(self, meeting_id: str) -> Iterator[Dict[str, Any]]:
+        with connect_sse(self._http, "GET", f"/meetings/{meeting_id}/replay") as source:
+            if source.response.is_error:
+                source.response.read()
+                self._check(source.response)
+            for sse in source.iter_sse():
+                if sse.data:
+                    yield json.loads(sse.data)
+
+    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        return self._check(self._http.get("/search", params={"q": query, "k": k}))["results"]
+
+    def start_ingest(self, folder_path: str, sync_mode: str = "full", unlimited: bool = False) -> Dict[str, Any]:
+        """
+        在服务端后台同步 (folder_path 是服务端的路径)，返回任务状态 (含 job_id / total)
+        :param unlimited: 不限预算，一次导入全部改动 (默认按服务端的 INGEST_MAX_* 预算)
+        """
+        return self._check(self._http.post(
+            "/ingest", json={"folder_path": folder_path, "sync_mode": sync_mode, "unlimited": unlimited}
+        ))
+
+    def wait_ingest(
+        self,
+        job_id: str,
+        on_progress: Optional[Callable[[str, str, Optional[float]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        轮询同步任务直到结束
+        :param on_progress: (relative_path, status, eta_seconds)，每个文件事件调用一次
+        :return: ingest_folder 的统计结果
+        """
+        since = 0
+        while True:
+            job = self._check(self._http.get(f"/ingest/{job_id}", params={"since": since}))
+            for relative_path, status in job["events"]:
+                if on_progress:
+                    on_progress(relative_path, status, job["eta"])
+            since = job["processed"]
+            if job["status"] == "failed":
+                raise BoardServiceError(job["error"])
+            if job["status"] == "complete":
+                return job["stats"]
+            time.sleep(INGEST_POLL_SECONDS)
+
+    def close(self):
+        self._http.close()
@@ -0,0 +1,379 @@
+# service/server.py
+"""
+Echo-Board 的无界面 HTTP / SSE 服务：进程启动时加载一次知识库和 BoardOrchestrator，
+所有客户端的会议都在同一个事件循环上并发进行 (同时提交的相同会议自动合并成一场)。
+
+接口:
+    GET  /healthz                         存活检查 + 进行中的会议数 (不需要鉴权，给负载均衡探活用)
+    POST /meetings                        开会，返回会议结束时的完整 State (JSON)
+    POST /meetings/stream                 开会，以 SSE 推送节点进度和 token (事件名 = MeetingEvent 的 type)
+    POST /meetings/{meeting_id}/resume    从检查点继续一场失败 / 中断的会议
+    GET  /meetings/{meeting_id}/replay    以 SSE 回放一场会议的检查点 (不调用 LLM)
+    GET  /search?q=...&k=5                直接检索知识库
+    POST /ingest                          在后台同步一个 Obsidian 库 (服务端的路径)，返回任务 id
+    GET  /ingest/{job_id}?since=N         同步进度 (第 N 条之后的文件事件) 和最终统计
+
+水平扩展：服务本身不保存会话状态，可以在负载均衡后面部署多个实例。
+会议检查点 / 会议缓存 / 数据版本都是 SQLite 文件，同一台机器上的多个 worker 共享 ./data 即可；
+跨机器部署时需要让同一个 meeting_id 的请求落到同一个实例 (续开 / 回放要读它的检查点)。
+相同会议的合并只在单个进程内生效。
+
+用法:
+    python -m src.service.server                          # SERVICE_HOST / SERVICE_PORT / SERVICE_WORKERS
+    uvicorn src.service.server:app --workers 4            # 每个 worker 各加载一份编排器
+设置 ECHO_BOARD_API_TOKEN 后，除 /healthz 外的请求都需要带 "Authorization: Bearer <token>"。
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import uvicorn
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from src.agents.orchestrator import DEBATE_MODES, BoardOrchestrator, MeetingEvent
+from src.infrastructure.date_resolver import resolve_date_range
+from src.infrastructure.ingestion_scheduler import IngestionBudget
+from src.infrastructure.obsidian_loader import MemoryIngestionEngine, scan_markdown_files
+from src.infrastructure.vault_watcher import VaultWatcher
+from src.infrastructure.vector_store import KnowledgeBase
+
+logger = logging.getLogger(__name__)
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "1"))
+# 为空表示不鉴权 (只在本机监听时这样用)
+API_TOKEN = os.getenv("ECHO_BOARD_API_TOKEN", "")
+CHROMA_DIR = os.getenv("SERVICE_CHROMA_DIR", "./data/chroma_db")
+# 设置后服务启动时开始监听这个库，笔记保存后自动增量索引 (多实例部署时只在一个实例上开启)
+WATCH_VAULT = os.getenv("SERVICE_WATCH_VAULT", "")
+WATCH_SYNC_MODE = os.getenv("SERVICE_WATCH_SYNC_MODE", "full")
+# 最多保留多少个已结束的同步任务的状态
+MAX_FINISHED_JOBS = 50
+# SSE 心跳间隔 (秒)：会议中途长时间没有事件时，防止代理 / 负载均衡把连接当成空闲断开
+SSE_PING_SECONDS = int(os.getenv("SERVICE_SSE_PING", "15"))
+SYNC_MODES = ("full", "vector_only")
+
+
+class IngestJob:
+    """一次后台同步任务的进度 (文件事件按顺序追加，客户端用 since 增量拉取)"""
+
+    def __init__(self, folder_path: str, sync_mode: str, total: int, unlimited: bool = False):
+        self.job_id = uuid.uuid4().hex
+        self.folder_path = folder_path
+        self.sync_mode = sync_mode
+        self.unlimited = unlimited  # 不限预算 (默认按 INGEST_MAX_* 环境变量的预算导入)
+        self.total = total
+        self.status = "running"
+        self.events: List[Tuple[str, str]] = []  # (relative_path, status)
+        self.eta: Optional[float] = None
+        self.stats: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def on_progress(self, relative_path: str, status: str, stats):
+        # 在导入流水线的工作线程里调用；list.append 是原子的
+        self.events.append((relative_path, status))
+        self.eta = stats.eta_seconds
+
+    def run(self, engine: MemoryIngestionEngine):
+        try:
+            self.stats = engine.ingest_folder(
+                self.folder_path,
+                budget=IngestionBudget.no_limits() if self.unlimited else None,
+                on_progress=self.on_progress,
+                sync_mode=self.sync_mode,
+            )
+            self.status = "complete"
+        except Exception as e:
+            logger.exception(f"❌ [Service] 同步失败: {self.folder_path}")
+            self.error = str(e)
+            self.status = "failed"
+        finally:
+            self.finished_at = time.time()
+
+    def to_dict(self, since: int = 0) -> Dict[str, Any]:
+        # 先读状态再取事件：状态是 complete 时事件一定已经全部追加完
+        status = self.status
+        events = self.events[since:]
+        return {
+            "job_id": self.job_id,
+            "folder_path": self.folder_path,
+            "sync_mode": self.sync_mode,
+            "unlimited": self.unlimited,
+            "status": status,
+            "total": self.total,
+            "processed": since + len(events),
+            "events": events,
+            "eta": self.eta,
+            "stats": self.stats,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class TokenAuthMiddleware:
+    """Bearer token 鉴权 (纯 ASGI 中间件，不会缓冲 SSE 响应)"""
+
+    def __init__(self, app, token: str):
+        self.app = app
+        self.expected = f"Bearer {token}".encode("utf-8")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] != "/healthz":
+            provided = dict(scope["headers"]).get(b"authorization", b"")
+            if not hmac.compare_digest(provided, self.expected):
+                await JSONResponse({"error": "unauthorized"}, status_code=401)(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+def build_board(chroma_dir: str = CHROMA_DIR) -> Tuple[KnowledgeBase, MemoryIngestionEngine, BoardOrchestrator]:
+    """冷启动：知识库 + 导入引擎 + 编排器，每个进程只做一次"""
+    kb = KnowledgeBase(persist_dir=chroma_dir, reset_db=False)
+    engine = MemoryIngestionEngine(knowledge_base=kb)
+    orchestrator = BoardOrchestrator(vector_store=kb)
+    return kb, engine, orchestrator
+
+
+def _error(message: str, status_code: int) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+def _sse(event: Dict[str, Any]) -> ServerSentEvent:
+    return ServerSentEvent(data=json.dumps(event, ensure_ascii=False, default=str), event=event["type"])
+
+
+async def _sse_stream(events: AsyncIterator[MeetingEvent]) -> AsyncIterator[ServerSentEvent]:
+    """会议事件 → SSE；会议出错时发一个 error 事件再结束 (响应头已经发出，没法再改状态码)"""
+    try:
+        async for event in events:
+            yield _sse(event)
+    except Exception as e:
+        logger.exception("❌ [Service] 会议出错")
+        yield _sse({"type": "error", "error": str(e)})
+
+
+async def _read_meeting_request(request: Request) -> Dict[str, Any]:
+    """解析开会请求的 JSON: {query, debate_mode?, meeting_id?, force_refresh?}，不合法时抛 ValueError"""
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise ValueError("请求体不是合法的 JSON")
+    if not isinstance(body, dict):
+        raise ValueError("请求体必须是 JSON 对象")
+    query = body.get("query") or ""
+    meeting_id = body.get("meeting_id")
+    # 续开会议时问题可以为空 (从检查点里读)
+    if not isinstance(query, str) or not (query.strip() or meeting_id):
+        raise ValueError("缺少 query")
+    debate_mode = body.get("debate_mode")
+    if debate_mode is not None and debate_mode not in DEBATE_MODES:
+        raise ValueError(f"未知的辩论模式: {debate_mode} (可选: {', '.join(DEBATE_MODES)})")
+    return {
+        "user_query": query.strip(),
+        "debate_mode": debate_mode,
+        "meeting_id": meeting_id,
+        "force_refresh": bool(body.get("force_refresh", False)),
+    }
+
+
+async def healthz(request: Request) -> JSONResponse:
+    orchestrator: BoardOrchestrator = request.app.state.orchestrator
+    inflight = orchestrator.inflight
+    return JSONResponse({
+        "status": "ok",
+        "meetings_in_flight": inflight.in_flight() if inflight is not None else None,
+        "ingest_jobs_running": sum(job.status == "running" for job in request.app.state.ingest_jobs.values()),
+    })
+
+
+async def run_meeting(request: Request) -> JSONResponse:
+    try:
+        params = await _read_meeting_request(request)
+    except ValueError as e:
+        return _error(str(e), 400)
+    final: MeetingEvent = {}
+    async for event in request.app.state.orchestrator.astream_meeting(**params):
+        if event["type"] == "final":
+            final = event
+    return JSONResponse({key: value for key, value in final.items() if key != "type"})
+
+
+async def stream_meeting(request: Request):
+    try:
+        params = await _read_meeting_request(request)
+    except ValueError as e:
+        return _error(str(e), 400)
+    events = request.app.state.orchestrator.astream_meeting(**params)
+    return EventSourceResponse(_sse_stream(events), ping=SSE_PING_SECONDS)
+
+
+async def resume_meeting(request: Request) -> JSONResponse:
+    meeting_id = request.path_params["meeting_id"]
+    try:
+        state = await request.app.state.orchestrator.resume_meeting(meeting_id)
+    except KeyError:
+        return _error(f"没有找到会议: {meeting_id}", 404)
+    except ValueError as e:
+        return _error(str(e), 409)
+    return JSONResponse({"meeting_id": meeting_id, "state": state, "resumed": True})
+
+
+async def replay_meeting(request: Request):
+    meeting_id = request.path_params["meeting_id"]
+    events = request.app.state.orchestrator.replay_meeting(meeting_id)
+    # 先取第一个事件：会议不存在时还能返回 404，而不是一个只有 error 事件的 SSE
+    try:
+        first = await events.__anext__()
+    except KeyError:
+        return _error(f"没有找到会议: {meeting_id}", 404)
+    except ValueError as e:
+        return _error(str(e), 409)
+
+    async def chained() -> AsyncIterator[MeetingEvent]:
+        yield first
+        async for event in events:
+            yield event
+
+    return EventSourceResponse(_sse_stream(chained()), ping=SSE_PING_SECONDS)
+
+
+async def search(request: Request) -> JSONResponse:
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return _error("缺少参数 q", 400)
+    try:
+        k = int(request.query_params.get("k", "5"))
+    except ValueError:
+        return _error("k 必须是整数", 400)
+    kb: KnowledgeBase = request.app.state.knowledge_base
+    date_range = resolve_date_range(query)
+    docs = await asyncio.to_thread(kb.search, query, k=max(1, min(k, 50)), date_range=date_range)
+    return JSONResponse({
+        "query": query,
+        "date_range": str(date_range) if date_range else None,
+        "results": [{"id": doc.id, "content": doc.content, "metadata": doc.metadata} for doc in docs],
+    })
+
+
+async def start_ingest(request: Request) -> JSONResponse:
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        return _error("请求体不是合法的 JSON", 400)
+    folder_path = body.get("folder_path") if isinstance(body, dict) else None
+    if not folder_path or not os.path.isdir(folder_path):
+        return _error(f"路径不存在: {folder_path}", 400)
+    sync_mode = body.get("sync_mode", "full")
+    if sync_mode not in SYNC_MODES:
+        return _error(f"未知的同步模式: {sync_mode} (可选: {', '.join(SYNC_MODES)})", 400)
+    unlimited = body.get("unlimited", False)
+    if not isinstance(unlimited, bool):
+        return _error("unlimited 必须是布尔值", 400)
+
+    total = len(await asyncio.to_thread(scan_markdown_files, folder_path))
+    job = IngestJob(os.path.abspath(folder_path), sync_mode, total, unlimited)
+    jobs: "OrderedDict[str, IngestJob]" = request.app.state.ingest_jobs
+    jobs[job.job_id] = job
+    # 只保留最近的已结束任务 (运行中的任务不淘汰)
+    finished = [job_id for job_id, old in jobs.items() if old.status != "running"]
+    for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del jobs[job_id]
+
+    # 同一个引擎上的同步本身是串行的 (ingest_folder 内部有锁)，这里不用再排队
+    job.task = asyncio.create_task(asyncio.to_thread(job.run, request.app.state.engine))
+    logger.info(f"📂 [Service] 开始后台同步 {job.folder_path} ({total} 个文件, 任务 {job.job_id})")
+    return JSONResponse(job.to_dict(), status_code=202)
+
+
+async def ingest_status(request: Request) -> JSONResponse:
+    job = request.app.state.ingest_jobs.get(request.path_params["job_id"])
+    if job is None:
+        return _error("没有找到同步任务", 404)
+    try:
+        since = max(0, int(request.query_params.get("since", "0")))
+    except ValueError:
+        return _error("since 必须是整数", 400)
+    return JSONResponse(job.to_dict(since))
+
+
+def create_app(
+    knowledge_base: Optional[KnowledgeBase] = None,
+    engine: Optional[MemoryIngestionEngine] = None,
+    orchestrator: Optional[BoardOrchestrator] = None,
+    api_token: str = API_TOKEN,
+    watch_vault: str = WATCH_VAULT,
+) -> Starlette:
+    """
+    不传组件时在启动阶段 (lifespan) 冷启动一份；传入已经创建好的组件可以把服务嵌进别的进程
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        if orchestrator is None:
+            print("⚡ [Service] Cold Boot Initialization...")
+            app.state.knowledge_base, app.state.engine, app.state.orchestrator = build_board()
+        else:
+            app.state.knowledge_base, app.state.engine, app.state.orchestrator = knowledge_base, engine, orchestrator
+        app.state.ingest_jobs = OrderedDict()
+
+        watcher = None
+        if watch_vault:
+            watcher = VaultWatcher(app.state.engine, os.path.abspath(watch_vault), sync_mode=WATCH_SYNC_MODE)
+            watcher.start()
+        print(f"🚀 [Service] Echo-Board 服务已就绪 (辩论模式: {app.state.orchestrator.debate_mode})")
+        try:
+            yield
+        finally:
+            if watcher is not None:
+                watcher.stop()
+
+    app = Starlette(
+        routes=[
+            Route("/healthz", healthz, methods=["GET"]),
+            Route("/meetings", run_meeting, methods=["POST"]),
+            Route("/meetings/stream", stream_meeting, methods=["POST"]),
+            Route("/meetings/{meeting_id}/resume", resume_meeting, methods=["POST"]),
+            Route("/meetings/{meeting_id}/replay", replay_meeting, methods=["GET"]),
+            Route("/search", search, methods=["GET"]),
+            Route("/ingest", start_ingest, methods=["POST"]),
+            Route("/ingest/{job_id}", ingest_status, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+    if api_token:
+        app.add_middleware(TokenAuthMiddleware, token=api_token)
+    return app
+
+
+app = create_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Echo-Board HTTP / SSE 服务")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS)
+    args = parser.parse_args()
+    # 多 worker 时 uvicorn 需要按导入路径加载 app (每个 worker 进程各自冷启动)
+    uvicorn.run("src.service.server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
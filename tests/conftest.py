@@ -0,0 +1,50 @@
+"""
+测试环境：离线的脚本化 LLM + 哈希 Embedding，所有本地状态文件放到临时目录
+
+模块里的配置在导入时读取环境变量，所以必须在导入任何 src 模块之前设置好。
+"""
+import os
+import tempfile
+
+import pytest
+
+_STATE_DIR = tempfile.mkdtemp(prefix="echo-board-tests-")
+
+os.environ.setdefault("ECHO_BOARD_LLM_BACKEND", "fake")
+os.environ.setdefault("ECHO_BOARD_EMBED_BACKEND", "hash")
+os.environ.setdefault("MEM0_TELEMETRY", "False")
+for _name, _file in {
+    "EMBEDDING_CACHE_PATH": "embedding_cache.sqlite",
+    "DATA_VERSIONS_PATH": "data_versions.sqlite",
+    "MEETING_CACHE_PATH": "meeting_cache.sqlite",
+    "PROFILE_EXTRACTION_STATE_PATH": "profile_extraction.sqlite",
+    "ROUTER_HISTORY_PATH": "router_history.sqlite",
+    "BOARD_CHECKPOINT_PATH": "meeting_checkpoints.sqlite",
+}.items():
+    os.environ.setdefault(_name, os.path.join(_STATE_DIR, _file))
+
+@pytest.fixture
+def knowledge_base(tmp_path):
+    """临时目录里的空知识库 (哈希 Embedding，不需要 Ollama)"""
+    from src.infrastructure.vector_store import KnowledgeBase
+
+    return KnowledgeBase(persist_dir=str(tmp_path / "chroma_db"), reset_db=True)
+
+
+@pytest.fixture
+def make_board(knowledge_base, tmp_path, monkeypatch):
+    """离线的董事会 (脚本化 LLM)，检查点放在临时目录；关键字参数透传给 BoardOrchestrator"""
+    from src.agents.orchestrator import BoardOrchestrator
+
+    # Mem0 的向量库等默认的相对路径 (./mem0/...) 都落在临时目录里。
+    # Chroma 按路径字符串缓存客户端，所有测试必须用同一个工作目录
+    monkeypatch.chdir(_STATE_DIR)
+
+    def make(**options):
+        options.setdefault("checkpoint_path", str(tmp_path / "checkpoints.sqlite"))
+        options.setdefault("remember_verdicts", False)
+        options.setdefault("meeting_cache", False)
+        options.setdefault("coalesce", False)
+        return BoardOrchestrator(knowledge_base, **options)
+
+    return make
@@ -0,0 +1,58 @@
+import pytest
+
+from src.infrastructure.answer_cache import SemanticAnswerCache, chunk_set_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SemanticAnswerCache(str(tmp_path / "answer_cache.sqlite"), similarity_threshold=0.9, max_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_chunk_set_key_ignores_order_and_duplicates():
+    assert chunk_set_key(["a", "b"]) == chunk_set_key(["b", "a", "a"])
+    assert chunk_set_key(["a"]) != chunk_set_key(["a", "b"])
+
+
+def test_hit_requires_same_evidence_and_similar_query(cache):
+    cache.store("ns", "我跑了多少步", [1.0, 0.0], ["c1", "c2"], {"answer": "一万步"})
+
+    hit = cache.lookup("ns", [0.99, 0.05], ["c2", "c1"])
+    assert hit["answer"] == "一万步" and hit["cached_query"] == "我跑了多少步"
+
+    assert cache.lookup("ns", [0.0, 1.0], ["c1", "c2"]) is None      # 问题不同
+    assert cache.lookup("ns", [1.0, 0.0], ["c1"]) is None            # 证据不同
+    assert cache.lookup("other", [1.0, 0.0], ["c1", "c2"]) is None   # 命名空间不同
+    assert cache.lookup("ns", [1.0, 0.0, 0.0], ["c1", "c2"]) is None  # 向量维度变了
+
+
+def test_invalidate_chunks_drops_entries_using_them(cache):
+    cache.store("ns", "q1", [1.0, 0.0], ["c1"], {"answer": "a1"})
+    cache.store("ns", "q2", [1.0, 0.0], ["c2"], {"answer": "a2"})
+
+    assert cache.invalidate_chunks(["c1", "missing"]) == 1
+    assert cache.lookup("ns", [1.0, 0.0], ["c1"]) is None
+    assert cache.lookup("ns", [1.0, 0.0], ["c2"])["answer"] == "a2"
+
+
+def test_evicts_least_recently_used(cache):
+    cache.store("ns", "q1", [1.0, 0.0], ["c1"], {"answer": "a1"})
+    cache.store("ns", "q2", [1.0, 0.0], ["c2"], {"answer": "a2"})
+    cache.lookup("ns", [1.0, 0.0], ["c1"])  # c1 最近被用过
+    cache.store("ns", "q3", [1.0, 0.0], ["c3"], {"answer": "a3"})
+
+    assert cache.count() == 2
+    assert cache.lookup("ns", [1.0, 0.0], ["c2"]) is None
+    assert cache.lookup("ns", [1.0, 0.0], ["c1"]) is not None
+
+
+def test_kb_write_invalidates_cached_report(knowledge_base):
+    from src.core.models.domain_models import LifeEvent
+
+    event = LifeEvent(id="e1", content="季度规划", source_type="obsidian", metadata={"source_file": "a.md"})
+    knowledge_base.add_events([event])
+    knowledge_base.answer_cache.store("ns", "q", [1.0], ["e1"], {"answer": "a"})
+
+    knowledge_base.delete_events(["e1"])
+    assert knowledge_base.answer_cache.count() == 0
@@ -0,0 +1,55 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from src.service.batch import BatchRunner, load_requests
+
+
+def test_load_requests(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    path.write_text('{"query": "问题一", "id": "a"}\n\n{"query": "问题二", "tag": "x"}\n', encoding="utf-8")
+    assert [request["query"] for request in load_requests(str(path))] == ["问题一", "问题二"]
+
+    path.write_text('{"query": "问题一"}\n{"query": "  "}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="第 2 行"):
+        load_requests(str(path))
+
+
+class TestBatchRunner:
+    @pytest.fixture
+    def board(self, make_board):
+        return make_board(checkpoint_path=None)
+
+    @staticmethod
+    def _run(board, requests):
+        output = io.StringIO()
+        summary = asyncio.run(BatchRunner(board, concurrency=2).run(requests, output))
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        return summary, sorted(results, key=lambda result: result["index"])
+
+    def test_duplicate_questions_share_one_meeting(self, board):
+        summary, results = self._run(board, [
+            {"query": "我该不该换工作", "id": "a", "tag": "weekly"},
+            {"query": "我该不该换工作？"},
+            {"query": "要不要学钢琴"},
+        ])
+
+        assert summary["requests"] == 3 and summary["meetings"] == 2 and summary["ok"] == 3
+        assert results[0]["meta"] == {"tag": "weekly"}
+        assert results[1]["shared_with"] == 0
+        assert results[1]["final_verdict"] == results[0]["final_verdict"]
+
+    def test_duplicate_transactions_are_each_booked(self, board, monkeypatch):
+        booked = []
+
+        async def execute(query):
+            booked.append(query)
+            return "已记账"
+
+        monkeypatch.setattr(board.cfo, "execute", execute)
+        summary, results = self._run(board, [{"query": "午饭花了35元"}, {"query": "午饭花了35元"}])
+
+        assert summary["meetings"] == 2 and len(booked) == 2
+        assert not any("shared_with" in result for result in results)
@@ -0,0 +1,54 @@
+from src.core.models.domain_models import LifeEvent
+from src.infrastructure.markdown_splitter import split_into_events
+
+NOTE = """# 2024-03-01 周五复盘
+## 工作
+完成了季度规划，团队士气不错。
+## 生活
+晚上跑步五公里。
+"""
+
+
+def test_content_id_is_deterministic():
+    first = LifeEvent.content_id("a.md", "2024-03-01 > 工作", "内容")
+    assert first == LifeEvent.content_id("a.md", "2024-03-01 > 工作", "内容")
+    assert first != LifeEvent.content_id("b.md", "2024-03-01 > 工作", "内容")
+    assert first != LifeEvent.content_id("a.md", "2024-03-01 > 生活", "内容")
+    assert first != LifeEvent.content_id("a.md", "2024-03-01 > 工作", "内容!")
+
+
+def test_split_is_stable_across_runs():
+    ids = [event.id for event in split_into_events(NOTE, "journal.md")]
+    assert ids == [event.id for event in split_into_events(NOTE, "journal.md")]
+    assert len(ids) == len(set(ids)) == 2
+
+
+def test_editing_one_section_keeps_other_ids():
+    before = {event.metadata["Section"]: event.id for event in split_into_events(NOTE, "journal.md")}
+    edited = NOTE.replace("跑步五公里", "跑步十公里")
+    after = {event.metadata["Section"]: event.id for event in split_into_events(edited, "journal.md")}
+
+    assert before["工作"] == after["工作"]
+    assert before["生活"] != after["生活"]
+
+
+def test_source_key_separates_vaults():
+    first = [event.id for event in split_into_events(NOTE, "journal.md", "/vault-a/journal.md")]
+    second = [event.id for event in split_into_events(NOTE, "journal.md", "/vault-b/journal.md")]
+
+    assert not set(first) & set(second)
+    assert split_into_events(NOTE, "journal.md", "/vault-a/journal.md")[0].metadata["source_file"] == "journal.md"
+
+
+def test_duplicate_paragraphs_under_same_header_are_dropped():
+    note = "# 标题\n重复的段落\n\n# 标题\n重复的段落\n"
+    assert len(split_into_events(note, "dup.md")) == 1
+
+
+def test_add_events_is_idempotent(knowledge_base):
+    events = split_into_events(NOTE, "journal.md")
+    knowledge_base.add_events(events)
+    knowledge_base.add_events(events + events)
+
+    assert knowledge_base.vector_db._collection.count() == len(events)
+    assert knowledge_base.filter_new_events(events) == []
@@ -0,0 +1,87 @@
+from src.infrastructure.context_budget import (
+    TRUNCATED_MARK,
+    ContextBudget,
+    compress_text,
+    count_tokens,
+    dedupe_lines,
+    pack_evidence,
+    split_sentences,
+    truncate_to_tokens,
+)
+
+LONG = "今天完成了季度规划。晚上跑步五公里。和朋友讨论了预算问题。周末准备复盘。" * 20
+
+
+def test_split_sentences_keeps_punctuation():
+    assert split_sentences("第一句。第二句！Third?") == ["第一句。", "第二句！", "Third?"]
+
+
+def test_truncate_respects_budget_and_marks_cut():
+    truncated = truncate_to_tokens(LONG, 30)
+
+    assert count_tokens(truncated) <= 30
+    assert truncated.endswith(TRUNCATED_MARK)
+    assert truncate_to_tokens("短句。", 30) == "短句。"
+    assert truncate_to_tokens(LONG, 0) == ""
+
+
+def test_compress_prefers_sentences_matching_query():
+    text = "今天完成了季度规划。晚上跑步五公里。和朋友讨论了预算问题。"
+
+    compressed = compress_text(text, count_tokens("晚上跑步五公里。") + 1, query="跑步")
+    assert compressed == "晚上跑步五公里。"
+    assert compress_text(text, 1000) == text
+
+
+def test_dedupe_lines_ignores_whitespace():
+    assert dedupe_lines("- 喜欢跑步\n-  喜欢跑步\n\n- 早睡") == "- 喜欢跑步\n\n- 早睡"
+
+
+def test_pack_evidence_drops_overlap_and_compresses_low_ranks():
+    records = [
+        ("[2024-03-01]", "完成了季度规划。晚上跑步五公里。"),
+        ("[2024-03-02]", "晚上跑步五公里。"),  # 和第一条完全重复
+        ("[2024-03-03]", "第一句。第二句。第三句。第四句。"),
+    ]
+
+    packed = dict(pack_evidence(records, budget=1000, full_records=1))
+    assert packed["[2024-03-02]"] == "(内容同 [2024-03-01])"
+    assert packed["[2024-03-03]"] == "第一句。 第二句。"
+
+
+def test_pack_evidence_stops_at_budget():
+    records = [(f"[{i}]", LONG) for i in range(5)]
+    packed = pack_evidence(records, budget=200)
+
+    assert 0 < len(packed) < 5
+    assert sum(count_tokens(header) + 2 + count_tokens(text) for header, text in packed) <= 200
+
+
+def test_context_budget_shares_spare_tokens():
+    budget = ContextBudget({"context": 100, "user_profile": 100}, max_tokens=150)
+
+    assert budget.allocate({"context": 500, "user_profile": 10}) == {"context": 140, "user_profile": 10}
+
+
+def test_fit_only_touches_budgeted_sections():
+    budget = ContextBudget({"context": 50}, max_tokens=50)
+    fitted = budget.fit({"query": "跑步", "context": LONG, "other": LONG})
+
+    assert count_tokens(fitted["context"]) <= 50
+    assert fitted["other"] == LONG and fitted["query"] == "跑步"
+
+
+def test_fit_dedupes_only_evidence_and_profile():
+    opinion = "## 结论\n---\n- 风险: 现金流\n---\n- 风险: 现金流"
+    fitted = ContextBudget().fit({
+        "query": "q",
+        "context": "史官报告\n史官报告",
+        "user_profile": "- 喜欢跑步\n- 喜欢跑步",
+        "strategist_opinion": opinion,
+        "financial_report": "| a |\n|---|\n|---|",
+    })
+
+    assert fitted["context"] == "史官报告"
+    assert fitted["user_profile"] == "- 喜欢跑步"
+    assert fitted["strategist_opinion"] == opinion
+    assert fitted["financial_report"] == "| a |\n|---|\n|---|"
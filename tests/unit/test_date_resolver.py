@@ -0,0 +1,46 @@
+from datetime import date
+
+from src.infrastructure.date_resolver import event_date_key, parse_note_date, resolve_date_range
+
+TODAY = date(2024, 3, 14)  # 周四
+
+
+def _span(query):
+    resolved = resolve_date_range(query, today=TODAY)
+    return (resolved.start, resolved.end) if resolved else None
+
+
+def test_relative_days():
+    assert _span("昨天做了什么") == (date(2024, 3, 13), date(2024, 3, 13))
+    assert _span("大前天") == (date(2024, 3, 11), date(2024, 3, 11))
+    assert _span("what did I do yesterday") == (date(2024, 3, 13), date(2024, 3, 13))
+
+
+def test_weeks_and_months():
+    assert _span("上周的复盘") == (date(2024, 3, 4), date(2024, 3, 10))
+    assert _span("本周") == (date(2024, 3, 11), date(2024, 3, 14))
+    assert _span("上个月花了多少钱") == (date(2024, 2, 1), date(2024, 2, 29))
+    assert _span("最近七天") == (date(2024, 3, 8), date(2024, 3, 14))
+
+
+def test_explicit_dates():
+    assert _span("2023年10月18日的会议") == (date(2023, 10, 18), date(2023, 10, 18))
+    assert _span("2023-10 的账单") == (date(2023, 10, 1), date(2023, 10, 31))
+    # 没写年份的未来日期指去年
+    assert _span("12月25日") == (date(2023, 12, 25), date(2023, 12, 25))
+
+
+def test_multiple_expressions_cover_both():
+    assert _span("10月1日到10月7日") == (date(2023, 10, 1), date(2023, 10, 7))
+
+
+def test_no_date_expression():
+    assert resolve_date_range("我的职业规划是什么", today=TODAY) is None
+    assert resolve_date_range("", today=TODAY) is None
+
+
+def test_note_dates():
+    assert parse_note_date("2023年10月25日 财务") == date(2023, 10, 25)
+    assert parse_note_date("20231025.md") == date(2023, 10, 25)
+    assert parse_note_date("2023-13-40") is None
+    assert event_date_key({"Date/Title": "随笔", "source_file": "Journal/2024-03-01.md"}) == 20240301
@@ -0,0 +1,70 @@
+from typing import List
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from src.infrastructure.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings(Embeddings):
+    """记录每次请求的批次，向量 = [文本长度, 批次序号]"""
+
+    def __init__(self):
+        self.batches: List[List[str]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(text)), float(len(self.batches))] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite"))
+
+
+def test_misses_are_deduplicated_and_batched(cache):
+    model = CountingEmbeddings()
+    cached = CachedEmbeddings(model, "m", cache, batch_size=2)
+
+    vectors = cached.embed_documents(["a", "bb", "a", "ccc"])
+
+    assert model.batches == [["a", "bb"], ["ccc"]]
+    assert vectors[0] == vectors[2]
+    assert (cached.hits, cached.misses) == (0, 3)
+
+
+def test_second_call_is_served_from_cache(cache):
+    model = CountingEmbeddings()
+    cached = CachedEmbeddings(model, "m", cache)
+    first = cached.embed_documents(["a", "bb"])
+
+    assert cached.embed_documents(["bb", "a"]) == [first[1], first[0]]
+    assert cached.embed_query("a") == first[0]
+    assert len(model.batches) == 1
+
+
+def test_cache_is_shared_across_instances_but_keyed_by_model(cache):
+    CachedEmbeddings(CountingEmbeddings(), "m1", cache).embed_documents(["a"])
+
+    other_model = CountingEmbeddings()
+    CachedEmbeddings(other_model, "m2", cache).embed_documents(["a"])
+    assert other_model.batches == [["a"]]
+
+    same_model = CountingEmbeddings()
+    CachedEmbeddings(same_model, "m1", cache).embed_documents(["a"])
+    assert same_model.batches == []
+    assert cache.count() == 2 and cache.count("m1") == 1
+
+
+def test_vectors_roundtrip_as_float32(cache):
+    cache.put_many("m", {"h": [0.5, -1.25, 3.0]})
+    assert cache.get_many("m", ["h", "missing"]) == {"h": [0.5, -1.25, 3.0]}
+
+
+def test_empty_input(cache):
+    model = CountingEmbeddings()
+    assert CachedEmbeddings(model, "m", cache).embed_documents([]) == []
+    assert model.batches == []
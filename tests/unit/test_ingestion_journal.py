@@ -0,0 +1,170 @@
+import time
+
+import pytest
+
+from src.infrastructure.ingestion_journal import STAGE_INDEXED, STAGE_PROFILED, STAGE_WRITING, IngestionJournal
+from src.infrastructure.ingestion_scheduler import IngestionBudget
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = IngestionJournal(str(tmp_path / "journal.sqlite"))
+    yield journal
+    journal.close()
+
+
+def _stages(journal):
+    with journal._lock:
+        return dict(journal._conn.execute("SELECT path, stage FROM files").fetchall())
+
+
+def test_file_stages_advance(journal, tmp_path):
+    run = journal.begin_run(str(tmp_path), "full", 2)
+    run.log_intent([("a.md", "h1"), ("b.md", "h2")])
+    assert _stages(journal) == {"a.md": STAGE_WRITING, "b.md": STAGE_WRITING}
+
+    run.mark_indexed([("a.md", "h1")])
+    assert journal.pending_profiles(str(tmp_path)) == {"a.md": "h1"}
+
+    journal.mark_profiled([("a.md", "stale-hash")])
+    assert journal.pending_profiles(str(tmp_path)) == {"a.md": "h1"}
+    journal.mark_profiled([("a.md", "h1")])
+    assert _stages(journal)["a.md"] == STAGE_PROFILED
+
+
+def test_vector_only_runs_skip_profile_stage(journal, tmp_path):
+    run = journal.begin_run(str(tmp_path), "vector_only", 1)
+    run.log_intent([("a.md", "h")])
+    run.mark_indexed([("a.md", "h")])
+    assert _stages(journal) == {"a.md": STAGE_PROFILED}
+
+
+def test_interrupted_writes_exclude_current_run(journal, tmp_path):
+    crashed = journal.begin_run(str(tmp_path), "full", 1)
+    crashed.log_intent([("a.md", "h")])
+    current = journal.begin_run(str(tmp_path), "full", 1)
+    current.log_intent([("b.md", "h")])
+
+    assert journal.interrupted_writes(str(tmp_path), exclude_run_id=current.run_id) == {"a.md": "h"}
+    journal.resolve_writes(str(tmp_path), [("a.md", "h")])
+    assert journal.interrupted_writes(str(tmp_path), exclude_run_id=current.run_id) == {}
+    assert _stages(journal)["a.md"] == STAGE_INDEXED
+
+
+def test_eta_uses_history_then_live_rate(journal, tmp_path):
+    run = journal.begin_run(str(tmp_path), "full", 10)
+    assert run.eta(0) is None
+
+    journal._set_run_workload(run.run_id, 10, time.time() - 10)
+    journal.finish_run(run, 10)
+    assert journal.historical_cost() == pytest.approx(1.0, rel=0.05)
+
+    next_run = journal.begin_run(str(tmp_path), "full", 100)
+    next_run.set_workload(20)
+    assert next_run.eta(0) == pytest.approx(20.0, rel=0.05)
+
+    next_run.started_at = time.time() - 5
+    assert next_run.eta(10) == pytest.approx(5.0, rel=0.05)
+
+
+def test_backlog_keeps_first_deferral_time(journal, tmp_path):
+    folder = str(tmp_path)
+    journal.update_backlog(folder, ["a.md", "b.md"], [])
+    first = journal.backlog(folder)["a.md"]
+    journal.update_backlog(folder, ["a.md"], ["b.md"])
+
+    assert journal.backlog(folder) == {"a.md": first}
+    journal.forget(folder, "a.md")
+    assert journal.backlog(folder) == {}
+
+
+def test_same_relative_path_in_two_folders_is_tracked_separately(journal, tmp_path):
+    first, second = str(tmp_path / "a"), str(tmp_path / "b")
+    crashed = journal.begin_run(first, "full", 1)
+    crashed.log_intent([("note.md", "h-a")])
+    journal.begin_run(second, "full", 1).log_intent([("note.md", "h-b")])
+
+    assert journal.interrupted_writes(first) == {"note.md": "h-a"}
+    assert journal.interrupted_writes(second) == {"note.md": "h-b"}
+
+    journal.resolve_writes(first, [("note.md", "h-a")])
+    journal.forget(second, "note.md")
+    assert journal.pending_profiles(first) == {"note.md": "h-a"}
+    assert journal.interrupted_writes(second) == {} and journal.pending_profiles(second) == {}
+
+
+def test_legacy_files_table_is_migrated_with_run_folder(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "legacy.sqlite")
+    with sqlite3.connect(path) as conn:
+        conn.executescript(
+            """
+            CREATE TABLE runs (run_id INTEGER PRIMARY KEY AUTOINCREMENT, folder TEXT NOT NULL, sync_mode TEXT NOT NULL,
+                total_files INTEGER NOT NULL, started_at REAL NOT NULL, finished_at REAL, status TEXT NOT NULL,
+                processed_files INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE files (path TEXT PRIMARY KEY, content_hash TEXT NOT NULL, stage TEXT NOT NULL,
+                run_id INTEGER NOT NULL, updated_at REAL NOT NULL);
+            INSERT INTO runs (run_id, folder, sync_mode, total_files, started_at, status) VALUES (1, '/vault', 'full', 1, 0, 'completed');
+            INSERT INTO files VALUES ('a.md', 'h', 'indexed', 1, 0);
+            """
+        )
+    conn.close()
+
+    journal = IngestionJournal(path)
+    try:
+        assert journal.pending_profiles("/vault") == {"a.md": "h"}
+        assert journal.pending_profiles("/other") == {}
+    finally:
+        journal.close()
+
+
+class TestRecovery:
+    @pytest.fixture
+    def engine(self, knowledge_base):
+        from src.infrastructure.obsidian_loader import MemoryIngestionEngine
+
+        return MemoryIngestionEngine(knowledge_base=knowledge_base)
+
+    @staticmethod
+    def _sync(engine, folder):
+        return engine.ingest_folder(str(folder), budget=IngestionBudget.no_limits(), sync_mode="vector_only")
+
+    def test_crash_after_chroma_write_is_reindexed(self, engine, tmp_path, monkeypatch):
+        vault = tmp_path / "vault"
+        vault.mkdir()
+        (vault / "a.md").write_text("# 2024-05-01 旅行\n在京都看了红叶。\n", encoding="utf-8")
+
+        # 模拟写入 Chroma 之后、更新关键词索引之前崩溃
+        def crash(documents):
+            raise RuntimeError("进程被杀")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(engine.kb.lexical_index, "add", crash)
+            assert self._sync(engine, vault)["failed"] == 1
+        assert engine.kb.vector_db._collection.count() == 1
+        assert engine.kb.lexical_index.search("京都红叶") == []
+
+        stats = self._sync(engine, vault)
+
+        assert stats["added"] == 1 and stats["embedded_chunks"] == 0
+        assert len(engine.kb.lexical_index.search("京都红叶")) == 1
+        assert engine.kb.temporal_index.ids_between(20240501, 20240501) != []
+        assert engine.journal.interrupted_writes(str(vault)) == {}
+
+    def test_unchanged_files_do_not_count_towards_eta(self, engine, tmp_path):
+        vault = tmp_path / "vault"
+        vault.mkdir()
+        for i in range(5):
+            (vault / f"{i}.md").write_text(f"# 笔记 {i}\n内容 {i}\n", encoding="utf-8")
+        self._sync(engine, vault)
+        (vault / "new.md").write_text("# 新笔记\n新内容\n", encoding="utf-8")
+
+        stats = self._sync(engine, vault)
+
+        assert (stats["added"], stats["unchanged"]) == (1, 5)
+        with engine.journal._lock:
+            total, processed = engine.journal._conn.execute(
+                "SELECT total_files, processed_files FROM runs WHERE run_id = ?", (stats["run_id"],)
+            ).fetchone()
+        assert (total, processed) == (1, 1)
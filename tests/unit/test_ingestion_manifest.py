@@ -0,0 +1,143 @@
+import os
+
+import pytest
+
+from src.infrastructure.ingestion_manifest import IngestionManifest, ManifestEntry, compute_content_hash
+from src.infrastructure.ingestion_scheduler import IngestionBudget
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = IngestionManifest(str(tmp_path / "manifest.sqlite"))
+    yield manifest
+    manifest.close()
+
+
+def test_record_and_get_roundtrip(manifest, tmp_path):
+    path = str(tmp_path / "vault" / "a.md")
+    manifest.record(path, "hash-a", 1, 10, ["c1", "c2"])
+
+    entry = manifest.get(path)
+    assert entry.path == os.path.abspath(path)
+    assert (entry.content_hash, entry.mtime_ns, entry.size, entry.chunk_ids) == ("hash-a", 1, 10, ["c1", "c2"])
+
+
+def test_same_relative_name_in_two_vaults_does_not_collide(manifest, tmp_path):
+    first, second = str(tmp_path / "a" / "note.md"), str(tmp_path / "b" / "note.md")
+    manifest.record(first, "hash-a", 1, 1, ["a"])
+    manifest.record(second, "hash-b", 1, 1, ["b"])
+
+    assert manifest.get(first).chunk_ids == ["a"]
+    assert manifest.get(second).chunk_ids == ["b"]
+
+
+def test_entries_under_only_returns_that_folder(manifest, tmp_path):
+    manifest.record_many([
+        ManifestEntry(str(tmp_path / "vault" / "Journal" / "x.md"), "h", 1, 1, []),
+        ManifestEntry(str(tmp_path / "vault" / "top.md"), "h", 1, 1, []),
+        ManifestEntry(str(tmp_path / "vault-2" / "top.md"), "h", 1, 1, []),
+    ])
+
+    assert sorted(manifest.entries_under(str(tmp_path / "vault"))) == [
+        str(tmp_path / "vault" / "Journal" / "x.md"),
+        str(tmp_path / "vault" / "top.md"),
+    ]
+    assert list(manifest.entries_under(str(tmp_path / "vault" / "Journal"))) == [
+        str(tmp_path / "vault" / "Journal" / "x.md"),
+    ]
+
+
+def test_touch_and_remove(manifest, tmp_path):
+    path = str(tmp_path / "a.md")
+    manifest.record(path, "h", 1, 1, ["c"])
+    manifest.touch(path, 5, 7)
+    assert (manifest.get(path).mtime_ns, manifest.get(path).size) == (5, 7)
+
+    manifest.remove(path)
+    assert manifest.get(path) is None
+
+
+def test_adopt_relative_migrates_rows_found_in_folder(manifest, tmp_path):
+    vault = tmp_path / "vault"
+    _write(str(vault / "a.md"), "a")
+    with manifest._lock:
+        manifest._conn.executemany(
+            "INSERT INTO files (path, content_hash, mtime_ns, size, chunk_ids) VALUES (?, 'h', 1, 1, '[]')",
+            [("a.md",), ("elsewhere.md",)],
+        )
+        manifest._conn.commit()
+
+    assert manifest.adopt_relative(str(vault)) == 1
+    assert sorted(manifest.all_entries()) == sorted([str(vault / "a.md"), "elsewhere.md"])
+
+
+def test_compute_content_hash_is_stable():
+    assert compute_content_hash("内容") == compute_content_hash("内容")
+    assert compute_content_hash("a") != compute_content_hash("b")
+
+
+class TestFolderSync:
+    """同一个向量库先后同步多个库 / 子目录"""
+
+    @pytest.fixture
+    def engine(self, knowledge_base):
+        from src.infrastructure.obsidian_loader import MemoryIngestionEngine
+
+        return MemoryIngestionEngine(knowledge_base=knowledge_base)
+
+    @staticmethod
+    def _sync(engine, folder):
+        return engine.ingest_folder(str(folder), budget=IngestionBudget.no_limits(), sync_mode="vector_only")
+
+    @pytest.fixture
+    def vaults(self, tmp_path):
+        for name in ("a", "b"):
+            _write(str(tmp_path / name / "Journal" / "x.md"), f"# 2024-01-01 {name}\n{name} 的日记")
+            _write(str(tmp_path / name / "top.md"), f"# 2024-01-02 {name}\n{name} 的笔记")
+        return tmp_path / "a", tmp_path / "b"
+
+    def test_second_vault_does_not_prune_first(self, engine, vaults):
+        first, second = vaults
+        self._sync(engine, first)
+        stats = self._sync(engine, second)
+
+        assert stats["added"] == 2 and stats["deleted"] == 0
+        assert engine.kb.vector_db._collection.count() == 4
+
+    def test_subfolder_sync_keeps_rest_of_vault(self, engine, vaults):
+        first, _ = vaults
+        self._sync(engine, first)
+        stats = self._sync(engine, first / "Journal")
+
+        assert stats["unchanged"] == 1 and stats["deleted"] == 0
+        assert len(engine.manifest.entries_under(str(first))) == 2
+
+    def test_deleted_note_is_pruned_within_its_folder(self, engine, vaults):
+        first, second = vaults
+        self._sync(engine, first)
+        self._sync(engine, second)
+        os.remove(first / "top.md")
+
+        assert self._sync(engine, first)["deleted"] == 1
+        assert engine.manifest.get(str(second / "top.md")) is not None
+        assert engine.kb.vector_db._collection.count() == 3
+
+    def test_identical_notes_in_two_vaults_keep_separate_chunks(self, engine, tmp_path):
+        first, second = tmp_path / "x", tmp_path / "y"
+        for vault in (first, second):
+            _write(str(vault / "same.md"), "# 2024-01-01 复盘\n完全相同的内容")
+        self._sync(engine, first)
+        self._sync(engine, second)
+
+        first_ids = engine.manifest.get(str(first / "same.md")).chunk_ids
+        assert not set(first_ids) & set(engine.manifest.get(str(second / "same.md")).chunk_ids)
+
+        os.remove(second / "same.md")
+        assert self._sync(engine, second)["deleted"] == 1
+        assert engine.kb.vector_db._collection.get(ids=first_ids)["ids"] == first_ids
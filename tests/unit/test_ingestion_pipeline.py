@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from src.infrastructure.ingestion_manifest import IngestionManifest
+from src.infrastructure.ingestion_pipeline import IngestionPipeline, check_file
+
+
+@pytest.fixture
+def vault(tmp_path):
+    folder = tmp_path / "vault"
+    folder.mkdir()
+    for i in range(6):
+        (folder / f"note_{i}.md").write_text(f"# 2024-01-0{i + 1} 日记\n## 记录\n第 {i} 天的内容。\n", encoding="utf-8")
+    return folder
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return IngestionManifest(str(tmp_path / "manifest.sqlite"))
+
+
+def _files(folder):
+    return [(str(path), os.path.relpath(path, folder)) for path in sorted(folder.glob("*.md"))]
+
+
+def _run(knowledge_base, manifest, folder, **options):
+    pipeline = IngestionPipeline(knowledge_base, manifest, split_workers=0, embed_batch_size=4, **options)
+    return pipeline.run(_files(folder))
+
+
+def test_first_run_adds_every_file(knowledge_base, manifest, vault):
+    committed = []
+    stats = _run(knowledge_base, manifest, vault, on_file_committed=lambda item: committed.append(item.relative_path))
+
+    assert (stats.added, stats.unchanged, stats.failed) == (6, 0, 0)
+    assert stats.chunks == stats.embedded_chunks == 6
+    assert sorted(committed) == [f"note_{i}.md" for i in range(6)]
+    assert knowledge_base.vector_db._collection.count() == 6
+
+
+def test_second_run_skips_unchanged_files(knowledge_base, manifest, vault):
+    _run(knowledge_base, manifest, vault)
+    stats = _run(knowledge_base, manifest, vault)
+
+    assert (stats.added, stats.updated, stats.unchanged) == (0, 0, 6)
+
+
+def test_touched_file_is_not_reembedded(manifest, vault):
+    path = vault / "note_0.md"
+    _, relative_path = _files(vault)[0]
+    manifest.record(str(path), check_file(manifest, str(path), relative_path).content_hash, 0, 0, [])
+
+    assert check_file(manifest, str(path), relative_path) is None
+    assert manifest.get(str(path)).mtime_ns == os.stat(path).st_mtime_ns
+
+
+def test_edited_file_replaces_its_stale_chunks(knowledge_base, manifest, vault):
+    _run(knowledge_base, manifest, vault)
+    before = manifest.get(str(vault / "note_0.md")).chunk_ids
+    (vault / "note_0.md").write_text("# 2024-01-01 日记\n## 记录\n改过的内容。\n", encoding="utf-8")
+
+    stats = _run(knowledge_base, manifest, vault)
+
+    assert (stats.updated, stats.unchanged) == (1, 5)
+    assert manifest.get(str(vault / "note_0.md")).chunk_ids != before
+    assert knowledge_base.vector_db.get(ids=before)["ids"] == []
+    assert knowledge_base.vector_db._collection.count() == 6
+
+
+def test_unreadable_file_fails_alone(knowledge_base, manifest, vault):
+    (vault / "broken.md").write_bytes(b"\xff\xfe\x00broken")
+    stats = _run(knowledge_base, manifest, vault)
+
+    assert (stats.added, stats.failed) == (6, 1)
+    assert manifest.get(str(vault / "broken.md")) is None
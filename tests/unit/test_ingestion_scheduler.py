@@ -0,0 +1,82 @@
+import os
+
+from src.infrastructure.ingestion_scheduler import BudgetTracker, IngestionBudget, estimate_tokens, prioritize
+
+
+def _tracker(budget, extract_profile=False, profile_batch_chars=1000):
+    return BudgetTracker(budget, extract_profile=extract_profile, profile_batch_chars=profile_batch_chars)
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("你好世界") == 5
+    assert estimate_tokens("abcdefgh") == 3
+
+
+def test_no_limits_is_unlimited():
+    assert IngestionBudget.no_limits().unlimited
+    assert not IngestionBudget(max_llm_calls=1).unlimited
+
+
+def test_from_env_defaults_and_overrides(monkeypatch):
+    monkeypatch.delenv("INGEST_MAX_EMBED_TOKENS", raising=False)
+    monkeypatch.delenv("INGEST_MAX_SECONDS", raising=False)
+    monkeypatch.setenv("INGEST_MAX_LLM_CALLS", "")
+
+    budget = IngestionBudget.from_env()
+    assert budget.max_embed_tokens == 2000000
+    assert budget.max_llm_calls is None and budget.max_seconds is None
+
+
+def test_oversized_first_file_is_admitted():
+    tracker = _tracker(IngestionBudget(max_embed_tokens=10))
+
+    assert tracker.try_reserve("字" * 100)
+    assert not tracker.try_reserve("a")
+    assert tracker.exhausted == ["embed_tokens"]
+
+
+def test_embed_budget_defers_once_full():
+    tracker = _tracker(IngestionBudget(max_embed_tokens=12))
+
+    assert tracker.try_reserve("字" * 5)
+    assert tracker.try_reserve("字" * 5)
+    assert not tracker.try_reserve("字" * 5)
+    assert tracker.usage()["embed_tokens"] == 12
+
+
+def test_llm_calls_follow_profile_batching():
+    tracker = _tracker(IngestionBudget(max_llm_calls=1), extract_profile=True, profile_batch_chars=10)
+
+    assert tracker.try_reserve("a" * 4)
+    assert tracker.try_reserve("a" * 4)  # 同一批次，不新增调用
+    assert not tracker.try_reserve("a" * 4)
+    assert tracker.exhausted == ["llm_calls"]
+
+
+def test_llm_budget_ignored_in_vector_only_mode():
+    tracker = _tracker(IngestionBudget(max_llm_calls=0))
+
+    assert all(tracker.try_reserve("a" * 50) for _ in range(3))
+
+
+def test_wall_clock_budget():
+    tracker = _tracker(IngestionBudget(max_seconds=0))
+
+    assert tracker.try_reserve("a")
+    assert not tracker.try_reserve("a")
+    assert tracker.exhausted == ["wall_clock"]
+
+
+def test_prioritize_prefers_recent_popular_and_backlog(tmp_path):
+    paths = {}
+    for name, age_days in (("old.md", 60), ("new.md", 0), ("hot.md", 60), ("late.md", 60)):
+        path = tmp_path / name
+        path.write_text(name, encoding="utf-8")
+        mtime = path.stat().st_mtime - age_days * 86400
+        os.utime(path, (mtime, mtime))
+        paths[name] = (str(path), name)
+
+    ordered = prioritize(list(paths.values()), {"hot.md": 100}, {"late.md": 0.0})
+
+    assert [relative for _, relative in ordered][-1] == "old.md"
+    assert ordered[0][1] == "hot.md"
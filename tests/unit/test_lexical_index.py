@@ -0,0 +1,68 @@
+import pytest
+
+from src.infrastructure.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.sqlite"))
+    yield index
+    index.close()
+
+
+def test_tokenize_cjk_bigrams_words_and_dates():
+    assert tokenize("项目C 用 Kotlin") == ["项目", "c", "用", "kotlin"]
+    assert tokenize("2023年10月8日") == tokenize("2023-10-08") == ["20231008"]
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]])
+
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
+
+
+def test_search_ranks_by_bm25(index):
+    index.add([
+        ("kotlin", "今天用 Kotlin 重写了项目 C 的客户端"),
+        ("python", "今天用 Python 写了脚本"),
+        ("mixed", "Kotlin Kotlin Kotlin 协程"),
+    ])
+
+    ids = [chunk_id for chunk_id, _ in index.search("Kotlin")]
+    assert ids[0] == "mixed" and set(ids) == {"kotlin", "mixed"}
+    assert index.search("Rust") == []
+
+
+def test_dates_match_across_formats(index):
+    index.add([("d1", "# 2023年10月18日 周会"), ("d2", "# 2023-10-19 复盘")])
+
+    assert [chunk_id for chunk_id, _ in index.search("2023/10/18 做了什么")] == ["d1"]
+
+
+def test_allowed_ids_restrict_candidates(index):
+    index.add([("a", "预算 复盘"), ("b", "预算 规划"), ("c", "旅行")])
+
+    assert [chunk_id for chunk_id, _ in index.search("预算", allowed_ids=["b"])] == ["b"]
+
+
+def test_delete_and_overwrite(index):
+    index.add([("a", "苹果"), ("b", "香蕉")])
+    index.search("苹果")  # 加载内存索引后再做增量修改
+    index.delete(["a"])
+    index.add([("b", "苹果")])
+
+    assert [chunk_id for chunk_id, _ in index.search("苹果")] == ["b"]
+    assert index.search("香蕉") == []
+    assert index.count() == 1
+
+
+def test_reload_from_disk(tmp_path):
+    path = str(tmp_path / "lexical.sqlite")
+    first = LexicalIndex(path)
+    first.add([("a", "长期主义")])
+    first.close()
+
+    second = LexicalIndex(path)
+    assert [chunk_id for chunk_id, _ in second.search("长期")] == ["a"]
+    second.close()
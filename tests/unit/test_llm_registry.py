@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+import pytest
+
+from src.infrastructure.llm_registry import LLMRegistry, _PerLoopTransport
+
+
+@pytest.fixture
+def registry():
+    return LLMRegistry(api_key="test-key", default_model="base-model", requests_per_second=0, backend="openai")
+
+
+def test_role_settings_layering(registry, monkeypatch):
+    monkeypatch.setenv("LLM_ROUTER_MODEL", "small-model")
+    monkeypatch.delenv("LLM_ROUTER_TEMPERATURE", raising=False)
+
+    assert registry.role_settings("router") == {"temperature": 0.0, "model": "small-model"}
+    assert registry.role_settings("coach", temperature=0.1) == {"temperature": 0.1, "model": "base-model"}
+
+
+def test_same_settings_share_one_client(registry):
+    router = registry.get("router")
+    assert registry.get("router") is router
+    assert registry.get("router", max_tokens=10) is not router
+
+    coach, strategist = registry.get("coach"), registry.get("strategist")
+    # 参数相同的角色共用实例，所有实例共用同一个连接池
+    assert coach is strategist
+    assert coach.http_async_client is router.http_async_client
+    assert registry.rate_limiter is None
+
+
+def test_missing_credentials_raise(monkeypatch):
+    monkeypatch.delenv("OPEN_AI_API_KEY", raising=False)
+    with pytest.raises(ValueError):
+        LLMRegistry(api_key="", default_model=None, backend="openai").get("router")
+
+
+def test_fake_backend_needs_no_credentials():
+    model = LLMRegistry(backend="fake").get("router")
+    assert "board_advisory" in model.invoke("路由").content
+
+
+class TestPerLoopClients:
+    @staticmethod
+    def _client(max_concurrency, handler, made):
+        def make_client():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            made.append(client)
+            return client
+
+        return httpx.AsyncClient(transport=_PerLoopTransport(max_concurrency, make_client))
+
+    def test_each_event_loop_gets_its_own_client(self):
+        made = []
+        client = self._client(4, lambda request: httpx.Response(200, text="ok"), made)
+
+        async def call():
+            return [(await client.get("https://llm.test/v1")).text for _ in range(2)]
+
+        assert asyncio.run(call()) == ["ok", "ok"]
+        assert asyncio.run(call()) == ["ok", "ok"]
+        assert len(made) == 2
+
+    def test_concurrency_is_capped_until_responses_are_read(self):
+        active, peak = [0], [0]
+
+        async def body():
+            # 流式响应：从发出请求到响应体读完都算在途
+            yield b"o"
+            await asyncio.sleep(0.02)
+            yield b"k"
+            active[0] -= 1
+
+        async def handler(request):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            return httpx.Response(200, content=body())
+
+        client = self._client(2, handler, [])
+
+        async def streamed():
+            async with client.stream("GET", "https://llm.test/v1") as response:
+                return (await response.aread()).decode()
+
+        async def scenario():
+            return await asyncio.gather(*(streamed() for _ in range(6)))
+
+        assert asyncio.run(scenario()) == ["ok"] * 6
+        assert peak[0] <= 2
+
+    def test_registry_limits_async_requests_per_loop(self, registry):
+        transport = registry.http_async_client._transport
+        assert isinstance(transport, _PerLoopTransport)
+        assert transport.max_concurrency == registry.max_concurrency
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from src.infrastructure.data_versions import DataVersions
+from src.infrastructure.meeting_cache import MeetingCache, normalize_query
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MeetingCache(str(tmp_path / "meeting_cache.sqlite"), ttl_seconds=0, max_entries=2)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def versions(tmp_path):
+    versions = DataVersions(str(tmp_path / "versions.sqlite"))
+    yield versions
+    versions.close()
+
+
+def test_normalize_query():
+    assert normalize_query("  我该不该  换工作？ ") == normalize_query("我该不该 换工作")
+    assert normalize_query("ＡＢＣ!") == "abc"
+
+
+def test_key_depends_on_versions_and_variant():
+    key = MeetingCache.make_key("问题", {"kb": 1})
+
+    assert key == MeetingCache.make_key("问题。", {"kb": 1})
+    assert key != MeetingCache.make_key("问题", {"kb": 2})
+    assert key != MeetingCache.make_key("问题", {"kb": 1}, "parallel")
+
+
+def test_store_lookup_and_eviction(cache):
+    for name in ("a", "b"):
+        cache.store(name, name, {}, {"final_verdict": name})
+    cache.lookup("a")
+    cache.store("c", "c", {}, {"final_verdict": "c"})
+
+    assert cache.lookup("a") == {"final_verdict": "a"}
+    assert cache.lookup("b") is None
+    assert cache.count() == 2
+
+
+def test_ttl_expires_entries(tmp_path):
+    cache = MeetingCache(str(tmp_path / "ttl.sqlite"), ttl_seconds=1e-6)
+    cache.store("a", "a", {}, {"final_verdict": "a"})
+
+    assert cache.lookup("a") is None
+    assert cache.count() == 0
+    cache.close()
+
+
+def test_data_versions(versions):
+    assert versions.snapshot(["kb", "ledger"]) == {"kb": 0, "ledger": 0}
+    assert versions.bump("kb") == 1
+    assert versions.bump("kb") == 2
+    assert versions.get("kb") == 2
+    assert versions.snapshot(["kb", "ledger"]) == {"kb": 2, "ledger": 0}
+
+
+class TestBoardMeetingCache:
+    QUERY = "我该不该换工作"
+
+    @pytest.fixture
+    def board(self, make_board):
+        return make_board(meeting_cache=True)
+
+    def _final(self, board, query=QUERY):
+        async def run():
+            return [event async for event in board.astream_meeting(query)][-1]
+
+        return asyncio.run(run())
+
+    def test_repeat_question_is_served_from_cache(self, board):
+        first = self._final(board)
+        second = self._final(board, self.QUERY + "？")
+
+        assert not first.get("cached") and second["cached"]
+        assert second["state"]["final_verdict"] == first["state"]["final_verdict"]
+
+    def test_knowledge_base_write_invalidates(self, board):
+        from src.core.models.domain_models import LifeEvent
+
+        self._final(board)
+        board.archivist.kb.add_events([
+            LifeEvent(id="new", content="新的日记", source_type="obsidian", metadata={"source_file": "a.md"})
+        ])
+
+        assert not self._final(board).get("cached")
@@ -0,0 +1,56 @@
+import asyncio
+import json
+import math
+
+from src.infrastructure.fake_llm import ScriptedChatModel, split_tokens
+from src.infrastructure.hash_embeddings import HashEmbeddings
+
+
+def test_split_tokens_roundtrip():
+    text = "今天 went well，明天继续"
+    assert "".join(split_tokens(text)) == text
+    assert split_tokens("你好") == ["你", "好"]
+
+
+def test_scripted_model_is_deterministic_per_role_and_prompt():
+    coach = ScriptedChatModel(role="coach")
+
+    assert coach.invoke("问题").content == coach.invoke("问题").content
+    assert coach.invoke("问题").content != coach.invoke("另一个问题").content
+    assert coach.invoke("问题").content.startswith("[coach]")
+    assert json.loads(ScriptedChatModel(role="router").invoke("问题").content)["intent"] == "board_advisory"
+
+
+def test_script_rules_override_defaults():
+    model = ScriptedChatModel(
+        role="router",
+        script={"router": [{"match": "花了", "response": "finance"}], "default": "fallback"},
+    )
+
+    assert model.invoke("午饭花了35元").content == "finance"
+    assert model.invoke("随便聊聊").content == "fallback"
+
+
+def test_stream_matches_invoke_and_reports_usage():
+    model = ScriptedChatModel(role="strategist", response_tokens=20)
+
+    async def stream():
+        return [chunk async for chunk in model.astream("问题")]
+
+    chunks = asyncio.run(stream())
+    assert "".join(chunk.content for chunk in chunks) == model.invoke("问题").content
+    usage = model.invoke("问题").usage_metadata
+    assert usage["total_tokens"] == usage["input_tokens"] + usage["output_tokens"] > 0
+
+
+def test_hash_embeddings_are_normalized_and_lexical():
+    embeddings = HashEmbeddings(dim=64)
+    run, run_again, other = embeddings.embed_documents(["晚上跑步五公里", "晚上跑步五公里", "季度预算规划"])
+
+    def cosine(a, b):
+        return sum(x * y for x, y in zip(a, b))
+
+    assert run == run_again
+    assert math.isclose(cosine(run, run), 1.0, rel_tol=1e-6)
+    assert cosine(run, embeddings.embed_query("跑步")) > cosine(other, embeddings.embed_query("跑步"))
+    assert embeddings.embed_query("。。。")[0] == 1.0
@@ -0,0 +1,301 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from src.agents import orchestrator
+
+ADVISORY_QUERY = "我该不该换工作"
+
+
+def _checkpointed_threads(path):
+    with sqlite3.connect(path) as conn:
+        return {row[0] for row in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")}
+
+
+class TestCheckpointRetention:
+    @pytest.fixture
+    def board(self, make_board):
+        return make_board()
+
+    def _meet(self, board, meeting_id):
+        return asyncio.run(board.run_meeting(ADVISORY_QUERY, meeting_id=meeting_id))
+
+    def test_caps_number_of_finished_meetings(self, board, monkeypatch):
+        monkeypatch.setattr(orchestrator, "CHECKPOINT_MAX_MEETINGS", 2)
+        for meeting_id in ("m1", "m2", "m3"):
+            self._meet(board, meeting_id)
+
+        assert _checkpointed_threads(board.checkpoint_path) == {"m2", "m3"}
+
+    def test_drops_meetings_past_retention(self, board, monkeypatch):
+        monkeypatch.setattr(orchestrator, "CHECKPOINT_RETENTION_DAYS", 1e-9)
+        self._meet(board, "old")
+        self._meet(board, "new")
+
+        assert _checkpointed_threads(board.checkpoint_path) == {"new"}
+
+    def test_zero_means_unlimited(self, board, monkeypatch):
+        monkeypatch.setattr(orchestrator, "CHECKPOINT_RETENTION_DAYS", 0)
+        monkeypatch.setattr(orchestrator, "CHECKPOINT_MAX_MEETINGS", 0)
+        for meeting_id in ("m1", "m2"):
+            self._meet(board, meeting_id)
+
+        assert _checkpointed_threads(board.checkpoint_path) == {"m1", "m2"}
+
+    def test_finished_meeting_still_replays_from_checkpoint(self, board):
+        state = self._meet(board, "m1")
+
+        async def replay():
+            return [event async for event in board.replay_meeting("m1")]
+
+        events = asyncio.run(replay())
+        assert events[-1]["state"]["final_verdict"] == state["final_verdict"]
+
+
+class TestNodeTimeouts:
+    @pytest.fixture
+    def board(self, make_board):
+        return make_board(checkpoint_path=None)
+
+    def test_slow_advisory_node_is_degraded(self, board, monkeypatch):
+        async def slow_profile(query):
+            await asyncio.sleep(5)
+
+        monkeypatch.setattr(board.mem0, "aget_profile", slow_profile)
+        monkeypatch.setitem(orchestrator.NODE_TIMEOUTS, "profile_loader", 0.05)
+        state = asyncio.run(board.run_meeting(ADVISORY_QUERY))
+
+        assert [item["node"] for item in state["degraded"]] == ["profile_loader"]
+        assert "暂不可用" in state["user_profile"]
+        assert state["final_verdict"]
+
+    def test_write_node_ignores_deadlines(self, board, monkeypatch):
+        async def slow_execute(query):
+            await asyncio.sleep(0.2)
+            return "已记账"
+
+        monkeypatch.setattr(board.cfo, "execute", slow_execute)
+        monkeypatch.setattr(orchestrator, "MEETING_SLA", 0.01)
+        state = asyncio.run(board.run_meeting("午饭花了35元"))
+
+        assert state["cfo_result"] == "已记账"
+        assert not state.get("degraded")
+
+
+class TestCoalescing:
+    @pytest.fixture
+    def board(self, make_board):
+        return make_board(checkpoint_path=None, coalesce=True)
+
+    @staticmethod
+    def _run_concurrently(board, query, times=2):
+        async def final(query):
+            return [event async for event in board.astream_meeting(query)][-1]
+
+        async def scenario():
+            return await asyncio.gather(*(final(query) for _ in range(times)))
+
+        return asyncio.run(scenario())
+
+    def test_identical_advisory_meetings_are_coalesced(self, board, monkeypatch):
+        async def slow_profile(query):
+            await asyncio.sleep(0.2)
+            return "画像"
+
+        monkeypatch.setattr(board.mem0, "aget_profile", slow_profile)
+        finals = self._run_concurrently(board, ADVISORY_QUERY)
+
+        assert [bool(final.get("coalesced")) for final in finals] == [False, True]
+
+    def test_identical_requests_are_routed_once(self, board, monkeypatch):
+        routed = []
+        decide = board.router.adecide
+
+        async def counting_decide(query):
+            routed.append(query)
+            await asyncio.sleep(0.05)
+            return await decide(query)
+
+        async def slow_profile(query):
+            await asyncio.sleep(0.2)
+            return "画像"
+
+        monkeypatch.setattr(board.router, "adecide", counting_decide)
+        monkeypatch.setattr(board.mem0, "aget_profile", slow_profile)
+
+        async def final():
+            return [event async for event in board.astream_meeting(ADVISORY_QUERY)][-1]
+
+        async def scenario():
+            early = [asyncio.create_task(final()) for _ in range(2)]
+            await asyncio.sleep(0.1)  # 路由已经结束，会议还在进行
+            late = asyncio.create_task(final())
+            return await asyncio.gather(*early, late)
+
+        finals = asyncio.run(scenario())
+        assert routed == [ADVISORY_QUERY]
+        assert [bool(final.get("coalesced")) for final in finals] == [False, True, True]
+
+    def test_identical_transactions_are_all_booked(self, board, monkeypatch):
+        booked = []
+
+        async def execute(query):
+            booked.append(query)
+            await asyncio.sleep(0.2)
+            return "已记账"
+
+        monkeypatch.setattr(board.cfo, "execute", execute)
+        finals = self._run_concurrently(board, "午饭花了35元")
+
+        assert len(booked) == 2
+        assert not any(final.get("coalesced") for final in finals)
+        assert all(final["state"]["cfo_result"] == "已记账" for final in finals)
+
+
+class TestReportCache:
+    @staticmethod
+    def _cache_flags(board, monkeypatch):
+        flags = []
+        consult = board.archivist.aconsult
+
+        async def spy(query, use_cache=True, **kwargs):
+            flags.append(use_cache)
+            return await consult(query, use_cache=use_cache, **kwargs)
+
+        monkeypatch.setattr(board.archivist, "aconsult", spy)
+        asyncio.run(board.run_meeting(ADVISORY_QUERY))
+        return flags
+
+    def test_archivist_reuses_reports_by_default(self, make_board, monkeypatch):
+        assert self._cache_flags(make_board(checkpoint_path=None), monkeypatch) == [True]
+
+    def test_report_cache_can_be_disabled(self, make_board, monkeypatch):
+        assert self._cache_flags(make_board(checkpoint_path=None, report_cache=False), monkeypatch) == [False]
+
+
+
+def _meeting_events(board, query, debate_mode=None):
+    async def collect():
+        return [event async for event in board.astream_meeting(query, debate_mode)]
+
+    return asyncio.run(collect())
+
+
+def _started_nodes(events):
+    return [event["node"] for event in events if event["type"] == "node_start"]
+
+
+class TestDebateModes:
+    FAN_OUT = {"archivist", "cfo_advisory", "profile_loader"}
+    RECONCILE_MATCH = r"\[Your Draft\]"
+
+    @pytest.fixture
+    def board(self, make_board, monkeypatch):
+        # 战略官逐 token 输出 (会让出事件循环)，教练拿到前几个字就开始发言
+        monkeypatch.setattr(orchestrator, "STRATEGIST_HEAD_CHARS", 5)
+        board = make_board(checkpoint_path=None)
+        monkeypatch.setattr(board.strategist.llm, "tokens_per_second", 5000)
+        return board
+
+    def _script_reconcile(self, board, monkeypatch, response):
+        monkeypatch.setattr(board.coach.llm, "script", {"coach": [{"match": self.RECONCILE_MATCH, "response": response}]})
+
+    def test_sequential_node_order(self, board):
+        nodes = _started_nodes(_meeting_events(board, ADVISORY_QUERY, "sequential"))
+
+        assert set(nodes[:3]) == self.FAN_OUT
+        assert nodes[3:] == ["strategist", "coach", "synthesizer"]
+
+    def test_parallel_node_order(self, board):
+        nodes = _started_nodes(_meeting_events(board, ADVISORY_QUERY, "parallel"))
+
+        assert set(nodes[:3]) == self.FAN_OUT
+        assert nodes[3:] == ["debate", "synthesizer"]
+
+    def test_coach_starts_on_partial_opinion(self, board, monkeypatch):
+        self._script_reconcile(board, monkeypatch, "NO_CHANGE")
+        seen = []
+        aopine = board.coach.aopine
+
+        async def spy(query, context, strategist_opinion, user_profile, on_token=None):
+            seen.append(strategist_opinion)
+            return await aopine(query, context, strategist_opinion, user_profile, on_token=on_token)
+
+        monkeypatch.setattr(board.coach, "aopine", spy)
+        state = asyncio.run(board.run_meeting(ADVISORY_QUERY, debate_mode="parallel"))
+
+        assert seen[0].endswith(orchestrator.PARTIAL_OPINION_NOTE)
+        head = seen[0][: -len(orchestrator.PARTIAL_OPINION_NOTE)]
+        assert head and state["strategist_opinion"].startswith(head) and head != state["strategist_opinion"]
+
+    def test_no_change_keeps_the_draft(self, board, monkeypatch):
+        self._script_reconcile(board, monkeypatch, "NO_CHANGE")
+        events = _meeting_events(board, ADVISORY_QUERY, "parallel")
+        state = events[-1]["state"]
+
+        coach_tokens = "".join(e["delta"] for e in events if e["type"] == "token" and e["node"] == "coach")
+        assert "NO_CHANGE" not in state["coach_opinion"]
+        assert state["coach_opinion"] == coach_tokens
+        assert state["final_verdict"]
+
+    def test_addendum_is_appended_and_streamed(self, board, monkeypatch):
+        self._script_reconcile(board, monkeypatch, "补充：别忽视预算风险。")
+        events = _meeting_events(board, ADVISORY_QUERY, "parallel")
+        state = events[-1]["state"]
+
+        coach_tokens = "".join(e["delta"] for e in events if e["type"] == "token" and e["node"] == "coach")
+        assert state["coach_opinion"].endswith("\n\n补充：别忽视预算风险。")
+        assert state["coach_opinion"] == coach_tokens
+
+
+class TestAsyncNodes:
+    def test_concurrent_meetings_overlap_on_one_loop(self, make_board, monkeypatch):
+        board = make_board(checkpoint_path=None)
+        for member in (board.strategist, board.coach, board.synthesizer):
+            monkeypatch.setattr(member.llm, "latency", 0.3)
+
+        async def timed(queries):
+            start = time.perf_counter()
+            states = await asyncio.gather(*(board.run_meeting(query) for query in queries))
+            return time.perf_counter() - start, states
+
+        single, _ = asyncio.run(timed([ADVISORY_QUERY]))
+        double, states = asyncio.run(timed([ADVISORY_QUERY, "我该不该辞职读研"]))
+
+        assert single >= 0.9
+        assert double < single * 1.5
+        assert all(state["final_verdict"] for state in states)
+
+
+class TestEventStream:
+    @pytest.fixture
+    def events(self, make_board):
+        return _meeting_events(make_board(checkpoint_path=None), ADVISORY_QUERY, "sequential")
+
+    def test_each_node_starts_streams_then_ends(self, events):
+        open_nodes = set()
+        for event in events[:-1]:
+            if event["type"] == "node_start":
+                open_nodes.add(event["node"])
+            elif event["type"] == "token":
+                assert event["node"] in open_nodes
+            elif event["type"] == "node_end":
+                open_nodes.remove(event["node"])
+
+        assert not open_nodes
+        assert events[-1]["type"] == "final"
+
+    def test_token_deltas_join_to_the_final_opinions(self, events):
+        state = events[-1]["state"]
+        for node, field in (("strategist", "strategist_opinion"), ("coach", "coach_opinion"), ("synthesizer", "final_verdict")):
+            deltas = [event["delta"] for event in events if event["type"] == "token" and event["node"] == node]
+            assert len(deltas) > 1
+            assert "".join(deltas) == state[field]
+
+    def test_node_end_carries_the_node_output(self, events):
+        ends = {event["node"]: event for event in events if event["type"] == "node_end"}
+
+        assert ends["synthesizer"]["output"]["final_verdict"] == events[-1]["state"]["final_verdict"]
+        assert all(event["duration"] >= 0 for event in ends.values())
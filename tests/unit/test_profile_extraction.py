@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from src.infrastructure.profile_extraction import ProfileExtractionQueue
+
+
+class Recorder:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+        self.lock = threading.Lock()
+
+    def __call__(self, text: str):
+        with self.lock:
+            self.calls.append(text)
+        if self.fail:
+            raise RuntimeError("LLM 不可用")
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "profile_extraction.sqlite")
+
+
+def _queue(remember, state_path, **options):
+    options.setdefault("max_calls_per_minute", 0)
+    return ProfileExtractionQueue(remember=remember, state_path=state_path, **options)
+
+
+def test_small_notes_are_batched_into_one_call(state_path):
+    remember = Recorder()
+    extracted = []
+    queue = _queue(remember, state_path, on_extracted=extracted.extend)
+    with queue.paused():
+        for i in range(3):
+            assert queue.submit(f"笔记 {i}", source=f"{i}.md")
+        assert queue.pending() == 3
+
+    assert queue.drain(timeout=5)
+    assert remember.calls == ["笔记 0\n\n---\n\n笔记 1\n\n---\n\n笔记 2"]
+    assert [job.source for job in extracted] == ["0.md", "1.md", "2.md"]
+    queue.stop()
+
+
+def test_batches_respect_max_chars(state_path):
+    remember = Recorder()
+    queue = _queue(remember, state_path, batch_max_chars=10)
+    with queue.paused():
+        for text in ("aaaaaa", "bbbbbb", "cc"):
+            queue.submit(text)
+
+    assert queue.drain(timeout=5)
+    assert remember.calls == ["aaaaaa", "bbbbbb\n\n---\n\ncc"]
+    queue.stop()
+
+
+def test_duplicate_and_already_extracted_content_is_skipped(state_path):
+    remember = Recorder()
+    queue = _queue(remember, state_path)
+    with queue.paused():
+        assert queue.submit("同一篇笔记")
+        assert not queue.submit("同一篇笔记")
+        assert not queue.submit("   ")
+    assert queue.drain(timeout=5)
+    queue.stop()
+
+    # 重启之后 (新的队列实例) 也不会重复提取
+    restarted = _queue(remember, state_path)
+    assert not restarted.submit("同一篇笔记")
+    assert remember.calls == ["同一篇笔记"]
+    restarted.stop()
+
+
+def test_failed_extraction_can_be_resubmitted(state_path):
+    queue = _queue(Recorder(fail=True), state_path)
+    assert queue.submit("会失败的笔记")
+    assert queue.drain(timeout=5)
+
+    assert queue.submit("会失败的笔记")
+    queue.stop()
+
+
+def test_paused_queue_does_not_call_llm(state_path):
+    remember = Recorder()
+    queue = _queue(remember, state_path)
+    with queue.paused():
+        queue.submit("排队中")
+        assert not queue.drain(timeout=0.3)
+        assert remember.calls == []
+    assert queue.drain(timeout=5)
+    queue.stop()
@@ -0,0 +1,54 @@
+import sqlite3
+
+import pytest
+
+from src.infrastructure.retrieval_stats import RetrievalStats
+
+
+def _stored(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return dict(conn.execute("SELECT path, hits FROM retrievals").fetchall())
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "retrieval_stats.sqlite")
+
+
+def test_record_is_buffered_until_threshold(db_path):
+    stats = RetrievalStats(db_path, flush_hits=3, flush_seconds=3600)
+
+    stats.record(["a.md", "a.md", None])
+    assert _stored(db_path) == {}
+    assert stats.hits() == {"a.md": 2}
+
+    stats.record(["b.md"])
+    assert _stored(db_path) == {"a.md": 2, "b.md": 1}
+    stats.close()
+
+
+def test_flush_after_interval(db_path):
+    stats = RetrievalStats(db_path, flush_hits=1000, flush_seconds=0)
+
+    stats.record(["a.md"])
+    assert _stored(db_path) == {"a.md": 1}
+    stats.close()
+
+
+def test_hits_merge_stored_and_pending(db_path):
+    stats = RetrievalStats(db_path, flush_hits=1000, flush_seconds=3600)
+    stats.record(["a.md"])
+    stats.flush()
+    stats.record(["a.md", "b.md"])
+
+    assert stats.hits() == {"a.md": 2, "b.md": 1}
+    stats.close()
+
+
+def test_close_flushes_pending_counts(db_path):
+    stats = RetrievalStats(db_path, flush_hits=1000, flush_seconds=3600)
+    stats.record(["a.md"])
+    stats.close()
+
+    assert _stored(db_path) == {"a.md": 1}
+    stats.flush()  # 关闭后再 flush 不报错
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from src.agents.route_classifier import (
+    BOARD_ADVISORY,
+    FINANCE_EXECUTION,
+    KNNRouteClassifier,
+    RouteGuess,
+    classify_by_rules,
+)
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("I just spent $50 on KFC", FINANCE_EXECUTION),
+    ("午饭花了35元", FINANCE_EXECUTION),
+    ("我的余额还有多少", FINANCE_EXECUTION),
+    ("I feel guilty about spending $50 on KFC", BOARD_ADVISORY),
+    ("我该不该换工作", BOARD_ADVISORY),
+])
+def test_rules_route_confident_cases(query, intent):
+    guess = classify_by_rules(query)
+    assert guess.intent == intent and guess.confidence >= 0.85
+
+
+def test_rules_have_low_confidence_without_amount():
+    guess = classify_by_rules("I bought a book")
+    assert guess.intent == FINANCE_EXECUTION and guess.confidence < 0.85
+    assert classify_by_rules("今天天气不错") is None
+
+
+@pytest.fixture
+def knn(tmp_path):
+    classifier = KNNRouteClassifier(str(tmp_path / "router.sqlite"), k=3, min_similarity=0.8)
+    yield classifier
+    classifier.close()
+
+
+def _llm(intent):
+    return RouteGuess(intent, 1.0, "llm", "test")
+
+
+def test_knn_learns_from_llm_decisions(knn):
+    assert knn.classify([1.0, 0.0]) is None
+
+    knn.record("记一下", [1.0, 0.0], _llm(FINANCE_EXECUTION))
+    knn.record("聊聊", [0.0, 1.0], _llm(BOARD_ADVISORY))
+    knn.record("近邻猜的", [1.0, 0.0], RouteGuess(BOARD_ADVISORY, 0.9, "knn", "test"))  # 不作为样本
+
+    guess = knn.classify([0.95, 0.1])
+    assert guess.intent == FINANCE_EXECUTION and guess.tier == "knn"
+    assert knn.count() == 2
+    assert knn.classify([0.7, 0.7]) is None  # 没有足够相似的样本
+
+
+def test_knn_samples_survive_restart(tmp_path):
+    path = str(tmp_path / "router.sqlite")
+    first = KNNRouteClassifier(path)
+    first.record("记一下", [1.0, 0.0], _llm(FINANCE_EXECUTION))
+    first.close()
+
+    second = KNNRouteClassifier(path)
+    assert second.classify([1.0, 0.0]).intent == FINANCE_EXECUTION
+    second.close()
+
+
+def test_router_short_circuits_on_rules(monkeypatch):
+    from src.agents.router import Router
+
+    router = Router(use_knn=False)
+    monkeypatch.setattr(router, "_decide_with_llm", lambda query: pytest.fail("不应该调用 LLM"))
+
+    assert router.decide("午饭花了35元") == FINANCE_EXECUTION
+    assert asyncio.run(router.adecide("我该不该换工作")) == BOARD_ADVISORY
+
+
+def test_router_falls_back_to_llm():
+    from src.agents.router import Router
+
+    # 测试环境的脚本化 LLM 对路由固定返回 board_advisory
+    assert asyncio.run(Router(use_knn=False).adecide("今天天气不错")) == BOARD_ADVISORY
@@ -0,0 +1,114 @@
+import json
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+from src.service.server import create_app
+
+ADVISORY_QUERY = "我该不该换工作"
+
+
+@pytest.fixture
+def components(knowledge_base, make_board):
+    from src.infrastructure.obsidian_loader import MemoryIngestionEngine
+
+    return knowledge_base, MemoryIngestionEngine(knowledge_base=knowledge_base), make_board()
+
+
+@pytest.fixture
+def client(components):
+    with TestClient(create_app(*components, api_token="", watch_vault="")) as client:
+        yield client
+
+
+def _sse_events(text):
+    return [json.loads(line[len("data: "):]) for line in text.splitlines() if line.startswith("data: ")]
+
+
+def test_healthz(client):
+    body = client.get("/healthz").json()
+    assert body["status"] == "ok" and body["ingest_jobs_running"] == 0
+
+
+def test_token_auth(components):
+    with TestClient(create_app(*components, api_token="secret", watch_vault="")) as client:
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/search", params={"q": "x"}).status_code == 401
+        authorized = client.get("/search", params={"q": "x"}, headers={"Authorization": "Bearer secret"})
+        assert authorized.status_code == 200
+
+
+def test_run_meeting_returns_final_state(client):
+    response = client.post("/meetings", json={"query": ADVISORY_QUERY, "meeting_id": "m1"})
+
+    assert response.status_code == 200
+    assert response.json()["meeting_id"] == "m1"
+    assert response.json()["state"]["final_verdict"]
+
+
+@pytest.mark.parametrize("body", [{}, {"query": "  "}, {"query": "x", "debate_mode": "shouting"}, []])
+def test_meeting_request_validation(client, body):
+    assert client.post("/meetings", json=body).status_code == 400
+
+
+def test_stream_meeting_sends_sse_events(client):
+    response = client.post("/meetings/stream", json={"query": ADVISORY_QUERY})
+    events = _sse_events(response.text)
+
+    assert events[0]["type"] == "node_start"
+    assert any(event["type"] == "token" for event in events)
+    assert events[-1]["type"] == "final" and events[-1]["state"]["final_verdict"]
+
+
+def test_replay_and_resume(client):
+    client.post("/meetings", json={"query": ADVISORY_QUERY, "meeting_id": "m1"})
+
+    replayed = _sse_events(client.get("/meetings/m1/replay").text)
+    assert all(event.get("replayed") for event in replayed[:-1])
+    assert replayed[-1]["type"] == "final"
+
+    assert client.post("/meetings/m1/resume").json()["resumed"] is True
+    assert client.get("/meetings/missing/replay").status_code == 404
+    assert client.post("/meetings/missing/resume").status_code == 404
+
+
+def test_search(client, knowledge_base):
+    from src.core.models.domain_models import LifeEvent
+
+    knowledge_base.add_events([
+        LifeEvent(id="e1", content="跑步五公里", source_type="obsidian", metadata={"source_file": "a.md"})
+    ])
+
+    body = client.get("/search", params={"q": "跑步", "k": "3"}).json()
+    assert [result["id"] for result in body["results"]] == ["e1"]
+    assert client.get("/search").status_code == 400
+    assert client.get("/search", params={"q": "x", "k": "many"}).status_code == 400
+
+
+def test_ingest_job_lifecycle(client, tmp_path):
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    (vault / "note.md").write_text("# 2024-03-01 周五\n跑步五公里", encoding="utf-8")
+
+    job = client.post("/ingest", json={"folder_path": str(vault), "sync_mode": "vector_only", "unlimited": True})
+    assert job.status_code == 202
+    job = job.json()
+    assert job["total"] == 1 and job["unlimited"] is True
+
+    deadline = time.time() + 30
+    while job["status"] == "running" and time.time() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/ingest/{job['job_id']}").json()
+    assert job["status"] == "complete"
+    assert job["stats"]["added"] == 1
+
+
+@pytest.mark.parametrize("body", [
+    {"folder_path": "/does/not/exist"},
+    {"folder_path": ".", "sync_mode": "everything"},
+    {"folder_path": ".", "unlimited": "yes"},
+])
+def test_ingest_validation(client, body):
+    assert client.post("/ingest", json=body).status_code == 400
+    assert client.get("/ingest/missing").status_code == 404
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from src.infrastructure.single_flight import SingleFlight
+
+
+def _source(calls, events, gate=None, error=None):
+    async def factory():
+        calls.append(1)
+        for event in events:
+            if gate is not None:
+                await gate.wait()
+            yield event
+        if error is not None:
+            raise error
+
+    return factory
+
+
+async def _collect(flight, key, factory):
+    return [item async for item in flight.stream(key, factory)]
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight, calls, gate = SingleFlight(), [], asyncio.Event()
+        first = asyncio.create_task(_collect(flight, "k", _source(calls, [1, 2], gate)))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(_collect(flight, "k", _source(calls, [9])))
+        await asyncio.sleep(0)
+        gate.set()
+        return calls, await first, await second, flight.in_flight()
+
+    calls, first, second, in_flight = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert first == [(False, 1), (False, 2)]
+    assert second == [(True, 1), (True, 2)]
+    assert in_flight == 0
+
+
+def test_late_joiner_gets_earlier_events():
+    async def scenario():
+        flight, gate = SingleFlight(), asyncio.Event()
+
+        async def factory():
+            yield "early"
+            await gate.wait()
+            yield "late"
+
+        first = asyncio.create_task(_collect(flight, "k", factory))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(_collect(flight, "k", factory))
+        await asyncio.sleep(0.01)
+        gate.set()
+        return await first, await second
+
+    first, second = asyncio.run(scenario())
+    assert [event for _, event in second] == [event for _, event in first] == ["early", "late"]
+
+
+def test_sequential_calls_run_again():
+    async def scenario():
+        flight, calls = SingleFlight(), []
+        await _collect(flight, "k", _source(calls, [1]))
+        await _collect(flight, "k", _source(calls, [1]))
+        return calls
+
+    assert len(asyncio.run(scenario())) == 2
+
+
+def test_errors_reach_every_subscriber():
+    async def scenario():
+        flight, gate = SingleFlight(), asyncio.Event()
+        factory = _source([], [1], gate, error=RuntimeError("boom"))
+        tasks = [asyncio.create_task(_collect(flight, "k", factory)) for _ in range(2)]
+        await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_abandoned_subscriber_does_not_cancel_flight():
+    async def scenario():
+        flight, calls, gate = SingleFlight(), [], asyncio.Event()
+        factory = _source(calls, [1, 2], gate)
+        first = asyncio.create_task(_collect(flight, "k", factory))
+        second = asyncio.create_task(_collect(flight, "k", factory))
+        await asyncio.sleep(0)
+        first.cancel()
+        gate.set()
+        return await second
+
+    assert [event for _, event in asyncio.run(scenario())] == [1, 2]
+
+
+def test_subscriber_count_drops_when_subscribers_leave():
+    async def scenario():
+        flight, gate = SingleFlight(), asyncio.Event()
+        factory = _source([], [1], gate)
+        first = asyncio.create_task(_collect(flight, "k", factory))
+        second = asyncio.create_task(_collect(flight, "k", factory))
+        await asyncio.sleep(0)
+        running = flight.running("k")
+        current = flight._flights["k"]
+        counts = [current.subscribers]
+        second.cancel()
+        await asyncio.sleep(0)
+        counts.append(current.subscribers)
+        gate.set()
+        await first
+        counts.append(current.subscribers)
+        return running, counts, flight.running("k")
+
+    running, counts, still_running = asyncio.run(scenario())
+    assert running and not still_running
+    assert counts == [2, 1, 0]
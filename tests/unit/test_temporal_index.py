@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+
+from src.core.models.domain_models import LifeEvent
+from src.infrastructure.date_resolver import DateRange
+from src.infrastructure.temporal_index import TemporalIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = TemporalIndex(str(tmp_path / "temporal.sqlite"))
+    yield index
+    index.close()
+
+
+def test_ids_between_orders_by_date(index):
+    index.add([("late", 20240310), ("early", 20240301), ("undated", None), ("outside", 20240401)])
+
+    assert index.ids_between(20240301, 20240331) == ["early", "late"]
+    assert index.count() == 4
+
+
+def test_delete_and_clear(index):
+    index.add([("a", 20240301), ("b", 20240302)])
+    index.delete(["a"])
+    assert index.ids_between(20240301, 20240302) == ["b"]
+
+    index.clear()
+    assert index.count() == 0
+
+
+def _event(day, topic):
+    return LifeEvent(
+        id=f"{day}-{topic}",
+        content=f"{topic}的记录",
+        source_type="obsidian",
+        metadata={"Date/Title": day, "source_file": f"Journal/{day}.md"},
+    )
+
+
+class TestDateBoostedSearch:
+    """时间范围只提升排名，不过滤掉范围外的记录"""
+
+    @pytest.fixture
+    def kb(self, knowledge_base):
+        knowledge_base.add_events([
+            _event("2024-03-01", "跑步五公里"),
+            _event("2024-03-02", "读书笔记"),
+            _event("2024-02-01", "跑步十公里"),
+            _event("2024-01-15", "跑步三公里"),
+        ])
+        return knowledge_base
+
+    @staticmethod
+    def _ids(events):
+        return [event.id for event in events]
+
+    def test_range_ranks_matching_dates_first(self, kb):
+        ids = self._ids(kb.search("跑步", k=3, date_range=DateRange(date(2024, 3, 1), date(2024, 3, 31))))
+
+        assert ids[0] == "2024-03-01-跑步五公里"
+        assert len(ids) == 3  # 范围内不足 k 条时，范围外的相关记录补齐
+
+    def test_empty_range_falls_back_to_whole_vault(self, kb):
+        scoped = kb.search("跑步", k=3, date_range=DateRange(date(2020, 1, 1), date(2020, 1, 31)))
+
+        assert self._ids(scoped) == self._ids(kb.search("跑步", k=3))
+        assert all("跑步" in event.content for event in scoped)
@@ -0,0 +1,99 @@
+import os
+import threading
+import time
+
+import pytest
+
+from src.infrastructure.ingestion_manifest import IngestionManifest
+from src.infrastructure.vault_watcher import VaultWatcher, _is_note
+
+
+class FakeEngine:
+    """记录 sync_paths 的调用；前 failures 次调用抛异常"""
+
+    def __init__(self, manifest, failures: int = 0):
+        self.manifest = manifest
+        self.failures = failures
+        self.calls = []
+        self.synced = threading.Event()
+
+    def sync_paths(self, folder_path, relative_paths, sync_mode="full"):
+        self.calls.append(sorted(relative_paths))
+        if len(self.calls) <= self.failures:
+            raise RuntimeError("Embedding 服务不可用")
+        self.synced.set()
+        return {"added": len(relative_paths), "updated": 0, "deleted": 0}
+
+
+@pytest.fixture
+def vault(tmp_path):
+    folder = tmp_path / "vault"
+    folder.mkdir()
+    return folder
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    return IngestionManifest(str(tmp_path / "manifest.sqlite"))
+
+
+def _watcher(engine, vault, **options):
+    return VaultWatcher(engine, str(vault), debounce_seconds=0.05, poll_interval=0.05, force_polling=True, **options)
+
+
+def test_is_note_skips_hidden_and_non_markdown():
+    assert _is_note("Journal/2024-01-01.md")
+    assert not _is_note(".obsidian/workspace.md")
+    assert not _is_note("Journal/image.png")
+
+
+def test_events_are_debounced_and_coalesced(manifest, vault):
+    watcher = _watcher(FakeEngine(manifest), vault, max_delay_seconds=10)
+    path = str(vault / "a.md")
+    for _ in range(3):
+        watcher.mark(path)
+    watcher.mark(str(vault / ".obsidian" / "b.md"))
+
+    assert watcher._take_ready() == []
+    time.sleep(0.1)
+    assert watcher._take_ready() == ["a.md"]
+    assert watcher.stats["events"] == 3
+
+
+def test_catch_up_marks_changes_made_while_stopped(manifest, vault):
+    (vault / "new.md").write_text("新笔记", encoding="utf-8")
+    (vault / "same.md").write_text("没变", encoding="utf-8")
+    stat = os.stat(vault / "same.md")
+    manifest.record(str(vault / "same.md"), "h", stat.st_mtime_ns, stat.st_size, [])
+    manifest.record(str(vault / "deleted.md"), "h", 1, 1, [])
+    manifest.record(str(vault.parent / "other-vault" / "x.md"), "h", 1, 1, [])
+
+    watcher = _watcher(FakeEngine(manifest), vault)
+    watcher._catch_up()
+
+    assert sorted(watcher._pending) == ["deleted.md", "new.md"]
+
+
+def test_failed_sync_is_retried_with_backoff(manifest, vault):
+    engine = FakeEngine(manifest, failures=2)
+    watcher = _watcher(engine, vault)
+    watcher.start()
+    try:
+        (vault / "a.md").write_text("内容", encoding="utf-8")
+        assert engine.synced.wait(timeout=5)
+    finally:
+        watcher.stop()
+
+    assert engine.calls == [["a.md"], ["a.md"], ["a.md"]]
+    assert watcher.stats["indexed"] == 1
+    assert watcher._pending == {} and watcher._retry_at == {}
+
+
+def test_requeue_backs_off_exponentially(manifest, vault):
+    watcher = _watcher(FakeEngine(manifest), vault, max_retry_delay=0.15)
+
+    assert watcher._requeue(["a.md"]) == pytest.approx(0.1)
+    assert watcher._requeue(["a.md"]) == pytest.approx(0.15)
+    assert watcher._take_ready() == []
+    time.sleep(0.2)
+    assert watcher._take_ready() == ["a.md"]